@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # =========================
 MIDDLEWARE = [
+    "core.instrumentation.InstrumentationMiddleware",
+    "core.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -63,6 +65,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Responses smaller than this many bytes are sent uncompressed; below
+# about a kilobyte gzip saves less than it costs.
+GZIP_MIN_LENGTH = int(os.environ.get("GZIP_MIN_LENGTH", 1024))
+
 # =========================
 # URL & WSGI
 # =========================
@@ -96,6 +102,107 @@ DATABASES = {
     }
 }
 
+# High-concurrency SQLite profile ("concurrent", the default) or stock
+# settings ("default"). WAL lets readers run alongside the single writer,
+# synchronous=NORMAL is durable across application crashes in WAL mode,
+# busy_timeout makes contended writers wait instead of failing with
+# "database is locked", and BEGIN IMMEDIATE takes the write lock up front so
+# a transaction never fails halfway on a lock upgrade.
+SQLITE_PROFILE = os.environ.get("DJANGO_SQLITE_PROFILE", "concurrent")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("DJANGO_SQLITE_BUSY_TIMEOUT_MS", 20000))
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3" and SQLITE_PROFILE == "concurrent":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": int(os.environ.get("DJANGO_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "init_command": ";".join([
+                "PRAGMA journal_mode=WAL",
+                "PRAGMA synchronous=NORMAL",
+                f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+                "PRAGMA mmap_size=268435456",  # 256 MiB
+                "PRAGMA cache_size=-65536",  # 64 MiB
+                "PRAGMA temp_store=MEMORY",
+            ]),
+        },
+    })
+
+# Funnel tap/toggle writes through one writer thread per process that
+# commits whatever is queued as a single transaction (see core/writes.py).
+ATTENDANCE_WRITE_COORDINATOR = os.environ.get(
+    "ATTENDANCE_WRITE_COORDINATOR",
+    str(DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3"),
+).lower() in ("1", "true", "yes")
+
+# Month the academic year starts in. Closed years can be moved out of the
+# live attendance table with the archive_attendance command.
+ACADEMIC_YEAR_START_MONTH = int(os.environ.get("ACADEMIC_YEAR_START_MONTH", 7))
+
+# Background jobs (exports, rebuilds) run by `manage.py run_jobs`. At most
+# JOB_CONCURRENCY run at once across all worker processes, and a teacher
+# may have JOB_MAX_PENDING queued or running. A running job silent for
+# JOB_STALE_AFTER seconds is assumed lost with its worker and requeued.
+# Result files are kept under JOB_RESULTS_ROOT, outside MEDIA_ROOT so they
+# are never served publicly, and finished jobs are deleted with their
+# files JOB_RESULT_RETENTION seconds after they finish.
+JOB_CONCURRENCY = int(os.environ.get("JOB_CONCURRENCY", 2))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 3))
+JOB_STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", 600))
+JOB_RESULTS_ROOT = Path(os.environ.get("JOB_RESULTS_ROOT", BASE_DIR / "private"))
+JOB_RESULT_RETENTION = int(os.environ.get("JOB_RESULT_RETENTION", 7 * 24 * 3600))
+
+# =========================
+# CACHE
+# =========================
+# Local memory by default. Point DJANGO_CACHE_BACKEND at
+# "django.core.cache.backends.filebased.FileBasedCache" (with
+# DJANGO_CACHE_LOCATION set to a directory) to share the cache between
+# worker processes without running an external service.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "edutag"),
+    }
+}
+
+# A cache private to each process never sees the invalidations made by the
+# other worker processes, so its entries (and the versions behind ETags)
+# must expire quickly there; a shared backend can keep them for a day.
+PROCESS_LOCAL_CACHE = CACHES["default"]["BACKEND"] in (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+PROCESS_LOCAL_CACHE_TIMEOUT = 60
+
+# Seconds a cached branch/subject/teacher/roster response is kept. Entries
+# are retired earlier whenever the underlying rows change.
+REFERENCE_CACHE_TIMEOUT = int(os.environ.get(
+    "REFERENCE_CACHE_TIMEOUT", PROCESS_LOCAL_CACHE_TIMEOUT if PROCESS_LOCAL_CACHE else 60 * 60 * 24
+))
+
+# Attendance percentage below which a student is short in a subject, and
+# seconds a precomputed shortage report (see precompute_shortage_reports)
+# is served before it is rebuilt on request.
+ATTENDANCE_SHORTAGE_THRESHOLD = float(os.environ.get("ATTENDANCE_SHORTAGE_THRESHOLD", 75))
+SHORTAGE_REPORT_CACHE_TIMEOUT = int(os.environ.get(
+    "SHORTAGE_REPORT_CACHE_TIMEOUT", PROCESS_LOCAL_CACHE_TIMEOUT if PROCESS_LOCAL_CACHE else 60 * 60 * 26
+))
+
+# =========================
+# PERFORMANCE INSTRUMENTATION
+# =========================
+# Log slow statements and repeated (N+1) query patterns per request to the
+# "core.performance" logger. On by default while DEBUG is.
+PERF_DETECTOR = os.environ.get("DJANGO_PERF_DETECTOR", str(DEBUG)).lower() in ("1", "true", "yes")
+PERF_SLOW_QUERY_MS = float(os.environ.get("DJANGO_PERF_SLOW_QUERY_MS", 100))
+PERF_N_PLUS_ONE_THRESHOLD = int(os.environ.get("DJANGO_PERF_N_PLUS_ONE_THRESHOLD", 10))
+
+# When set, /metrics requires "Authorization: Bearer <token>".
+METRICS_TOKEN = os.environ.get("DJANGO_METRICS_TOKEN", "")
+
 # =========================
 # PASSWORD VALIDATION
 # =========================
@@ -143,7 +250,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # =========================
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.ClaimsJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -153,6 +260,15 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 
@@ -168,8 +284,19 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "USER_ID_FIELD": "id",
     "USER_ID_CLAIM": "user_id",
+    "TOKEN_OBTAIN_SERIALIZER": "core.authentication.TeacherTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "core.authentication.TeacherTokenRefreshSerializer",
+    "TOKEN_USER_CLASS": "core.authentication.TokenTeacher",
 }
 
+# Seconds a teacher's auth state (active, staff, subjects) is cached in
+# process for tokens without embedded claims and for refreshes. Entries are
+# dropped immediately when the teacher or its subjects change.
+AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", 60))
+
+# Seconds a "not blacklisted" answer for a refresh token is cached.
+JWT_BLACKLIST_CACHE_TTL = int(os.environ.get("JWT_BLACKLIST_CACHE_TTL", 60))
+
 # =========================
 # CORS HEADERS (Cross-Origin Requests)
 # =========================
@@ -1,15 +1,15 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework import permissions
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from core.instrumentation import metrics_view
+from core.thumbnails import THUMBNAIL_DIR, serve_thumbnail
+from core.views import TeacherTokenObtainPairView, TeacherTokenRefreshView
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Student Attendance API",
@@ -28,8 +28,18 @@ urlpatterns = [
     path('api/', include('core.urls')),
 
     # JWT Auth
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/', TeacherTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', TeacherTokenRefreshView.as_view(), name='token_refresh'),
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
+
+    # Profile picture thumbnails: content-hashed, so cacheable forever
+    re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}{THUMBNAIL_DIR}/(?P<path>[\w.-]+)$',
+        serve_thumbnail,
+        name='profile-thumbnail',
+    ),
 
     # Swagger/OpenAPI documentation
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
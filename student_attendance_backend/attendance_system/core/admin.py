@@ -23,7 +23,7 @@ class StudentAdmin(admin.ModelAdmin):
 class AttendanceRecordAdmin(admin.ModelAdmin):
     list_display = ("student", "subject", "status", "timestamp")
     search_fields = ("student__reg_no", "subject__name")
-    list_filter = ("subject__branch", "subject__semester", "timestamp", "status")
+    list_filter = ("subject__branch", "subject__semester", "date", "status")
     ordering = ("-timestamp",)
 
 
@@ -0,0 +1,209 @@
+# Async (ASGI) versions of the hot attendance endpoints. DRF views are
+# synchronous, so under ASGI each would hold a thread for the whole request;
+# these authenticate from the token claims on the event loop and query
+# through the async ORM. Responses match the corresponding DRF endpoints.
+import json
+from functools import wraps
+
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    MethodNotAllowed,
+    NotAuthenticated,
+    NotFound,
+    ParseError,
+    PermissionDenied,
+    ValidationError,
+)
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import taps
+from .authentication import ClaimsJWTAuthentication
+from .models import AttendanceCounter, AttendanceRecord, Student, Subject
+from .serializers import (
+    AttendanceRecordRowSerializer,
+    AttendanceRecordSerializer,
+    StudentRowSerializer,
+    StudentSerializer,
+)
+from .writes import coordinator
+
+authenticator = ClaimsJWTAuthentication()
+
+
+# ---------------- Plumbing ----------------
+def async_api_view(methods):
+    """
+    Wrap an async view with JWT authentication, the ``IsTeacher`` check and
+    DRF-style error responses.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise MethodNotAllowed(request.method)
+                authenticated = await authenticator.aauthenticate(request)
+                if authenticated is None:
+                    raise NotAuthenticated()
+                request.user = authenticated[0]
+                if not request.user.is_staff:
+                    raise PermissionDenied()
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+                response = JsonResponse(detail, status=exc.status_code, safe=False)
+                if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                    response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+                return response
+        return wrapper
+    return decorator
+
+
+async def aget_or_404(queryset, **lookup):
+    try:
+        return await queryset.aget(**lookup)
+    except (TypeError, ValueError, queryset.model.DoesNotExist):
+        raise NotFound(f'No {queryset.model._meta.object_name} matches the given query.')
+
+
+def int_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: ['A valid integer is required.']})
+
+
+async def apaginate(request, queryset, row_serializer_class):
+    """Page-number pagination with the same envelope as DRF's ``PageNumberPagination``."""
+    size = api_settings.PAGE_SIZE
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        raise NotFound('Invalid page.')
+    count = await queryset.acount()
+    last_page = max(1, -(-count // size))
+    if page < 1 or page > last_page:
+        raise NotFound('Invalid page.')
+
+    offset = (page - 1) * size
+    serializer = row_serializer_class(context={'request': request})
+    results = [
+        serializer.to_representation(row)
+        async for row in row_serializer_class.project(queryset)[offset:offset + size]
+    ]
+
+    url = request.build_absolute_uri()
+    return {
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if page < last_page else None,
+        'previous': (
+            None if page == 1
+            else remove_query_param(url, 'page') if page == 2
+            else replace_query_param(url, 'page', page - 1)
+        ),
+        'results': results,
+    }
+
+
+# ---------------- Endpoints ----------------
+@async_api_view(['POST'])
+async def toggle_attendance(request):
+    """Async ``POST /api/attendance/toggle/``."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError as exc:
+        raise ParseError(f'JSON parse error - {exc}')
+    reg_no = data.get('reg_no')
+    subject_id = data.get('subject_id')
+    if not reg_no or not subject_id:
+        return JsonResponse({'error': 'reg_no and subject_id are required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    student = await aget_or_404(Student.objects.all(), reg_no=reg_no)
+    subject = await aget_or_404(Subject.objects.all(), pk=subject_id)
+
+    record = await coordinator.arun(taps.flip_attendance, student.pk, subject.pk)
+    if record is None:
+        return JsonResponse({
+            'message': 'Attendance removed (marked absent).',
+            'student_name': student.name,
+            'reg_no': student.reg_no,
+        })
+
+    record.student = student
+    record.subject = subject
+    serializer = AttendanceRecordSerializer(record, context={'request': request})
+    return JsonResponse(
+        {'message': 'Attendance marked present.', 'record': serializer.data},
+        status=status.HTTP_201_CREATED,
+    )
+
+
+@async_api_view(['GET'])
+async def student_summary(request):
+    """Async ``GET /api/attendance/student-summary/``."""
+    reg_no = request.GET.get('reg_no')
+    if not reg_no:
+        return JsonResponse({'error': 'reg_no parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+    subject_id = int_param(request, 'subject')
+
+    student = await aget_or_404(Student.objects.select_related('branch'), reg_no=reg_no)
+    counters = AttendanceCounter.objects.filter(student=student)
+    if subject_id:
+        counters = counters.filter(subject_id=subject_id)
+    totals = await counters.aaggregate(
+        present=Coalesce(Sum('present'), 0),
+        total=Coalesce(Sum('total'), 0),
+    )
+    present, total = totals['present'], totals['total']
+
+    return JsonResponse({
+        'student': StudentSerializer(student, context={'request': request}).data,
+        'attendance_summary': {
+            'total': total,
+            'present': present,
+            'absent': total - present,
+            'percentage': round(present * 100 / total, 2) if total else 0,
+        },
+    })
+
+
+@async_api_view(['GET'])
+async def student_roster(request):
+    """Async ``GET /api/students/?branch=&semester=``, ordered by name."""
+    students = Student.objects.order_by('name')
+    branch = int_param(request, 'branch')
+    semester = int_param(request, 'semester')
+    if branch is not None:
+        students = students.filter(branch_id=branch)
+    if semester is not None:
+        students = students.filter(semester=semester)
+    return JsonResponse(await apaginate(request, students, StudentRowSerializer))
+
+
+@async_api_view(['GET'])
+async def attendance_by_date(request):
+    """Async ``GET /api/attendance/?date=`` (required), optionally for one ``subject``."""
+    value = request.GET.get('date')
+    try:
+        day = parse_date(value) if value else None
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({'date': 'Enter a valid date in YYYY-MM-DD format.'})
+
+    records = AttendanceRecord.objects.filter(date=day).order_by('-timestamp')
+    subject_id = int_param(request, 'subject')
+    if subject_id is not None:
+        records = records.filter(subject_id=subject_id)
+    return JsonResponse(await apaginate(request, records, AttendanceRecordRowSerializer))
@@ -0,0 +1,174 @@
+from functools import cached_property
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .caching import LookupCache
+from .models import Teacher
+
+BLACKLIST_KEY = 'jwt:blacklisted:{}'
+
+# Claims embedded at issue time; their presence marks a token that can be
+# authenticated without loading the teacher.
+CLAIM_FIELDS = ('username', 'is_staff', 'is_superuser', 'subject_ids')
+
+
+# ---------------- Teacher state ----------------
+def _load_teacher(user_id):
+    teacher = (
+        Teacher.objects.filter(pk=user_id)
+        .values('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+        .first()
+    )
+    if teacher is not None:
+        teacher['subject_ids'] = sorted(
+            Teacher.subjects.through.objects.filter(teacher_id=user_id).values_list('subject_id', flat=True)
+        )
+    return teacher
+
+
+# user id -> claim values, dropped whenever the teacher or its subjects change
+teachers = LookupCache(_load_teacher, ttl=settings.AUTH_USER_CACHE_TTL)
+
+
+def add_teacher_claims(token, teacher):
+    """Copy the teacher's authorization state (as loaded by ``teachers``) into ``token``."""
+    for field in CLAIM_FIELDS:
+        token[field] = teacher[field]
+    return token
+
+
+def has_teacher_claims(token):
+    return all(field in token for field in CLAIM_FIELDS)
+
+
+# ---------------- Authentication ----------------
+class TokenTeacher(TokenUser):
+    """Stateless request user built from a token's claims."""
+
+    @cached_property
+    def subject_ids(self):
+        return frozenset(self.token.get('subject_ids', ()))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the signed claims instead of the database.
+
+    Tokens issued by :class:`TeacherTokenObtainPairSerializer` carry
+    ``is_staff`` and the teacher's subject ids, so permission checks need no
+    query. Tokens without those claims (issued before they existed) are
+    completed from the in-process :data:`teachers` cache, which costs one
+    lookup per teacher and TTL. Claims are refreshed from the same cache
+    whenever a new access token is minted, so role changes take effect at
+    the next refresh.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if not has_teacher_claims(validated_token):
+            teacher = teachers.get(user_id)
+            if teacher is None or not teacher['is_active']:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            add_teacher_claims(validated_token, teacher)
+        return TokenTeacher(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate`` for plain Django async views.
+
+        Claim-carrying tokens are checked on the event loop; only tokens
+        that need the teacher cache hop to a thread.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if has_teacher_claims(validated_token):
+            return TokenTeacher(validated_token), validated_token
+        return await sync_to_async(self.get_user)(validated_token), validated_token
+
+
+# ---------------- Blacklist ----------------
+def is_blacklisted(jti):
+    """
+    Cached ``token_blacklist`` lookup.
+
+    Positive answers are final; negative ones are kept for
+    ``JWT_BLACKLIST_CACHE_TTL`` so a logout handled by another process
+    (with a per-process cache backend) is honoured within that delay.
+    Blacklisting through the ORM updates the entry immediately.
+    """
+    key = BLACKLIST_KEY.format(jti)
+    blacklisted = cache.get(key)
+    if blacklisted is None:
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        timeout = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds() if blacklisted else settings.JWT_BLACKLIST_CACHE_TTL
+        cache.set(key, blacklisted, timeout)
+    return blacklisted
+
+
+def mark_blacklisted(jti):
+    cache.set(BLACKLIST_KEY.format(jti), True, api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+
+# ---------------- Token serializers ----------------
+class TeacherTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = CachedBlacklistRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        claims = {field: getattr(user, field) for field in CLAIM_FIELDS if field != 'subject_ids'}
+        claims['subject_ids'] = sorted(user.subjects.values_list('id', flat=True))
+        return add_teacher_claims(token, claims)
+
+
+class TeacherTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh using the cached blacklist and teacher state instead of per-call queries."""
+    token_class = CachedBlacklistRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        teacher = teachers.get(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if teacher is None or not teacher['is_active']:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        access = add_teacher_claims(refresh.access_token, teacher)
+        data = {'access': str(access)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            add_teacher_claims(refresh, teacher)
+            data['refresh'] = str(refresh)
+        return data
@@ -0,0 +1,244 @@
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+
+# Default scratch database of the benchmark and stress commands.
+SCRATCH_DATABASE = settings.BASE_DIR / 'bench.sqlite3'
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples_ms):
+    return {
+        'count': len(samples_ms),
+        'p50': round(percentile(samples_ms, 50), 3),
+        'p95': round(percentile(samples_ms, 95), 3),
+        'p99': round(percentile(samples_ms, 99), 3),
+        'max': round(max(samples_ms, default=0.0), 3),
+    }
+
+
+def run_concurrent(func, jobs, threads):
+    """
+    Run ``func(job)`` for every job on ``threads`` worker threads.
+
+    Returns ``(latencies_ms, errors, wall_seconds)``. Each worker uses and
+    then closes its own database connection, as separate server workers
+    would.
+    """
+    queue = deque(jobs)
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    job = queue.popleft()
+                started = time.perf_counter()
+                try:
+                    func(job)
+                except Exception as exc:  # reported, not raised, so one failure doesn't stop the run
+                    with lock:
+                        errors.append(exc)
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def use_scratch_database(path, scale='small', log=None):
+    """
+    Repoint the default connection at the SQLite file ``path``.
+
+    The file is migrated and, when it holds no students yet, filled with a
+    synthetic dataset of the given scale.
+    """
+    from .models import Student
+    from .synthetic import SCALES, generate
+
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    call_command('migrate', verbosity=0, interactive=False)
+    if not Student.objects.exists():
+        if log:
+            log(f"Generating '{scale}' dataset in {path}...")
+        generate(**SCALES[scale])
+
+
+# ---------------- Endpoint suite ----------------
+class BenchmarkContext:
+    """Identifiers from the generated dataset that the scenarios request."""
+
+    def __init__(self):
+        from .models import AttendanceChange, AttendanceRecord, Student, Subject, Teacher
+
+        self.subject = Subject.objects.order_by('id').first()
+        self.teacher = Teacher.objects.filter(is_staff=True).order_by('id').first()
+        if self.subject is None or self.teacher is None:
+            raise ValueError("The database has no subjects or staff teachers to benchmark against.")
+        self.reg_nos = list(
+            Student.objects.in_batch(self.subject.branch_id, self.subject.semester)
+            .order_by('reg_no').values_list('reg_no', flat=True)
+        )
+        latest = AttendanceRecord.objects.filter(subject=self.subject).order_by('-date').first()
+        self.date = latest.date if latest else None
+        last_change = AttendanceChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.recent_watermark = max(0, last_change - 200)
+
+
+class Scenario:
+    """One endpoint call pattern; ``build(ctx, i)`` returns ``(path, body)``."""
+
+    def __init__(self, name, method, build):
+        self.name = name
+        self.method = method
+        self.build = build
+
+
+def _bulk_body(ctx, i):
+    timestamp = f'2000-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}+05:30'
+    return [
+        {'student': reg_no, 'subject': ctx.subject.pk, 'status': 'P', 'timestamp': timestamp}
+        for reg_no in ctx.reg_nos
+    ]
+
+
+def _tap_body(ctx, i):
+    # Consecutive pairs hit the same student so state returns to where it was.
+    return {'reg_no': ctx.reg_nos[(i // 2) % len(ctx.reg_nos)], 'subject_id': ctx.subject.pk}
+
+
+SCENARIOS = [
+    Scenario('attendance.list', 'get', lambda ctx, i: (
+        f'/api/attendance/?subject={ctx.subject.pk}', None)),
+    Scenario('attendance.list_fast', 'get', lambda ctx, i: (
+        f'/api/attendance/?subject={ctx.subject.pk}&fast=true', None)),
+    Scenario('attendance.filter_date', 'get', lambda ctx, i: (
+        f'/api/attendance/?subject={ctx.subject.pk}&date={ctx.date}', None)),
+    Scenario('attendance.cursor', 'get', lambda ctx, i: (
+        f'/api/attendance/?subject={ctx.subject.pk}&pagination=cursor', None)),
+    Scenario('students.roster', 'get', lambda ctx, i: (
+        f'/api/students/?branch={ctx.subject.branch_id}&semester={ctx.subject.semester}&page={i % 3 + 1}', None)),
+    Scenario('attendance.toggle', 'post', lambda ctx, i: ('/api/attendance/toggle/', _tap_body(ctx, i))),
+    Scenario('attendance.tap', 'post', lambda ctx, i: ('/api/attendance/tap/', _tap_body(ctx, i))),
+    Scenario('attendance.bulk', 'post', lambda ctx, i: ('/api/attendance/bulk/', _bulk_body(ctx, i))),
+    Scenario('summary.student', 'get', lambda ctx, i: (
+        f'/api/attendance/student-summary/?reg_no={ctx.reg_nos[i % len(ctx.reg_nos)]}&subject={ctx.subject.pk}', None)),
+    Scenario('summary.class', 'get', lambda ctx, i: (
+        f'/api/attendance/class-summary/?subject={ctx.subject.pk}', None)),
+    Scenario('rollups.month', 'get', lambda ctx, i: (
+        f'/api/attendance/rollups/?bucket=month&branch={ctx.subject.branch_id}&semester={ctx.subject.semester}', None)),
+    Scenario('rollups.week_batch', 'get', lambda ctx, i: (
+        f'/api/attendance/rollups/?bucket=week&group=batch&branch={ctx.subject.branch_id}', None)),
+    Scenario('export.records', 'get', lambda ctx, i: (
+        f'/api/attendance/export/?subject={ctx.subject.pk}&start_date={ctx.date}', None)),
+    Scenario('export.register', 'get', lambda ctx, i: (
+        f'/api/attendance/export/?layout=register&subject={ctx.subject.pk}', None)),
+    Scenario('bootstrap', 'get', lambda ctx, i: ('/api/bootstrap/', None)),
+    Scenario('attendance.sync', 'get', lambda ctx, i: (
+        f'/api/attendance/sync/?since={ctx.recent_watermark}', None)),
+]
+
+
+class QueryCounter:
+    """``execute_wrapper`` that counts the statements run through it."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _call(client, scenario, ctx, i):
+    path, body = scenario.build(ctx, i)
+    if scenario.method == 'get':
+        response = client.get(path)
+    else:
+        response = client.post(path, body, format='json')
+    if response.status_code >= 400:
+        raise RuntimeError(f"{scenario.name}: HTTP {response.status_code} for {path}")
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def run_suite(iterations=50, names=None):
+    """
+    Run every scenario through the full Django stack with an API client.
+
+    Returns ``{name: {count, p50, p95, p99, max, queries}}`` where queries is
+    the SQL statement count of one representative call.
+    """
+    from rest_framework.test import APIClient
+
+    ctx = BenchmarkContext()
+    client = APIClient()
+    client.force_authenticate(ctx.teacher)
+
+    results = {}
+    for scenario in SCENARIOS:
+        if names and scenario.name not in names:
+            continue
+        # The first call warms caches and lazily built state; the query
+        # count is taken from the second, steady-state call. A wrapper is
+        # used because ``request_started`` resets the debug query log.
+        _call(client, scenario, ctx, 0)
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            _call(client, scenario, ctx, 1)
+        samples = []
+        for i in range(2, iterations + 2):
+            started = time.perf_counter()
+            _call(client, scenario, ctx, i)
+            samples.append((time.perf_counter() - started) * 1000)
+        results[scenario.name] = {**summarize(samples), 'queries': counter.count}
+    return results
+
+
+def compare(results, baseline, tolerance=0.5, slack_ms=1.0):
+    """
+    List regressions against a stored baseline.
+
+    A scenario regresses when its p50 exceeds the baseline by more than
+    ``tolerance`` (relative) plus ``slack_ms``, or when it issues more
+    queries than before.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        limit = previous['p50'] * (1 + tolerance) + slack_ms
+        if current['p50'] > limit:
+            regressions.append(f"{name}: p50 {current['p50']}ms > {limit:.3f}ms (baseline {previous['p50']}ms)")
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{name}: {current['queries']} queries > baseline {previous['queries']}")
+    return regressions
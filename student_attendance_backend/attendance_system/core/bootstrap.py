@@ -0,0 +1,69 @@
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import AttendanceRecord, Student, Subject, Teacher
+from .renderers import dumps
+from .serializers import StudentRowSerializer
+
+
+def batch_key(branch_id, semester):
+    return f'{branch_id}-{semester}'
+
+
+def build_bootstrap(teacher_id, request=None, today=None):
+    """
+    Everything the home screen needs after login, in four queries.
+
+    Returns the teacher, their subjects, the roster of every batch those
+    subjects are taught to (shared between subjects of the same batch)
+    and, per subject, the status of each student marked today. ``version``
+    is a hash of the rest of the payload. ``None`` when the teacher no
+    longer exists (a token can outlive its teacher).
+    """
+    today = today or timezone.localdate()
+    teacher = Teacher.objects.filter(pk=teacher_id).values(
+        'id', 'username', 'first_name', 'last_name', 'email'
+    ).first()
+    if teacher is None:
+        return None
+    subjects = list(
+        Subject.objects.filter(teachers=teacher_id)
+        .order_by('name')
+        .values('id', 'name', 'semester', 'year', 'branch', branch_name=F('branch__name'))
+    )
+
+    batches = {(subject['branch'], subject['semester']) for subject in subjects}
+    rosters = {batch_key(*batch): [] for batch in sorted(batches)}
+    if batches:
+        students = Student.objects.filter(
+            reduce(or_, (Q(branch=branch, semester=semester) for branch, semester in batches))
+        ).order_by('name')
+        serializer = StudentRowSerializer(context={'request': request})
+        for row in StudentRowSerializer.project(students).iterator():
+            rosters[batch_key(row['branch'], row['semester'])].append(serializer.to_representation(row))
+
+    marked = {subject['id']: {} for subject in subjects}
+    records = (
+        AttendanceRecord.objects.filter(subject_id__in=marked, date=today)
+        .order_by('timestamp')
+        .values_list('subject_id', 'student__reg_no', 'status')
+    )
+    for subject_id, reg_no, status in records:
+        marked[subject_id][reg_no] = status
+
+    for subject in subjects:
+        attendance = marked[subject['id']]
+        subject['roster'] = batch_key(subject['branch'], subject['semester'])
+        subject['today'] = {
+            'present': sum(status == 'P' for status in attendance.values()),
+            'marked': len(attendance),
+            'total': len(rosters[subject['roster']]),
+            'attendance': attendance,
+        }
+
+    payload = {'date': today, 'teacher': teacher, 'subjects': subjects, 'rosters': rosters}
+    return {'version': hashlib.md5(dumps(payload)).hexdigest(), **payload}
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'refdata:version:{}'
+
+# Upper bound on how stale an entry can get in a process that did not see
+# the change that invalidated it (signals only fire in the writing process).
+LOOKUP_TTL = 300
+
+
+def version_timeout():
+    """
+    Seconds a namespace version is kept: forever in a shared cache.
+
+    A process-local cache only learns of its own process's invalidations,
+    so there versions expire with the responses and every process picks up
+    changes made elsewhere within ``REFERENCE_CACHE_TIMEOUT``.
+    """
+    return settings.REFERENCE_CACHE_TIMEOUT if settings.PROCESS_LOCAL_CACHE else None
+
+
+def namespace_version(namespace):
+    """
+    Return the change stamp of a reference-data namespace.
+
+    The stamp is the time of the last invalidation in nanoseconds. It is
+    part of every cache key, so bumping it retires all cached responses of
+    the namespace at once.
+    """
+    return cache.get_or_set(VERSION_KEY.format(namespace), time.time_ns, timeout=version_timeout())
+
+
+def invalidate(*namespaces):
+    """Retire every cached response of the given namespaces."""
+    now = time.time_ns()
+    cache.set_many({VERSION_KEY.format(namespace): now for namespace in namespaces}, timeout=version_timeout())
+
+
+def etag_matches(request, etag):
+    """Whether the request's ``If-None-Match`` covers ``etag``."""
+    if_none_match = request.headers.get('If-None-Match', '')
+    if if_none_match.strip() == '*':
+        return True
+    # Weak comparison: compression turns the ETag sent into W/"...".
+    return etag in {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+
+
+class CachedReadMixin:
+    """
+    Cache ``list``/``retrieve`` responses of read-only reference viewsets.
+
+    Entries are keyed by ``cache_namespace``, its current version and the
+    full request (host, path and query string), and are served with an
+    ``ETag``/``Last-Modified`` pair so clients can revalidate with
+    ``If-None-Match``/``If-Modified-Since`` and receive a 304.
+    """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        version = namespace_version(self.cache_namespace)
+        key = 'refdata:{}:{}:{}'.format(
+            self.cache_namespace,
+            version,
+            hashlib.md5(request.build_absolute_uri().encode()).hexdigest(),
+        )
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        last_modified = version // 1_000_000_000
+
+        if self.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cached = cache.get(key)
+            if cached is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, settings.REFERENCE_CACHE_TIMEOUT)
+            else:
+                response = Response(cached)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified):
+        if request.headers.get('If-None-Match'):
+            return etag_matches(request, etag)
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return if_modified_since is not None and last_modified <= if_modified_since
+
+
+# ---------------- In-process lookups ----------------
+class LookupCache:
+    """Small thread-safe in-process map with a TTL and explicit invalidation."""
+
+    def __init__(self, loader, ttl=LOOKUP_TTL):
+        self._loader = loader
+        self._ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        value = self._loader(key)
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (now + self._ttl, value)
+        return value
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
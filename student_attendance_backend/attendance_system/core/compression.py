@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+# Content types worth compressing; images and archives already are.
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/x-ndjson', 'application/javascript')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Gzip large text responses for clients sending ``Accept-Encoding: gzip``.
+
+    Django's ``GZipMiddleware`` (``Vary``, weak ETags, streaming, BREACH
+    padding) restricted to textual content types and to bodies of at
+    least ``GZIP_MIN_LENGTH`` bytes; streamed exports are always
+    compressed since their size is unknown.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_LENGTH:
+            return response
+        return super().process_response(request, response)
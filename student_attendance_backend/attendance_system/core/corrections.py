@@ -0,0 +1,132 @@
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .ingest import STATUS_CODES, _as_int
+from .models import ArchivedYear, AttendanceRecord, Student, Subject, track_attendance_writes
+
+# Per-item outcomes of a correction batch.
+UPDATED = 'updated'
+CREATED = 'created'
+UNCHANGED = 'unchanged'
+SUPERSEDED = 'superseded'
+FAILED = 'failed'
+
+
+def _parse_item(item, students, subjects, archived=()):
+    """Return ``((student_id, subject_id, date), status, errors)`` for one item."""
+    if not isinstance(item, dict):
+        return None, None, {'non_field_errors': ['Expected a JSON object.']}
+
+    errors = {}
+    reg_no = item.get('reg_no')
+    if reg_no in (None, ''):
+        errors['reg_no'] = ['This field is required.']
+    elif not isinstance(reg_no, str) or reg_no not in students:
+        errors['reg_no'] = [f'Student with registration number {reg_no} not found.']
+
+    subject_id = _as_int(item.get('subject'))
+    if item.get('subject') in (None, ''):
+        errors['subject'] = ['This field is required.']
+    elif subject_id not in subjects:
+        errors['subject'] = [f'Invalid pk "{item.get("subject")}" - object does not exist.']
+
+    day = None
+    try:
+        day = parse_date(item.get('date') or '')
+    except (TypeError, ValueError):
+        pass
+    if day is None:
+        errors['date'] = ['Enter a valid date in YYYY-MM-DD format.']
+    elif any(start <= day <= end for start, end in archived):
+        errors['date'] = ['This date is in an archived academic year.']
+
+    status_val = item.get('status')
+    if not isinstance(status_val, str) or status_val not in STATUS_CODES:
+        errors['status'] = [f'"{status_val}" is not a valid choice.']
+
+    if errors:
+        return None, None, errors
+    return (students[reg_no], subject_id, day), status_val, None
+
+
+def apply_corrections(items):
+    """
+    Set the status of each (reg_no, subject, date) to the given one.
+
+    Every record of that student, subject and day is corrected; a day
+    without any record gets one, timestamped at the start of the day.
+    Items are resolved with one query per kind of object, all changes go
+    out as a single ``UPDATE ... CASE`` plus a single insert, and invalid
+    items are reported without blocking the valid ones. When an item is
+    repeated, the last occurrence wins. Returns one result per item.
+    """
+    reg_nos = {item.get('reg_no') for item in items if isinstance(item, dict) and isinstance(item.get('reg_no'), str)}
+    subject_ids = {_as_int(item.get('subject')) for item in items if isinstance(item, dict)}
+    subject_ids.discard(None)
+    students = dict(Student.objects.filter(reg_no__in=reg_nos).values_list('reg_no', 'id'))
+    subjects = set(Subject.objects.filter(pk__in=subject_ids).values_list('id', flat=True))
+    archived = list(ArchivedYear.objects.values_list('start_date', 'end_date'))
+
+    results = []
+    targets = {}  # key -> (index of the winning item, status)
+    for index, item in enumerate(items):
+        key, status_val, errors = _parse_item(item, students, subjects, archived)
+        result = {'index': index}
+        if isinstance(item, dict):
+            result.update({field: item.get(field) for field in ('reg_no', 'subject', 'date', 'status')})
+        if errors:
+            result.update({'result': FAILED, 'errors': errors})
+        else:
+            if key in targets:
+                results[targets[key][0]]['result'] = SUPERSEDED
+            targets[key] = (index, status_val)
+        results.append(result)
+
+    if not targets:
+        return results
+
+    with transaction.atomic():
+        existing = {}
+        for pk, student_id, subject_id, day, status_val in AttendanceRecord.objects.filter(
+            student_id__in={key[0] for key in targets},
+            subject_id__in={key[1] for key in targets},
+            date__in={key[2] for key in targets},
+        ).values_list('id', 'student_id', 'subject_id', 'date', 'status'):
+            existing.setdefault((student_id, subject_id, day), []).append((pk, status_val))
+
+        changed, created = [], []
+        for key, (index, status_val) in targets.items():
+            rows = existing.get(key)
+            if rows is None:
+                student_id, subject_id, day = key
+                created.append(AttendanceRecord(
+                    student_id=student_id,
+                    subject_id=subject_id,
+                    status=status_val,
+                    timestamp=timezone.make_aware(datetime.combine(day, time.min)),
+                    date=day,
+                ))
+                results[index].update({'result': CREATED, 'records': 1})
+                continue
+            stale = [(pk, old) for pk, old in rows if old != status_val]
+            changed.extend((pk, key, old, status_val) for pk, old in stale)
+            results[index].update({'result': UPDATED if stale else UNCHANGED, 'records': len(rows)})
+
+        if changed:
+            present = [pk for pk, _, _, new in changed if new == 'P']
+            AttendanceRecord.objects.filter(pk__in=[pk for pk, *_ in changed]).update(
+                status=Case(When(pk__in=present, then=Value('P')), default=Value('A'))
+            )
+        if created:
+            AttendanceRecord.objects.bulk_create(created)
+
+        track_attendance_writes(
+            added=[(pk, *key, new) for pk, key, _, new in changed]
+            + [record.tracked_state() for record in created],
+            removed=[(pk, *key, old) for pk, key, old, _ in changed],
+        )
+    return results
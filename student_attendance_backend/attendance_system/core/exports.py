@@ -0,0 +1,259 @@
+import csv
+import heapq
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+from .models import ArchivedYear, Student, Subject
+from .renderers import dumps
+from .reports import attendance_record_filter
+
+EXPORT_CHUNK_SIZE = 2000
+
+OUTPUT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+LAYOUTS = ('records', 'register')
+
+RECORD_COLUMNS = (
+    ('id', 'id'),
+    ('date', 'date'),
+    ('timestamp', 'timestamp'),
+    ('reg_no', 'student__reg_no'),
+    ('student_name', 'student__name'),
+    ('subject', 'subject_id'),
+    ('subject_name', 'subject__name'),
+    ('status', 'status'),
+)
+
+
+class ExportFilter:
+    """The batch, subject and date range an export is restricted to."""
+
+    def __init__(self, branch=None, semester=None, subject=None, start=None, end=None):
+        self.branch = branch
+        self.semester = semester
+        self.subject = subject
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_params(cls, params):
+        """Build the filter of :func:`clean_export_params` output."""
+        return cls(
+            branch=params['branch'],
+            semester=params['semester'],
+            subject=params['subject'],
+            start=parse_date(params['start_date']) if params['start_date'] else None,
+            end=parse_date(params['end_date']) if params['end_date'] else None,
+        )
+
+    def subject_ids(self):
+        subjects = Subject.objects.all()
+        if self.subject is not None:
+            subjects = subjects.filter(pk=self.subject)
+        if self.branch is not None:
+            subjects = subjects.filter(branch=self.branch)
+        if self.semester is not None:
+            subjects = subjects.filter(semester=self.semester)
+        return subjects.values('id')
+
+    @cached_property
+    def sources(self):
+        """
+        Matching records of the live table and of every archived year in range.
+
+        Restricted by subject id so the (subject, date) index applies.
+        """
+        return [
+            records.filter(
+                attendance_record_filter(start=self.start, end=self.end),
+                subject_id__in=self.subject_ids(),
+            )
+            for records in ArchivedYear.objects.record_sources(self.start, self.end)
+        ]
+
+
+def clean_export_params(params):
+    """
+    Validate export parameters from a query string or a job submission.
+
+    Returns them with ``branch``, ``semester`` and ``subject`` as ints and
+    the dates kept as ``YYYY-MM-DD`` strings, so the result can also be
+    stored as job params; raises ``ValidationError`` keyed by parameter.
+    """
+    errors, cleaned = {}, {}
+    cleaned['output'] = params.get('output') or 'csv'
+    if cleaned['output'] not in OUTPUT_FORMATS:
+        errors['output'] = [f"Must be one of {', '.join(OUTPUT_FORMATS)}."]
+    cleaned['layout'] = params.get('layout') or 'records'
+    if cleaned['layout'] not in LAYOUTS:
+        errors['layout'] = [f"Must be one of {', '.join(LAYOUTS)}."]
+
+    for name in ('branch', 'semester', 'subject'):
+        value = params.get(name)
+        if value in (None, ''):
+            cleaned[name] = None
+            continue
+        try:
+            cleaned[name] = int(value)
+        except (TypeError, ValueError):
+            errors[name] = ['A valid integer is required.']
+    if cleaned.get('subject') is not None and not Subject.objects.filter(pk=cleaned['subject']).exists():
+        errors['subject'] = [f'Invalid pk "{cleaned["subject"]}" - object does not exist.']
+    elif cleaned['layout'] == 'register' and 'subject' not in errors and cleaned['subject'] is None:
+        errors['subject'] = ['This field is required for the register layout.']
+
+    for name in ('start_date', 'end_date'):
+        value = params.get(name)
+        cleaned[name] = None
+        if value:
+            try:
+                cleaned[name] = parse_date(str(value)) and str(value)
+            except ValueError:
+                pass
+            if cleaned[name] is None:
+                errors[name] = ['Enter a valid date in YYYY-MM-DD format.']
+
+    if errors:
+        raise serializers.ValidationError(errors)
+    return cleaned
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+_django_encoder = DjangoJSONEncoder()
+
+
+def _ndjson_line(row):
+    return dumps(row, default=_django_encoder.default).decode() + '\n'
+
+
+# ---------------- Raw records ----------------
+def iter_record_rows(export_filter):
+    """Yield one dict per record, streamed from ``values()`` projections merged across tables."""
+    keys = [key for key, _ in RECORD_COLUMNS]
+    sort_key = itemgetter(*(keys.index(key) for key in ('date', 'subject', 'reg_no', 'timestamp')))
+    rows = heapq.merge(
+        *(
+            records.order_by('date', 'subject_id', 'student__reg_no', 'timestamp')
+            .values_list(*[lookup for _, lookup in RECORD_COLUMNS])
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            for records in export_filter.sources
+        ),
+        key=sort_key,
+    )
+    for row in rows:
+        row = dict(zip(keys, row))
+        row['timestamp'] = timezone.localtime(row['timestamp']).isoformat()
+        row['date'] = row['date'].isoformat()
+        yield row
+
+
+# ---------------- Register ----------------
+def register_dates(export_filter):
+    dates = set()
+    for records in export_filter.sources:
+        dates.update(records.order_by().values_list('date', flat=True).distinct())
+    return sorted(dates)
+
+
+def iter_register_rows(export_filter, subject):
+    """
+    Yield one row per student of the subject's batch with a cell per date.
+
+    Records are streamed ordered by reg_no and merged against the roster,
+    so students without any record still get a (blank) row. A cell holds
+    the statuses of that day in order, e.g. ``PA`` for two lectures.
+    """
+    roster = (
+        Student.objects.in_batch(subject.branch_id, subject.semester)
+        .order_by('reg_no')
+        .values_list('id', 'reg_no', 'name')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    # A day lives in one table only, so (reg_no, date) keeps each cell's
+    # lectures in time order across the merge.
+    records = heapq.merge(
+        *(
+            records.filter(subject=subject)
+            .order_by('student__reg_no', 'timestamp')
+            .values_list('student__reg_no', 'student_id', 'date', 'status')
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            for records in export_filter.sources
+        ),
+        key=itemgetter(0, 2),
+    )
+    pending = next(records, None)
+
+    for student_id, reg_no, name in roster:
+        # Skip records of students outside the batch roster.
+        while pending is not None and pending[0] < reg_no:
+            pending = next(records, None)
+
+        days = {}
+        present = total = 0
+        while pending is not None and pending[1] == student_id:
+            _, _, day, status = pending
+            day = day.isoformat()
+            days[day] = days.get(day, '') + status
+            present += status == 'P'
+            total += 1
+            pending = next(records, None)
+        yield {
+            'reg_no': reg_no,
+            'name': name,
+            'days': days,
+            'present': present,
+            'total': total,
+            'percentage': round(present * 100 / total, 2) if total else 0,
+        }
+
+
+# ---------------- Encoders ----------------
+def stream_export(export_filter, layout='records', output='csv', subject=None):
+    """Return a generator of text chunks for the requested layout and format."""
+    if layout == 'register':
+        dates = register_dates(export_filter)
+        rows = iter_register_rows(export_filter, subject)
+        if output == 'ndjson':
+            return (_ndjson_line(row) for row in rows)
+        return _register_csv(rows, dates)
+
+    rows = iter_record_rows(export_filter)
+    if output == 'ndjson':
+        return (_ndjson_line(row) for row in rows)
+    return _records_csv(rows)
+
+
+def _records_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([key for key, _ in RECORD_COLUMNS])
+    for row in rows:
+        yield writer.writerow(row.values())
+
+
+def _register_csv(rows, dates):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(
+        ['reg_no', 'name', *[day.isoformat() for day in dates], 'present', 'total', 'percentage']
+    )
+    for row in rows:
+        yield writer.writerow([
+            row['reg_no'],
+            row['name'],
+            *[row['days'].get(day.isoformat(), '') for day in dates],
+            row['present'],
+            row['total'],
+            row['percentage'],
+        ])
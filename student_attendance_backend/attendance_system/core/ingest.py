@@ -0,0 +1,208 @@
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import (
+    ArchivedYear, Student, Subject, AttendanceRecord, TRACKED_FIELDS, academic_year, academic_year_bounds,
+    track_attendance_writes,
+)
+
+# Rows are resolved and written this many at a time, so a streamed
+# backlog never needs more than one chunk of model instances in memory.
+BULK_CHUNK_SIZE = 500
+
+STATUS_CODES = {code for code, _ in AttendanceRecord.STATUS_CHOICES}
+
+
+class BulkIngestError(Exception):
+    """Raised when one or more rows of a bulk batch fail validation."""
+
+    def __init__(self, errors, total):
+        super().__init__(f"{len(errors)} of {total} rows failed validation.")
+        self.errors = errors
+        self.total = total
+
+
+def _chunked(rows, size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _resolve_chunk(chunk):
+    """Resolve every reg_no and subject id in a chunk with one query each."""
+    reg_nos = {
+        row.get('student') for row in chunk
+        if isinstance(row, dict) and isinstance(row.get('student'), str)
+    }
+    subject_ids = {
+        _as_int(row.get('subject')) for row in chunk if isinstance(row, dict)
+    }
+    subject_ids.discard(None)
+
+    students = dict(
+        Student.objects.filter(reg_no__in=reg_nos).values_list('reg_no', 'id')
+    )
+    subjects = set(
+        Subject.objects.filter(pk__in=subject_ids).values_list('id', flat=True)
+    )
+    return students, subjects
+
+
+class _ArchivedDays:
+    """
+    Membership test for days of archived academic years.
+
+    Only closed years can be archived, so days of the current year answer
+    without a query and ``ArchivedYear`` is read at most once per batch.
+    """
+
+    def __init__(self):
+        self.open_from = academic_year_bounds(academic_year(timezone.localdate()))[0]
+        self.ranges = None
+
+    def __contains__(self, day):
+        if day >= self.open_from:
+            return False
+        if self.ranges is None:
+            self.ranges = list(ArchivedYear.objects.values_list('start_date', 'end_date'))
+        return any(start <= day <= end for start, end in self.ranges)
+
+
+def _overwritten(records):
+    """
+    Previous state of the entries an upsert of ``records`` will overwrite.
+
+    Covers both rows already stored and earlier rows of the same batch,
+    so counters replace a status rather than adding to the total. Earlier
+    batch rows are returned as the record itself, since their id is only
+    known once the batch has been written.
+    """
+    existing = AttendanceRecord.objects.filter(
+        student_id__in={record.student_id for record in records},
+        subject_id__in={record.subject_id for record in records},
+        timestamp__in={record.timestamp for record in records},
+    ).values_list('timestamp', *TRACKED_FIELDS)
+    state = {(row[2], row[3], row[0]): row[1:] for row in existing}
+
+    removed = []
+    for record in records:
+        key = (record.student_id, record.subject_id, record.timestamp)
+        if key in state:
+            removed.append(state[key])
+        state[key] = record
+    return removed
+
+
+def _validate_row(row, students, subjects, timestamp_field, archived=()):
+    """Return ``(record, errors)`` for a single incoming row."""
+    if not isinstance(row, dict):
+        return None, {'non_field_errors': ['Expected a JSON object.']}
+
+    errors = {}
+
+    reg_no = row.get('student')
+    if reg_no in (None, ''):
+        errors['student'] = ['This field is required.']
+    elif not isinstance(reg_no, str) or reg_no not in students:
+        errors['student'] = [f'Object with reg_no={reg_no} does not exist.']
+
+    subject_id = _as_int(row.get('subject'))
+    if row.get('subject') in (None, ''):
+        errors['subject'] = ['This field is required.']
+    elif subject_id not in subjects:
+        errors['subject'] = [f'Invalid pk "{row.get("subject")}" - object does not exist.']
+
+    status_val = row.get('status', 'A')
+    if not isinstance(status_val, str) or status_val not in STATUS_CODES:
+        errors['status'] = [f'"{status_val}" is not a valid choice.']
+
+    timestamp = row.get('timestamp')
+    if timestamp in (None, ''):
+        timestamp = timezone.now()
+    else:
+        try:
+            timestamp = timestamp_field.to_internal_value(timestamp)
+        except serializers.ValidationError as exc:
+            errors['timestamp'] = exc.detail
+        else:
+            if timezone.localdate(timestamp) in archived:
+                errors['timestamp'] = ['This date is in an archived academic year.']
+
+    if errors:
+        return None, errors
+
+    return AttendanceRecord(
+        student_id=students[reg_no],
+        subject_id=subject_id,
+        status=status_val,
+        timestamp=timestamp,
+        date=timezone.localdate(timestamp),
+    ), None
+
+
+def ingest_attendance(rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Validate and write an iterable of attendance rows in one transaction.
+
+    Each row uses the same shape as ``AttendanceRecordSerializer`` input
+    (``student`` reg_no, ``subject`` id, ``status``, optional ``timestamp``).
+    Rows that collide with an existing (student, subject, timestamp) entry
+    update its status. Nothing is written unless every row is valid, in
+    which case ``BulkIngestError`` carries the per-row errors.
+    """
+    timestamp_field = serializers.DateTimeField()
+    archived = _ArchivedDays()
+    errors = []
+    saved = 0
+    total = 0
+
+    with transaction.atomic():
+        for chunk in _chunked(rows, chunk_size):
+            students, subjects = _resolve_chunk(chunk)
+            records = []
+            for offset, row in enumerate(chunk):
+                record, row_errors = _validate_row(row, students, subjects, timestamp_field, archived)
+                if row_errors:
+                    errors.append({'row': total + offset, 'errors': row_errors})
+                else:
+                    records.append(record)
+            total += len(chunk)
+
+            # Keep validating the rest of the batch so every bad row is
+            # reported, but stop writing once the batch is known to fail.
+            if errors:
+                continue
+
+            removed = _overwritten(records)
+            AttendanceRecord.objects.bulk_create(
+                records,
+                update_conflicts=True,
+                unique_fields=['student', 'subject', 'timestamp'],
+                update_fields=['status'],
+            )
+            track_attendance_writes(
+                added=[record.tracked_state() for record in records],
+                removed=[
+                    row.tracked_state() if isinstance(row, AttendanceRecord) else row
+                    for row in removed
+                ],
+            )
+            saved += len(records)
+
+        if errors:
+            raise BulkIngestError(errors, total)
+
+    return saved
@@ -0,0 +1,260 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger('core.performance')
+
+# Upper bounds (seconds) of the per-route latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# ---------------- Per-request stats ----------------
+class RequestStats:
+    """SQL, serialization and size figures gathered while serving one request."""
+
+    def __init__(self, detect=False):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.response_bytes = 0
+        self.detect = detect
+        self.patterns = Counter()
+        self.slow_queries = []
+        self._render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """``execute_wrapper`` hook timing every statement on the connection."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            if self.detect:
+                self.patterns[normalize_sql(sql)] += 1
+                if elapsed * 1000 >= settings.PERF_SLOW_QUERY_MS:
+                    self.slow_queries.append((elapsed, sql))
+
+    def render_started(self):
+        self._render_started = time.perf_counter()
+
+    def render_finished(self, response):
+        if self._render_started is not None:
+            self.serialize_seconds += time.perf_counter() - self._render_started
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize_seconds * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+
+def normalize_sql(sql):
+    """Collapse literals and ``IN`` lists so repeated statements share one pattern."""
+    sql = re.sub(r'\(\s*%s(?:\s*,\s*%s)*\s*\)', '(...)', sql)
+    sql = re.sub(r"'[^']*'|\b\d+\b", '?', sql)
+    return ' '.join(sql.split())
+
+
+def route_name(request):
+    """``ViewSet.action`` for viewsets, the view's dotted path otherwise."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    view_class = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None)
+    if view_class is not None and actions:
+        return f'{view_class.__name__}.{actions.get(request.method.lower(), request.method.lower())}'
+    if view_class is not None:
+        return view_class.__name__
+    return match.view_name or match._func_path
+
+
+# ---------------- Registry ----------------
+class MetricsRegistry:
+    """
+    In-process request metrics, rendered in the Prometheus text format.
+
+    Figures are per process: with several server workers each one exposes
+    its own, and Prometheus sums them up per instance.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = Counter()       # (route, method, status) -> count
+            self.latency = {}               # route -> [bucket counts..., sum, count]
+            self.queries = Counter()        # route -> SQL statements
+            self.db_seconds = Counter()     # route -> seconds in SQL
+            self.serialize_seconds = Counter()
+            self.response_bytes = Counter()
+
+    def observe(self, route, method, status, stats, total):
+        with self._lock:
+            self.requests[route, method, status] += 1
+            histogram = self.latency.setdefault(route, [0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if total <= bound:
+                    histogram[index] += 1
+            histogram[-2] += total
+            histogram[-1] += 1
+            self.queries[route] += stats.queries
+            self.db_seconds[route] += stats.db_seconds
+            self.serialize_seconds[route] += stats.serialize_seconds
+            self.response_bytes[route] += stats.response_bytes
+
+    def render(self):
+        with self._lock:
+            lines = []
+            _family(lines, 'edutag_requests_total', 'counter', 'Requests served.', [
+                ({'route': route, 'method': method, 'status': status}, count)
+                for (route, method, status), count in sorted(self.requests.items())
+            ])
+
+            lines.append('# HELP edutag_request_duration_seconds Request latency per route.')
+            lines.append('# TYPE edutag_request_duration_seconds histogram')
+            for route, histogram in sorted(self.latency.items()):
+                # Observations are recorded in the first matching bucket and
+                # every wider one, so the counts are already cumulative.
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(_sample('edutag_request_duration_seconds_bucket', {'route': route, 'le': repr(bound)}, count))
+                lines.append(_sample('edutag_request_duration_seconds_bucket', {'route': route, 'le': '+Inf'}, histogram[-1]))
+                lines.append(_sample('edutag_request_duration_seconds_sum', {'route': route}, histogram[-2]))
+                lines.append(_sample('edutag_request_duration_seconds_count', {'route': route}, histogram[-1]))
+
+            for name, kind, help_text, values in (
+                ('edutag_db_queries_total', 'counter', 'SQL statements executed.', self.queries),
+                ('edutag_db_duration_seconds_total', 'counter', 'Time spent in SQL.', self.db_seconds),
+                ('edutag_serialize_duration_seconds_total', 'counter', 'Time spent rendering response bodies.', self.serialize_seconds),
+                ('edutag_response_bytes_total', 'counter', 'Response body bytes sent (streamed bodies excluded).', self.response_bytes),
+            ):
+                _family(lines, name, kind, help_text, [({'route': route}, value) for route, value in sorted(values.items())])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample(name, labels, value):
+    rendered = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+    return f'{name}{{{rendered}}} {value}'
+
+
+def _family(lines, name, kind, help_text, samples):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    lines.extend(_sample(name, labels, value) for labels, value in samples)
+
+
+registry = MetricsRegistry()
+
+
+# ---------------- Middleware ----------------
+class InstrumentationMiddleware:
+    """
+    Time every request and count its SQL.
+
+    Adds a ``Server-Timing`` header (``db``, ``serialize`` and ``total``),
+    records the figures in :data:`registry` under the view/action name and,
+    when ``PERF_DETECTOR`` is on, logs slow statements and statements
+    repeated ``PERF_N_PLUS_ONE_THRESHOLD`` times or more (N+1 patterns) to
+    the ``core.performance`` logger.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats(detect=settings.PERF_DETECTOR)
+        request.perf_stats = stats
+        with ExitStack() as stack:
+            self.install(stack, stats)
+            response = self.get_response(request)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats(detect=settings.PERF_DETECTOR)
+        request.perf_stats = stats
+        # The async ORM runs its queries on the request's sync thread, whose
+        # connection is not this one, so the wrappers are installed there.
+        stack = ExitStack()
+        await sync_to_async(self.install)(stack, stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, stats)
+
+    @staticmethod
+    def install(stack, stats):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+
+    @staticmethod
+    def finish(request, response, stats):
+        total = stats.elapsed
+        if not response.streaming:
+            stats.response_bytes = len(response.content)
+        response['Server-Timing'] = stats.server_timing(total)
+
+        route = route_name(request)
+        registry.observe(route, request.method, response.status_code, stats, total)
+        if stats.detect:
+            report_problems(route, stats)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to bytes) after the view
+        # returns; time that step from here to the post-render callback.
+        stats = getattr(request, 'perf_stats', None)
+        if stats is not None:
+            stats.render_started()
+            response.add_post_render_callback(stats.render_finished)
+        return response
+
+
+def report_problems(route, stats):
+    for elapsed, sql in stats.slow_queries:
+        logger.warning("Slow query in %s (%.1f ms): %s", route, elapsed * 1000, sql)
+    for pattern, count in stats.patterns.most_common():
+        if count < settings.PERF_N_PLUS_ONE_THRESHOLD:
+            break
+        logger.warning("Possible N+1 in %s: %d x %s", route, count, pattern)
+
+
+# ---------------- Endpoint ----------------
+def metrics_view(request):
+    """Prometheus scrape endpoint; guarded by ``METRICS_TOKEN`` when it is set."""
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
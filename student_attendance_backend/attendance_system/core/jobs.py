@@ -0,0 +1,225 @@
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, close_old_connections, connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+
+from .exports import ExportFilter, clean_export_params, stream_export
+from .models import AttendanceCounter, AttendanceRollup, ClassSession, Job, Student, Subject
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two progress writes of one job; keeps a busy export from
+# competing with taps for SQLite's write lock.
+PROGRESS_INTERVAL = 1.0
+
+
+class Progress:
+    """
+    Reporter of a running job's percentage, doubling as its heartbeat.
+
+    A thread writes both while the job runs: the percentage at most every
+    ``PROGRESS_INTERVAL`` seconds, and the heartbeat alone at least three
+    times per ``JOB_STALE_AFTER``, so a job that reports no progress (a
+    rebuild) is not requeued while it is still running. The thread has a
+    connection of its own: the job's connection holds a read snapshot while
+    an export streams, and SQLite refuses to turn a snapshot that another
+    writer has since overtaken into a write.
+    """
+
+    def __init__(self, job, total=None):
+        self.job = job
+        self.total = total
+        self.done = 0
+        self.progress = job.progress
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f'job-{job.pk}-progress', daemon=True)
+
+    def advance(self, steps=1):
+        self.done += steps
+        if self.total:
+            self.progress = min(99, self.done * 100 // self.total)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        beat_every = settings.JOB_STALE_AFTER / 3
+        connection = connections.create_connection(self.job._state.db or DEFAULT_DB_ALIAS)
+        written, written_at = None, time.monotonic()
+        try:
+            while not self.stopped.wait(min(PROGRESS_INTERVAL, beat_every)):
+                progress = self.progress
+                if progress == written and time.monotonic() - written_at < beat_every:
+                    continue
+                try:
+                    self.write(connection, progress)
+                except DatabaseError:
+                    # A rebuild holds the write lock; beat again next round.
+                    logger.warning("Could not report progress of job %s", self.job.pk, exc_info=True)
+                    continue
+                written, written_at = progress, time.monotonic()
+        finally:
+            connection.close()
+
+    def write(self, connection, progress):
+        ops = connection.ops
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {ops.quote_name(Job._meta.db_table)} SET progress = %s, heartbeat_at = %s WHERE id = %s",
+                [progress, ops.adapt_datetimefield_value(timezone.now()), self.job.pk],
+            )
+
+
+# ---------------- Kinds ----------------
+class JobKind:
+    """
+    How to validate and run one kind of job.
+
+    ``run(job, params, progress)`` returns ``(filename, path)`` of a result
+    file or ``None`` and a summary message. ``exclusive`` kinds write in
+    bulk, so at most one of them runs at a time.
+    """
+
+    def __init__(self, run, validate=None, exclusive=False):
+        self.run = run
+        self.validate = validate or (lambda params: {})
+        self.exclusive = exclusive
+
+
+def _run_export(job, params, progress):
+    subject = Subject.objects.get(pk=params['subject']) if params['subject'] else None
+    export_filter = ExportFilter.from_params(params)
+    if params['layout'] == 'register':
+        progress.total = Student.objects.in_batch(subject.branch_id, subject.semester).count()
+    else:
+        progress.total = sum(records.count() for records in export_filter.sources)
+
+    chunks = stream_export(export_filter, layout=params['layout'], output=params['output'], subject=subject)
+    handle = tempfile.NamedTemporaryFile(
+        'w', suffix=f".{params['output']}", newline='', encoding='utf-8', delete=False
+    )
+    try:
+        with handle:
+            # CSV starts with a header line; every other chunk is one row.
+            for index, chunk in enumerate(chunks):
+                handle.write(chunk)
+                if index or params['output'] != 'csv':
+                    progress.advance()
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+    finally:
+        # Ends the read of an export that failed halfway.
+        chunks.close()
+    rows = progress.done
+    return (f"attendance-{params['layout']}.{params['output']}", handle.name), f"{rows} rows exported."
+
+
+def _validate_until(params):
+    until = params.get('until')
+    if not until:
+        return {'until': None}
+    try:
+        day = parse_date(str(until))
+    except ValueError:
+        day = None
+    if day is None:
+        raise serializers.ValidationError({'until': ['Enter a valid date in YYYY-MM-DD format.']})
+    if day >= timezone.localdate():
+        raise serializers.ValidationError({'until': ["Must be before today; today's attendance can still change."]})
+    return {'until': str(until)}
+
+
+def _run_rebuild(manager, noun):
+    def run(job, params, progress):
+        manager.rebuild()
+        return None, f"Rebuilt {manager.count()} {noun}."
+    return run
+
+
+def _run_pack_sessions(job, params, progress):
+    written = ClassSession.objects.rebuild(until=parse_date(params['until']) if params['until'] else None)
+    return None, f"Packed {written} class sessions."
+
+
+JOB_KINDS = {
+    'export': JobKind(_run_export, clean_export_params),
+    'rebuild_counters': JobKind(_run_rebuild(AttendanceCounter.objects, 'attendance counters'), exclusive=True),
+    'rebuild_rollups': JobKind(_run_rebuild(AttendanceRollup.objects, 'attendance rollups'), exclusive=True),
+    'pack_sessions': JobKind(_run_pack_sessions, _validate_until, exclusive=True),
+}
+EXCLUSIVE_KINDS = tuple(name for name, kind in JOB_KINDS.items() if kind.exclusive)
+
+
+# ---------------- Running ----------------
+def run_job(job):
+    """Run a claimed job to completion, storing its result file or error."""
+    kind = JOB_KINDS.get(job.kind)
+    progress = Progress(job)
+    progress.start()
+    try:
+        if kind is None:
+            raise ValueError(f"Unknown job kind {job.kind!r}.")
+        result, message = kind.run(job, job.params, progress)
+        if result is not None:
+            name, path = result
+            try:
+                with open(path, 'rb') as handle:
+                    job.result.save(f"{job.pk}/{name}", File(handle), save=False)
+            finally:
+                os.unlink(path)
+        job.status, job.progress, job.message = Job.SUCCEEDED, 100, message
+    except Exception as exc:
+        logger.exception("Job %s failed", job.pk)
+        job.status, job.message = Job.FAILED, f"{type(exc).__name__}: {exc}"
+    finally:
+        progress.stop()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'message', 'result', 'finished_at'])
+    return job
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def work(stop=None, once=False, poll=1.0):
+    """
+    Claim and run jobs until ``stop`` is set (or, with ``once``, the queue is empty).
+
+    At most ``JOB_CONCURRENCY`` jobs run at a time across every worker
+    process, whatever the number of threads.
+    """
+    stop = stop or threading.Event()
+    name = worker_name()
+    requeued_at = float('-inf')
+    while not stop.is_set():
+        close_old_connections()
+        if time.monotonic() - requeued_at >= settings.JOB_STALE_AFTER / 2:
+            requeued_at = time.monotonic()
+            Job.objects.requeue_stale(timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER))
+            Job.objects.purge(timezone.now() - timedelta(seconds=settings.JOB_RESULT_RETENTION))
+        # Polling reads first, so idle workers never take the write lock.
+        queued = Job.objects.filter(status=Job.QUEUED).exists()
+        job = queued and Job.objects.claim(name, settings.JOB_CONCURRENCY, EXCLUSIVE_KINDS)
+        if job:
+            run_job(job)
+        elif once and not queued:
+            break
+        else:
+            stop.wait(poll)
+    close_old_connections()
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from core.models import ArchivedYear, AttendanceRecord, academic_year
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the attendance records of closed academic years out of the live table into one "
+        "archive table per year. Summaries and exports keep reading them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'years', nargs='*', type=int,
+            help="Academic years to archive, named after the calendar year they start in. "
+                 "Defaults to every closed year still in the live table.",
+        )
+        parser.add_argument('--restore', type=int, metavar='YEAR', help="Move an archived year back.")
+        parser.add_argument('--list', action='store_true', help="Only list the archived years.")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for archived in ArchivedYear.objects.all():
+                self.stdout.write(
+                    f"{archived} {archived.start_date} to {archived.end_date} in {archived.table}"
+                )
+            return
+
+        if options['restore'] is not None:
+            try:
+                restored = ArchivedYear.objects.restore(options['restore'])
+            except ValueError as exc:
+                raise CommandError(exc)
+            self.stdout.write(self.style.SUCCESS(
+                f"Restored {restored} records of {options['restore']} to the live table."
+            ))
+            return
+
+        years = options['years']
+        if not years:
+            oldest = AttendanceRecord.objects.aggregate(oldest=Min('date'))['oldest']
+            current = academic_year(timezone.localdate())
+            archived = set(ArchivedYear.objects.values_list('year', flat=True))
+            years = [
+                year for year in range(academic_year(oldest), current) if year not in archived
+            ] if oldest else []
+        for year in years:
+            try:
+                moved = ArchivedYear.objects.archive(year)
+            except ValueError as exc:
+                raise CommandError(exc)
+            self.stdout.write(self.style.SUCCESS(f"Archived {moved} records of {year}."))
+        if not years:
+            self.stdout.write("No closed academic year left in the live table.")
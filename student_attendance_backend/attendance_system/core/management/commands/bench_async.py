@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+
+from asgiref.testing import ApplicationCommunicator
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from core.authentication import TeacherTokenObtainPairSerializer
+from core.benchmarks import SCRATCH_DATABASE, BenchmarkContext, summarize, use_scratch_database
+from core.synthetic import SCALES
+
+
+def _requests(ctx, count):
+    """``(method, path, body)`` for each endpoint, cycling over the roster."""
+    reg_nos = ctx.reg_nos
+    subject = ctx.subject
+    return {
+        'toggle': [
+            ('post', '/api/attendance/toggle/', {'reg_no': reg_nos[i // 2 % len(reg_nos)], 'subject_id': subject.pk})
+            for i in range(count)
+        ],
+        'student-summary': [
+            ('get', f'/api/attendance/student-summary/?reg_no={reg_nos[i % len(reg_nos)]}&subject={subject.pk}', None)
+            for i in range(count)
+        ],
+        'roster': [
+            ('get', f'/api/students/?branch={subject.branch_id}&semester={subject.semester}', None)
+        ] * count,
+        'attendance-by-date': [
+            ('get', f'/api/attendance/?date={ctx.date}&subject={subject.pk}', None)
+        ] * count,
+    }
+
+
+async def _asgi_call(application, method, path, body, headers):
+    """Drive one request through the ASGI application as a server would."""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method.upper(),
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'content-type', b'application/json')] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    communicator = ApplicationCommunicator(application, scope)
+    await communicator.send_input({
+        'type': 'http.request',
+        'body': json.dumps(body).encode() if body else b'',
+    })
+    start = await communicator.receive_output(timeout=30)
+    while (await communicator.receive_output(timeout=30)).get('more_body'):
+        pass
+    await communicator.wait()
+    return start['status']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/second of one worker: the DRF views served one request at a time "
+        "(a WSGI sync worker) against the async views with many requests in flight on one "
+        "event loop (an ASGI worker). Runs in process against a scratch SQLite database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=str(SCRATCH_DATABASE))
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and mode (even).")
+        parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight on the ASGI worker.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The async benchmark runs against local SQLite only.")
+        use_scratch_database(options['database'], options['scale'], log=self.stdout.write)
+        ctx = BenchmarkContext()
+        token = TeacherTokenObtainPairSerializer.get_token(ctx.teacher).access_token
+        headers = {'Authorization': f'Bearer {token}'}
+        count = options['requests'] + options['requests'] % 2  # toggles come in pairs
+
+        self.stdout.write(f"{'endpoint':<22}{'wsgi req/s':>12}{'asgi req/s':>12}{'ratio':>8}{'asgi p99':>10}")
+        for name, calls in _requests(ctx, count).items():
+            wsgi_rate = self.run_wsgi(calls, headers)
+            connection.close()
+            asgi_rate, latencies = asyncio.run(self.run_asgi(calls, headers, options['concurrency']))
+            self.stdout.write(
+                f"{name:<22}{wsgi_rate:>12.0f}{asgi_rate:>12.0f}{asgi_rate / wsgi_rate:>8.2f}"
+                f"{summarize(latencies)['p99']:>10.1f}"
+            )
+
+    @staticmethod
+    def run_wsgi(calls, headers):
+        client = Client(headers=headers)
+        started = time.perf_counter()
+        for method, path, body in calls:
+            response = getattr(client, method)(path, body, content_type='application/json') if body else client.get(path)
+            if response.status_code >= 400:
+                raise CommandError(f"WSGI {path}: HTTP {response.status_code}")
+        return len(calls) / (time.perf_counter() - started)
+
+    @staticmethod
+    async def run_asgi(calls, headers, concurrency):
+        application = get_asgi_application()
+        limit = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def call(method, path, body):
+            path = path.replace('/api/', '/api/async/', 1)
+            async with limit:
+                started = time.perf_counter()
+                status_code = await _asgi_call(application, method, path, body, headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if status_code >= 400:
+                raise CommandError(f"ASGI {path}: HTTP {status_code}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call(*request) for request in calls))
+        return len(calls) / (time.perf_counter() - started), latencies
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmarks import run_concurrent, summarize
+from core.models import Student, Subject, Teacher
+from core.taps import TAP_LATENCY_TARGET_MS
+from core.views import AttendanceViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure tap latency (p50/p99) under concurrent taps through the full view stack. "
+        "Writes to the configured database: every student is tapped an even number of "
+        "times so attendance ends where it started, but the sync change log grows. "
+        "Point DJANGO_DB_NAME at a scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', type=int, help="Subject to tap for (default: first).")
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--rounds', type=int, default=10, help="Tap pairs per student.")
+        parser.add_argument(
+            '--action', choices=['tap', 'toggle'], default='tap',
+            help="Endpoint to measure; 'toggle' gives the baseline.",
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Exit non-zero when the latency target is missed.",
+        )
+
+    def handle(self, *args, **options):
+        subject = Subject.objects.filter(pk=options['subject']) if options['subject'] else Subject.objects.order_by('id')
+        subject = subject.first()
+        if subject is None:
+            raise CommandError("No subject to tap for; generate data first.")
+        reg_nos = list(
+            Student.objects.in_batch(subject.branch_id, subject.semester).values_list('reg_no', flat=True)
+        )
+        teacher = Teacher.objects.filter(is_staff=True).first()
+        if not reg_nos or teacher is None:
+            raise CommandError("Need students in the subject's batch and a staff teacher.")
+
+        handler = {'tap': 'tap', 'toggle': 'toggle_attendance'}[options['action']]
+        view = AttendanceViewSet.as_view({'post': handler})
+        factory = APIRequestFactory()
+        url = f"/api/attendance/{options['action']}/"
+
+        def tap(reg_no):
+            request = factory.post(url, {'reg_no': reg_no, 'subject_id': subject.pk}, format='json')
+            force_authenticate(request, user=teacher)
+            response = view(request)
+            if response.status_code not in (200, 201):
+                raise RuntimeError(f"{reg_no}: HTTP {response.status_code} {response.data}")
+
+        # Interleave students so concurrent threads contend like a queue at the door.
+        jobs = [reg_no for _ in range(options['rounds'] * 2) for reg_no in reg_nos]
+        latencies, errors, wall = run_concurrent(tap, jobs, options['threads'])
+
+        stats = summarize(latencies)
+        self.stdout.write(
+            f"{options['action']}: {stats['count']} taps on {options['threads']} threads in {wall:.2f}s "
+            f"({stats['count'] / wall:.0f}/s) p50={stats['p50']}ms p95={stats['p95']}ms "
+            f"p99={stats['p99']}ms max={stats['max']}ms errors={len(errors)}"
+        )
+        for error in errors[:5]:
+            self.stderr.write(f"  {error}")
+
+        missed = [
+            f"{name} {stats[name]}ms > {target}ms"
+            for name, target in TAP_LATENCY_TARGET_MS.items()
+            if stats[name] > target
+        ]
+        if missed or errors:
+            message = "Latency target missed: " + ", ".join(missed) if missed else f"{len(errors)} taps failed"
+            if options['check']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("Within the tap latency target."))
@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import ExportFilter, LAYOUTS, OUTPUT_FORMATS, stream_export
+from core.models import Subject
+
+
+class Command(BaseCommand):
+    help = "Stream attendance records or a subject register as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int)
+        parser.add_argument('--semester', type=int)
+        parser.add_argument('--subject', type=int)
+        parser.add_argument(
+            '--start-date', type=date.fromisoformat, help="First day to include (YYYY-MM-DD)."
+        )
+        parser.add_argument(
+            '--end-date', type=date.fromisoformat, help="Last day to include (YYYY-MM-DD)."
+        )
+        parser.add_argument('--output', choices=list(OUTPUT_FORMATS), default='csv')
+        parser.add_argument('--layout', choices=LAYOUTS, default='records')
+        parser.add_argument('--file', help="Write to this path instead of stdout.")
+
+    def handle(self, *args, **options):
+        subject = None
+        if options['subject']:
+            subject = Subject.objects.filter(pk=options['subject']).first()
+            if subject is None:
+                raise CommandError(f"Subject {options['subject']} does not exist.")
+        elif options['layout'] == 'register':
+            raise CommandError("--subject is required for the register layout.")
+
+        export_filter = ExportFilter(
+            branch=options['branch'],
+            semester=options['semester'],
+            subject=options['subject'],
+            start=options['start_date'],
+            end=options['end_date'],
+        )
+        chunks = stream_export(
+            export_filter, layout=options['layout'], output=options['output'], subject=subject
+        )
+
+        if options['file']:
+            with open(options['file'], 'w', newline='', encoding='utf-8') as handle:
+                handle.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Student
+from core.synthetic import SCALES, TEACHER_PASSWORD, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic dataset (branches, subjects, students, teachers "
+        "and daily attendance) for benchmarking. Run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--seed', type=int, default=42)
+        for name in ('branches', 'semesters', 'students', 'subjects', 'days', 'teachers'):
+            parser.add_argument(f'--{name}', type=int, help=f"Override the scale's {name} count.")
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Generate even if the database already contains students.",
+        )
+
+    def handle(self, *args, **options):
+        if Student.objects.exists() and not options['force']:
+            raise CommandError(
+                "The database already has students; point DJANGO_DB_NAME at a scratch "
+                "database or pass --force."
+            )
+
+        sizes = dict(SCALES[options['scale']])
+        for name in sizes:
+            if options.get(name) is not None:
+                sizes[name] = options[name]
+
+        log = self.stdout.write if options['verbosity'] >= 1 else None
+        written = generate(seed=options['seed'], log=log, **sizes)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {written} attendance records. Teachers log in as teacher001... "
+            f"with password '{TEACHER_PASSWORD}'."
+        ))
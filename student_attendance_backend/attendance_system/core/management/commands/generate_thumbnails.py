@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core import thumbnails
+from core.models import Student
+
+
+def _derive(name):
+    """``(name, hash or None, error)`` for one stored profile picture."""
+    try:
+        with default_storage.open(name, 'rb') as source:
+            return name, thumbnails.generate(source.read()), None
+    except OSError as exc:
+        return name, None, exc
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the profile picture thumbnails of existing students, several images at a "
+        "time. Images whose thumbnails already exist are only hashed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+        parser.add_argument(
+            '--missing', action='store_true',
+            help="Only process students without a thumbnail hash.",
+        )
+
+    def handle(self, *args, **options):
+        students = Student.objects.exclude(profile_pic='').exclude(profile_pic__isnull=True)
+        if options['missing']:
+            students = students.filter(profile_pic_hash='')
+        current = dict(students.values_list('profile_pic', 'profile_pic_hash'))
+
+        # Pillow releases the GIL while decoding, resizing and encoding,
+        # so threads spread the work over the cores. Only this thread
+        # touches the database.
+        hashes, failed = {}, 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for name, digest, error in pool.map(_derive, current):
+                if digest is None:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error or 'not a readable image'}")
+                if (digest or '') != current[name]:
+                    hashes[name] = digest or ''
+
+        for name, digest in hashes.items():
+            Student.objects.filter(profile_pic=name).update(profile_pic_hash=digest)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {len(current)} profile pictures: {len(hashes)} updated, {failed} failed."
+        ))
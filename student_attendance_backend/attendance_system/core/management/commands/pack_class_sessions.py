@@ -0,0 +1,111 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from core import reports
+from core.models import AttendanceRecord, ClassSession, Subject
+
+
+def table_sizes(models):
+    """Bytes used by each model's table and its indexes, from SQLite's ``dbstat``."""
+    tables = {model._meta.db_table: model for model in models}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s "
+            "JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name"
+        )
+        return {tables[name]: size for name, size in cursor.fetchall() if name in tables}
+
+
+def time_summaries(subjects, repeat=3):
+    """Best-of-``repeat`` seconds to build the class summary of every batch, then of every subject."""
+    batches = sorted({(subject.branch_id, subject.semester) for subject in subjects})
+    calls = {
+        'batches': [(batch, None) for batch in batches],
+        'subjects': [((subject.branch_id, subject.semester), subject) for subject in subjects],
+    }
+    timings = {}
+    for name, summaries in calls.items():
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for batch, subject in summaries:
+                reports.class_summary(*batch, subject=subject)
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best
+    return timings
+
+
+class Command(BaseCommand):
+    help = (
+        "Pack the attendance records of past days into one ClassSession row per lecture. "
+        "The records are kept; summaries read the sessions for packed days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--until', type=date.fromisoformat,
+            help="Last day to pack (YYYY-MM-DD); defaults to yesterday.",
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only compare the sessions with the records and report drift.",
+        )
+        parser.add_argument(
+            '--report',
+            action='store_true',
+            help="Print the storage used by records and sessions together and time the class summaries "
+                 "with and without the sessions (SQLite only).",
+        )
+
+    def handle(self, *args, **options):
+        if options['until'] and options['until'] >= timezone.localdate():
+            raise CommandError("--until must be before today; today's attendance can still change.")
+        if not options['verify']:
+            written = ClassSession.objects.rebuild(until=options['until'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Packed {written} class sessions up to {ClassSession.objects.last_packed_day()}."
+            ))
+
+        mismatches = ClassSession.objects.mismatches()
+        for subject_id, day, expected, actual in mismatches[:20]:
+            self.stdout.write(
+                f"subject={subject_id} date={day} "
+                f"expected {len(expected)} marks, found {len(actual)}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} packed days are out of date.")
+        self.stdout.write(self.style.SUCCESS("Class sessions match the records."))
+
+        if options['report']:
+            self.report()
+
+    def report(self):
+        try:
+            sizes = table_sizes([AttendanceRecord, ClassSession])
+        except DatabaseError:
+            raise CommandError("The report needs SQLite built with the dbstat table.")
+        records, sessions = sizes.get(AttendanceRecord, 0), sizes.get(ClassSession, 0)
+        # Sessions are a second copy of the packed days, not a replacement.
+        self.stdout.write(
+            f"attendance records: {AttendanceRecord.objects.count()} rows, {records / 2**20:.1f} MiB "
+            f"with indexes; class sessions: {ClassSession.objects.count()} rows, "
+            f"{sessions / 2**20:.1f} MiB; total {(records + sessions) / 2**20:.1f} MiB "
+            f"(+{sessions * 100 / max(records, 1):.1f}% for the sessions)"
+        )
+
+        subjects = list(Subject.objects.order_by('pk'))
+        packed = time_summaries(subjects)
+        with transaction.atomic():
+            ClassSession.objects.all().delete()
+            unpacked = time_summaries(subjects)
+            transaction.set_rollback(True)
+        for name in packed:
+            self.stdout.write(
+                f"class summaries of all {name}: {unpacked[name] * 1000:.1f} ms from records, "
+                f"{packed[name] * 1000:.1f} ms with sessions ({unpacked[name] / packed[name]:.1f}x faster)"
+            )
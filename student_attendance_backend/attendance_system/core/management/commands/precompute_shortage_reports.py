@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import reports
+from core.models import Subject
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the attendance shortage report of every batch into the cache, so "
+        "/api/attendance/shortage/ answers without querying. Run it nightly; the web "
+        "processes only see the result with a shared cache backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=float, action='append',
+            help="Threshold percentage to precompute; repeat for several. "
+                 "Defaults to ATTENDANCE_SHORTAGE_THRESHOLD.",
+        )
+
+    def handle(self, *args, **options):
+        if settings.PROCESS_LOCAL_CACHE:
+            self.stderr.write(self.style.WARNING(
+                "The cache is private to this process; the web server will not see these reports. "
+                "Set DJANGO_CACHE_BACKEND to a shared backend."
+            ))
+        thresholds = options['threshold'] or [None]
+        batches = Subject.objects.order_by('branch', 'semester').values_list('branch', 'semester').distinct()
+        built = defaulters = 0
+        for branch, semester in batches:
+            for threshold in thresholds:
+                report = reports.cached_shortage_report(branch, semester, threshold, refresh=True)
+                built += 1
+                defaulters += report['defaulters']
+        self.stdout.write(self.style.SUCCESS(
+            f"Precomputed {built} shortage reports ({defaulters} defaulters)."
+        ))
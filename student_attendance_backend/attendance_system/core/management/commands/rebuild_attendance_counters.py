@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AttendanceCounter
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-student/per-subject attendance counters from the raw records."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only compare the counters with the records and report drift.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            AttendanceCounter.objects.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt {AttendanceCounter.objects.count()} attendance counters."
+            ))
+
+        mismatches = AttendanceCounter.objects.mismatches()
+        for student_id, subject_id, expected, actual in mismatches:
+            self.stdout.write(
+                f"student={student_id} subject={subject_id} "
+                f"expected present/total={expected[0]}/{expected[1]} "
+                f"found={actual[0]}/{actual[1]}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} attendance counters are out of date.")
+        self.stdout.write(self.style.SUCCESS("Attendance counters match the records."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AttendanceRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-subject daily attendance rollups from the raw records."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only compare the rollups with the records and report drift.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            AttendanceRollup.objects.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt {AttendanceRollup.objects.count()} attendance rollups."
+            ))
+
+        mismatches = AttendanceRollup.objects.mismatches()
+        for subject_id, day, expected, actual in mismatches:
+            self.stdout.write(
+                f"subject={subject_id} date={day} "
+                f"expected present/total={expected[0]}/{expected[1]} "
+                f"found={actual[0]}/{actual[1]}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} attendance rollups are out of date.")
+        self.stdout.write(self.style.SUCCESS("Attendance rollups match the records."))
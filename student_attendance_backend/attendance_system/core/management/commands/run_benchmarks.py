@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.benchmarks import SCENARIOS, SCRATCH_DATABASE, compare, run_suite, use_scratch_database
+from core.synthetic import SCALES
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main endpoints (p50/p95/p99 latency and query counts) against a "
+        "scratch SQLite database filled with synthetic data, and compare with a stored baseline. "
+        "The configured database is never touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=str(SCRATCH_DATABASE),
+            help="Scratch SQLite file; migrated and populated on first use.",
+        )
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument(
+            '--scenario', action='append', choices=[scenario.name for scenario in SCENARIOS],
+            help="Run only this scenario (repeatable).",
+        )
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline.")
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Exit non-zero when a scenario regressed against the baseline.",
+        )
+        parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed relative p50 slowdown.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The benchmark suite runs against local SQLite only.")
+        use_scratch_database(options['database'], options['scale'], log=self.stdout.write)
+
+        results = run_suite(iterations=options['iterations'], names=options['scenario'])
+
+        self.stdout.write(f"{'scenario':<26}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'queries':>9}")
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<26}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['p99']:>9.2f}"
+                f"{stats['max']:>9.2f}{stats['queries']:>9}"
+            )
+
+        report = {'scale': options['scale'], 'iterations': options['iterations'], 'results': results}
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}."))
+            return
+
+        if not baseline_path.exists():
+            if options['check']:
+                raise CommandError(f"No baseline at {baseline_path}; run with --save-baseline first.")
+            return
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get('scale') != options['scale']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded at scale '{baseline.get('scale')}', not '{options['scale']}'."
+            ))
+        regressions = compare(results, baseline['results'], tolerance=options['tolerance'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+            return
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(f"  {regression}"))
+        if options['check']:
+            raise CommandError(f"{len(regressions)} regression(s) against the baseline.")
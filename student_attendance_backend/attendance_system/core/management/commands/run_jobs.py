@@ -0,0 +1,66 @@
+import os
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.jobs import work
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (exports, rebuilds). Start it next to the web server; "
+        "at most JOB_CONCURRENCY jobs run at once across every run_jobs process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.JOB_CONCURRENCY,
+            help="Worker threads in this process (default: JOB_CONCURRENCY).",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit once the queue is empty instead of polling for new jobs.",
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help="Seconds between two looks at an idle queue.",
+        )
+        parser.add_argument(
+            '--nice', type=int, default=10,
+            help="Scheduling niceness added to this process, so requests win the CPU (0 to keep it).",
+        )
+
+    def handle(self, *args, **options):
+        if options['nice'] and hasattr(os, 'nice'):
+            os.nice(options['nice'])
+        workers = max(1, options['workers'])
+        self.stdout.write(f"Running jobs with {workers} worker(s).")
+
+        if workers == 1:
+            try:
+                work(once=options['once'], poll=options['poll'])
+            except KeyboardInterrupt:
+                pass
+            return
+
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=work, kwargs={'stop': stop, 'once': options['once'], 'poll': options['poll']},
+                name=f'job-worker-{index}', daemon=True,
+            )
+            for index in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1.0)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the running jobs finish.")
+            stop.set()
+            for thread in threads:
+                thread.join()
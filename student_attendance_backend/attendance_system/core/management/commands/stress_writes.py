@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmarks import SCRATCH_DATABASE, run_concurrent, summarize, use_scratch_database
+from core.models import AttendanceCounter, AttendanceRollup, Student, Subject, Teacher
+from core.synthetic import SCALES
+from core.views import AttendanceViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the attendance write path from many threads, as several classrooms tapping "
+        "at once would, against a scratch SQLite database. Reports lock errors and latency "
+        "with and without the write coordinator, then verifies the attendance counters and rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=str(SCRATCH_DATABASE))
+        parser.add_argument('--scale', choices=list(SCALES), default='small')
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--classrooms', type=int, default=4, help="Subjects tapped concurrently.")
+        parser.add_argument('--rounds', type=int, default=2, help="Tap pairs per student.")
+        parser.add_argument(
+            '--mode', choices=['coordinated', 'direct', 'both'], default='both',
+            help="Run writes through the write coordinator, straight from the request threads, or both.",
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Exit non-zero on any failed write or counter/rollup drift in coordinated mode.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The write stress test targets SQLite.")
+        use_scratch_database(options['database'], options['scale'], log=self.stdout.write)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.stdout.write(f"journal_mode={cursor.fetchone()[0]}")
+
+        teacher = Teacher.objects.filter(is_staff=True).first()
+        subjects = list(Subject.objects.order_by('id')[:options['classrooms']])
+        if teacher is None or not subjects:
+            raise CommandError("Need subjects and a staff teacher.")
+
+        # Interleave classrooms so their taps contend for the write lock.
+        rosters = [
+            [(subject.pk, reg_no) for reg_no in Student.objects.in_batch(subject.branch_id, subject.semester)
+             .values_list('reg_no', flat=True)]
+            for subject in subjects
+        ]
+        jobs = [
+            job
+            for _ in range(options['rounds'] * 2)
+            for row in zip(*rosters)
+            for job in row
+        ]
+
+        view = AttendanceViewSet.as_view({'post': 'tap'})
+        factory = APIRequestFactory()
+
+        def tap(job):
+            subject_id, reg_no = job
+            request = factory.post('/api/attendance/tap/', {'reg_no': reg_no, 'subject_id': subject_id}, format='json')
+            force_authenticate(request, user=teacher)
+            response = view(request)
+            if response.status_code not in (200, 201):
+                raise RuntimeError(f"{reg_no}: HTTP {response.status_code} {response.data}")
+
+        modes = ['direct', 'coordinated'] if options['mode'] == 'both' else [options['mode']]
+        failures = {}
+        for mode in modes:
+            with override_settings(ATTENDANCE_WRITE_COORDINATOR=mode == 'coordinated'):
+                latencies, errors, wall = run_concurrent(tap, jobs, options['threads'])
+            stats = summarize(latencies)
+            locked = sum('locked' in str(error) for error in errors)
+            failures[mode] = len(errors)
+            self.stdout.write(
+                f"{mode}: {stats['count']} writes on {options['threads']} threads in {wall:.2f}s "
+                f"({stats['count'] / wall:.0f}/s) p50={stats['p50']}ms p99={stats['p99']}ms "
+                f"max={stats['max']}ms errors={len(errors)} (locked={locked})"
+            )
+            for error in errors[:3]:
+                self.stderr.write(f"  {error}")
+
+        drift = AttendanceCounter.objects.mismatches() + AttendanceRollup.objects.mismatches()
+        if drift:
+            self.stdout.write(self.style.ERROR(f"{len(drift)} attendance counters or rollups drifted."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Attendance counters and rollups match the records."))
+
+        if options['check'] and (failures.get('coordinated') or drift):
+            raise CommandError("Write stress test failed.")
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_attendancerecord_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
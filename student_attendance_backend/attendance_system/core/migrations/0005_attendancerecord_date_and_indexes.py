@@ -0,0 +1,48 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_dates(apps, schema_editor):
+    AttendanceRecord = apps.get_model('core', 'AttendanceRecord')
+    batch = []
+    for record in AttendanceRecord.objects.only('id', 'timestamp').iterator(chunk_size=2000):
+        record.date = timezone.localdate(record.timestamp)
+        batch.append(record)
+        if len(batch) >= 2000:
+            AttendanceRecord.objects.bulk_update(batch, ['date'])
+            batch = []
+    if batch:
+        AttendanceRecord.objects.bulk_update(batch, ['date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_attendancerecord_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['student', 'subject', 'date'], name='attendance_student_subj_date'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['subject', 'date'], name='attendance_subject_date'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['student', 'status'], name='attendance_student_status'),
+        ),
+    ]
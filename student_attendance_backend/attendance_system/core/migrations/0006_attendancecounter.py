@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    AttendanceRecord = apps.get_model('core', 'AttendanceRecord')
+    AttendanceCounter = apps.get_model('core', 'AttendanceCounter')
+    counts = (
+        AttendanceRecord.objects.order_by()
+        .values('student_id', 'subject_id')
+        .annotate(total=Count('id'), present=Count('id', filter=Q(status='P')))
+    )
+    AttendanceCounter.objects.bulk_create(
+        (AttendanceCounter(**row) for row in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_attendancerecord_date_and_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_counters', to='core.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_counters', to='core.subject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'subject'), name='unique_attendance_counter')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_attendancecounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['-timestamp', '-id'], name='attendance_timestamp_id'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['subject', '-timestamp', '-id'], name='attendance_subj_timestamp_id'),
+        ),
+    ]
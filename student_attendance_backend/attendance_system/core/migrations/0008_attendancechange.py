@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:43
+
+from django.db import migrations, models
+
+
+def seed_change_log(apps, schema_editor):
+    AttendanceRecord = apps.get_model('core', 'AttendanceRecord')
+    AttendanceChange = apps.get_model('core', 'AttendanceChange')
+    AttendanceChange.objects.bulk_create(
+        (
+            AttendanceChange(record_id=pk, subject_id=subject_id, op='U')
+            for pk, subject_id in AttendanceRecord.objects.order_by('id')
+            .values_list('id', 'subject_id').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_attendance_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_id', models.BigIntegerField()),
+                ('subject_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('U', 'Created or updated'), ('D', 'Deleted')], max_length=1)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['subject_id', 'id'], name='attendance_change_subject')],
+            },
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
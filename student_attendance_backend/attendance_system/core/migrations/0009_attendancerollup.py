@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_rollups(apps, schema_editor):
+    AttendanceRecord = apps.get_model('core', 'AttendanceRecord')
+    AttendanceRollup = apps.get_model('core', 'AttendanceRollup')
+    counts = (
+        AttendanceRecord.objects.order_by()
+        .values('subject_id', 'date')
+        .annotate(total=Count('id'), present=Count('id', filter=Q(status='P')))
+    )
+    AttendanceRollup.objects.bulk_create(
+        (AttendanceRollup(**row) for row in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_attendancechange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='core.subject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('subject', 'date'), name='unique_attendance_rollup')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_attendancerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='profile_pic_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16),
+        ),
+    ]
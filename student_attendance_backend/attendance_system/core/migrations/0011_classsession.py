@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+from core import packing
+
+
+def pack_sessions(apps, schema_editor):
+    AttendanceRecord = apps.get_model('core', 'AttendanceRecord')
+    ClassSession = apps.get_model('core', 'ClassSession')
+    # Today can still receive taps; it is packed by pack_class_sessions
+    # once it is over.
+    periods = {}
+    rows = (
+        AttendanceRecord.objects.filter(date__lt=timezone.localdate())
+        .order_by('subject_id', 'date', 'timestamp', 'id')
+        .values_list('subject_id', 'date', 'student_id', 'status')
+        .iterator(chunk_size=5000)
+    )
+    for subject_id, day, student_id, status in rows:
+        day_periods = periods.setdefault((subject_id, day), [])
+        for entries in day_periods:
+            if student_id not in entries:
+                entries[student_id] = status
+                break
+        else:
+            day_periods.append({student_id: status})
+
+    sessions = []
+    for (subject_id, day), day_periods in periods.items():
+        for period, entries in enumerate(day_periods, start=1):
+            student_ids, present = packing.pack(entries)
+            sessions.append(ClassSession(
+                subject_id=subject_id, date=day, period=period, student_ids=student_ids, present=present,
+            ))
+    ClassSession.objects.bulk_create(sessions, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_student_profile_pic_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('period', models.PositiveSmallIntegerField(default=1)),
+                ('student_ids', models.BinaryField()),
+                ('present', models.BinaryField()),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_sessions', to='core.subject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('subject', 'date', 'period'), name='unique_class_session')],
+                'indexes': [models.Index(fields=['date'], name='class_session_date_idx')],
+            },
+        ),
+        migrations.RunPython(pack_sessions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:28
+
+from django.db import migrations, models
+
+# Archived academic years are read-only: live records may not be dated
+# inside one, whichever write path they come from.
+ARCHIVED_CHECK = (
+    "WHEN EXISTS (SELECT 1 FROM core_archivedyear "
+    "WHERE NEW.date BETWEEN core_archivedyear.start_date AND core_archivedyear.end_date) "
+    "BEGIN SELECT RAISE(ABORT, 'attendance date falls in an archived academic year'); END"
+)
+TRIGGERS = {
+    'attendance_archived_insert': 'BEFORE INSERT ON core_attendancerecord',
+    'attendance_archived_update': 'BEFORE UPDATE OF date ON core_attendancerecord',
+}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, event in TRIGGERS.items():
+        schema_editor.execute(f"CREATE TRIGGER {name} {event} {ARCHIVED_CHECK}")
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_classsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['year'],
+            },
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
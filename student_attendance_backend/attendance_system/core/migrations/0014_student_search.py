@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Full-text index over the searchable student columns. It is an
+# external-content FTS5 table: it stores only the index and reads the text
+# from core_student, and these triggers keep it in step with every write
+# path. Prefix indexes of 2 and 3 characters make short type-ahead prefixes
+# a lookup instead of a scan of the term list.
+SEARCH_TABLE = 'core_student_search'
+COLUMNS = 'reg_no, name, email'
+OLD = 'old.id, old.reg_no, old.name, old.email'
+NEW = 'new.id, new.reg_no, new.name, new.email'
+TRIGGERS = {
+    'student_search_insert': (
+        f"AFTER INSERT ON core_student BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}(rowid, {COLUMNS}) VALUES ({NEW}); END"
+    ),
+    'student_search_delete': (
+        f"AFTER DELETE ON core_student BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {COLUMNS}) VALUES ('delete', {OLD}); END"
+    ),
+    'student_search_update': (
+        f"AFTER UPDATE OF id, {COLUMNS} ON core_student BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {COLUMNS}) VALUES ('delete', {OLD}); "
+        f"INSERT INTO {SEARCH_TABLE}(rowid, {COLUMNS}) VALUES ({NEW}); END"
+    ),
+}
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5({COLUMNS}, "
+        f"content='core_student', content_rowid='id', prefix='2 3', "
+        f"tokenize='unicode61 remove_diacritics 2')"
+    )
+    for name, body in TRIGGERS.items():
+        schema_editor.execute(f"CREATE TRIGGER {name} {body}")
+    schema_editor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
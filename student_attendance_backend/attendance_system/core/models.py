@@ -1,6 +1,17 @@
-from django.db import models
+import os
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import connections, models, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
+from . import packing, thumbnails
+
 
 # ------------------ Branch ------------------
 class Branch(models.Model):
@@ -22,6 +33,12 @@ class Subject(models.Model):
 
 
 # ------------------ Student ------------------
+class StudentQuerySet(models.QuerySet):
+    def in_batch(self, branch, semester):
+        """Students of one branch and semester, i.e. one class batch."""
+        return self.filter(branch=branch, semester=semester)
+
+
 class Student(models.Model):
     reg_no = models.CharField(max_length=20, unique=True)
     name = models.CharField(max_length=100)
@@ -29,9 +46,25 @@ class Student(models.Model):
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='students')
     email = models.EmailField(unique=True)
     profile_pic = models.ImageField(upload_to='students/', blank=True, null=True)
+    # Content hash naming the thumbnails of ``profile_pic``; empty without them.
+    profile_pic_hash = models.CharField(max_length=16, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = StudentQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        if 'profile_pic' not in self.get_deferred_fields():
+            if not self.profile_pic:
+                self.profile_pic_hash = ''
+            elif not self.profile_pic._committed:
+                # A new upload: derive the thumbnails before it is stored.
+                self.profile_pic_hash = thumbnails.generate_for_file(self.profile_pic) or ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'profile_pic' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'profile_pic_hash'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.reg_no})"
 
@@ -45,6 +78,19 @@ class Teacher(AbstractUser):
 
 
 # ------------------ Attendance Record ------------------
+class AttendanceRecordQuerySet(models.QuerySet):
+    def delete(self):
+        """Delete the matched records and record the change for counters and sync."""
+        with transaction.atomic(using=self.db):
+            removed = list(self.values_list(*TRACKED_FIELDS))
+            result = super().delete()
+            track_attendance_writes(removed=removed)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class AttendanceRecord(models.Model):
     STATUS_CHOICES = [
         ('P', 'Present'),
@@ -54,13 +100,829 @@ class AttendanceRecord(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_records')
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='attendance_records')
     status = models.CharField(max_length=1, choices=STATUS_CHOICES, default='A')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+    # Local calendar day of ``timestamp``, kept as a plain column so the
+    # per-day lookups can use an index instead of ``timestamp__date``.
+    date = models.DateField(editable=False)
+
+    objects = AttendanceRecordQuerySet.as_manager()
 
     class Meta:
         ordering = ['-timestamp']
         constraints = [
             models.UniqueConstraint(fields=['student', 'subject', 'timestamp'], name='unique_attendance_entry')
         ]
+        indexes = [
+            models.Index(fields=['student', 'subject', 'date'], name='attendance_student_subj_date'),
+            models.Index(fields=['subject', 'date'], name='attendance_subject_date'),
+            models.Index(fields=['student', 'status'], name='attendance_student_status'),
+            # Keyset pagination of the attendance log
+            models.Index(fields=['-timestamp', '-id'], name='attendance_timestamp_id'),
+            models.Index(fields=['subject', '-timestamp', '-id'], name='attendance_subj_timestamp_id'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.date = timezone.localdate(self.timestamp)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'timestamp' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'date'}
+
+        with transaction.atomic():
+            previous = []
+            if not self._state.adding and self.pk is not None:
+                previous = list(
+                    AttendanceRecord.objects.filter(pk=self.pk).values_list(*TRACKED_FIELDS)
+                )
+            super().save(*args, **kwargs)
+            track_attendance_writes(added=[self.tracked_state()], removed=previous)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            state = self.tracked_state()
+            result = super().delete(*args, **kwargs)
+            track_attendance_writes(removed=[state])
+        return result
+
+    def tracked_state(self):
+        return (self.pk, self.student_id, self.subject_id, self.date, self.status)
 
     def __str__(self):
         return f"{self.student.reg_no} - {self.subject.name} - {self.get_status_display()} on {self.timestamp.strftime('%Y-%m-%d')}"
+
+
+# ------------------ Write tracking ------------------
+# Record state captured around every attendance write, in this order.
+TRACKED_FIELDS = ('id', 'student_id', 'subject_id', 'date', 'status')
+
+
+def track_attendance_writes(added=(), removed=()):
+    """
+    Propagate attendance writes to the counters, the daily rollups, the
+    packed class sessions and the sync change log.
+
+    ``added`` holds the new state of inserted or updated records and
+    ``removed`` the previous state of updated or deleted ones, both as
+    ``TRACKED_FIELDS`` tuples. Must run in the transaction of the write.
+    """
+    added, removed = list(added), list(removed)
+    AttendanceCounter.objects.apply(counter_deltas(added=added, removed=removed))
+    AttendanceRollup.objects.apply(rollup_deltas(added=added, removed=removed))
+    ClassSession.objects.apply(added=added, removed=removed)
+    AttendanceChange.objects.log(added=added, removed=removed)
+
+
+# ------------------ Attendance Counter ------------------
+def counter_deltas(added=(), removed=()):
+    """
+    Fold ``TRACKED_FIELDS`` rows into counter deltas.
+
+    Returns ``{(student_id, subject_id): [present, total]}``.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for sign, rows in ((1, added), (-1, removed)):
+        for _, student_id, subject_id, _, status in rows:
+            delta = deltas[(student_id, subject_id)]
+            delta[0] += sign if status == 'P' else 0
+            delta[1] += sign
+    return deltas
+
+
+class AttendanceCounterManager(models.Manager):
+    def apply(self, deltas):
+        """Add counter deltas with a single upsert per (student, subject)."""
+        rows = [
+            (student_id, subject_id, present, total)
+            for (student_id, subject_id), (present, total) in deltas.items()
+            if present or total
+        ]
+        if not rows:
+            return
+
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        sql = (
+            f"INSERT INTO {table} (student_id, subject_id, present, total) "
+            f"VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT (student_id, subject_id) DO UPDATE SET "
+            f"present = {table}.present + excluded.present, "
+            f"total = {table}.total + excluded.total"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def expected(self):
+        """Counts computed from the raw attendance records, archived years included."""
+        counts = {}
+        for records in ArchivedYear.objects.record_sources():
+            rows = (
+                records.order_by()
+                .values('student_id', 'subject_id')
+                .annotate(total=Count('id'), present=Count('id', filter=Q(status='P')))
+            )
+            for row in rows.iterator():
+                key = (row['student_id'], row['subject_id'])
+                if key in counts:
+                    counts[key]['total'] += row['total']
+                    counts[key]['present'] += row['present']
+                else:
+                    counts[key] = row
+        return list(counts.values())
+
+    def rebuild(self):
+        """Replace every counter with counts recomputed from the records."""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(
+                (self.model(**row) for row in self.expected()),
+                batch_size=1000,
+            )
+
+    def mismatches(self):
+        """Return ``(student_id, subject_id, expected, actual)`` for drifted counters."""
+        expected = {
+            (row['student_id'], row['subject_id']): (row['present'], row['total'])
+            for row in self.expected()
+        }
+        actual = {
+            (row[0], row[1]): (row[2], row[3])
+            for row in self.values_list('student_id', 'subject_id', 'present', 'total').iterator()
+        }
+        return [
+            (*key, expected.get(key, (0, 0)), actual.get(key, (0, 0)))
+            for key in sorted(expected.keys() | actual.keys())
+            if expected.get(key, (0, 0)) != actual.get(key, (0, 0))
+        ]
+
+
+class AttendanceCounter(models.Model):
+    """
+    Running present/total counts per (student, subject).
+
+    Kept in step with ``AttendanceRecord`` inside the same transaction by
+    ``AttendanceRecord.save``/``delete`` and ``AttendanceRecordQuerySet.delete``.
+    Paths that bypass those (``bulk_create``, ``QuerySet.update``) must call
+    ``track_attendance_writes`` themselves.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_counters')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='attendance_counters')
+    present = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    objects = AttendanceCounterManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'subject'], name='unique_attendance_counter')
+        ]
+
+    def __str__(self):
+        return f"{self.student_id}/{self.subject_id}: {self.present}/{self.total}"
+
+
+# ------------------ Attendance Rollup ------------------
+def rollup_deltas(added=(), removed=()):
+    """
+    Fold ``TRACKED_FIELDS`` rows into daily rollup deltas.
+
+    Returns ``{(subject_id, date): [present, total]}``.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for sign, rows in ((1, added), (-1, removed)):
+        for _, _, subject_id, day, status in rows:
+            delta = deltas[(subject_id, day)]
+            delta[0] += sign if status == 'P' else 0
+            delta[1] += sign
+    return deltas
+
+
+class AttendanceRollupManager(models.Manager):
+    def apply(self, deltas):
+        """Add rollup deltas with a single upsert per (subject, date)."""
+        connection = connections[self.db]
+        rows = [
+            (subject_id, connection.ops.adapt_datefield_value(day), present, total)
+            for (subject_id, day), (present, total) in deltas.items()
+            if present or total
+        ]
+        if not rows:
+            return
+
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        sql = (
+            f"INSERT INTO {table} (subject_id, date, present, total) "
+            f"VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT (subject_id, date) DO UPDATE SET "
+            f"present = {table}.present + excluded.present, "
+            f"total = {table}.total + excluded.total"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def expected(self):
+        """Daily counts computed from the raw attendance records, archived years included."""
+        # Each day lives in exactly one table.
+        for records in ArchivedYear.objects.record_sources():
+            yield from (
+                records.order_by()
+                .values('subject_id', 'date')
+                .annotate(total=Count('id'), present=Count('id', filter=Q(status='P')))
+                .iterator()
+            )
+
+    def rebuild(self):
+        """Replace every rollup with counts recomputed from the records."""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(
+                (self.model(**row) for row in self.expected()),
+                batch_size=1000,
+            )
+
+    def mismatches(self):
+        """Return ``(subject_id, date, expected, actual)`` for drifted rollups."""
+        expected = {
+            (row['subject_id'], row['date']): (row['present'], row['total'])
+            for row in self.expected()
+        }
+        actual = {
+            (row[0], row[1]): (row[2], row[3])
+            for row in self.values_list('subject_id', 'date', 'present', 'total').iterator()
+        }
+        return [
+            (*key, expected.get(key, (0, 0)), actual.get(key, (0, 0)))
+            for key in sorted(expected.keys() | actual.keys())
+            if expected.get(key, (0, 0)) != actual.get(key, (0, 0))
+        ]
+
+
+class AttendanceRollup(models.Model):
+    """
+    Present/total counts per (subject, day).
+
+    The finest bucket of the attendance time series; weeks and months are
+    summed from it, so a year of one subject is at most a few hundred rows
+    whatever the class size. Maintained alongside ``AttendanceCounter``.
+    """
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='attendance_rollups')
+    date = models.DateField()
+    present = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    objects = AttendanceRollupManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subject', 'date'], name='unique_attendance_rollup')
+        ]
+
+    def __str__(self):
+        return f"{self.subject_id} on {self.date}: {self.present}/{self.total}"
+
+
+# ------------------ Class Session ------------------
+def _take(periods, student_id, status=None):
+    """Drop a student from the last period holding them (with ``status``, if possible)."""
+    for wanted in (status, None):
+        for entries in reversed(periods):
+            if student_id in entries and wanted in (None, entries[student_id]):
+                del entries[student_id]
+                return
+
+
+def _put(periods, student_id, status):
+    """Mark a student in the first period not holding them yet."""
+    for entries in periods:
+        if student_id not in entries:
+            entries[student_id] = status
+            return
+    periods.append({student_id: status})
+
+
+class ClassSessionManager(models.Manager):
+    def last_packed_day(self):
+        """
+        The latest day holding sessions, or ``None`` when nothing is packed.
+
+        Every day up to and including it is packed: its records and its
+        sessions hold the same attendance, so either can be read. Later
+        days are only in the records until they are packed.
+        """
+        return self.order_by('-date').values_list('date', flat=True).first()
+
+    def _periods(self, keys):
+        """
+        Decode the sessions of ``(subject_id, date)`` keys as ``{key: [entries, ...]}``.
+
+        Keys of days that are not packed are left out. The latest session
+        is read along, to tell the packed days from the others in the same
+        query.
+        """
+        periods = {key: [] for key in keys}
+        rows = self.filter(
+            Q(subject_id__in={key[0] for key in keys}, date__in={key[1] for key in keys})
+            | Q(pk__in=self.order_by('-date').values('pk')[:1])
+        ).order_by('period').values_list('subject_id', 'date', 'period', 'student_ids', 'present')
+        last = None
+        for subject_id, day, period, student_ids, present in rows:
+            last = max(last or day, day)
+            key = (subject_id, day)
+            if key in periods:
+                entries = periods[key]
+                entries.extend({} for _ in range(period - len(entries)))
+                entries[period - 1] = packing.unpack(bytes(student_ids), bytes(present))
+        return {key: value for key, value in periods.items() if last is not None and key[1] <= last}
+
+    def apply(self, added=(), removed=()):
+        """
+        Fold ``TRACKED_FIELDS`` rows of packed days into their sessions.
+
+        A removed record leaves the last period holding its student, an
+        added one joins the first period without them, so each day keeps
+        the same multiset of (student, status) as its records. Only past
+        days can be packed, so writes to today (taps, roll calls) return
+        without touching the database.
+        """
+        today = timezone.localdate()
+        keys = {(row[2], row[3]) for row in (*added, *removed) if row[3] < today}
+        if not keys:
+            return
+        periods = self._periods(keys)
+        before = {key: [dict(entries) for entries in value] for key, value in periods.items()}
+        for _, student_id, subject_id, day, status in removed:
+            if (subject_id, day) in periods:
+                _take(periods[(subject_id, day)], student_id, status)
+        for _, student_id, subject_id, day, status in added:
+            if (subject_id, day) in periods:
+                _put(periods[(subject_id, day)], student_id, status)
+
+        connection = connections[self.db]
+        upserts, deletes = [], []
+        for key, entries in periods.items():
+            previous = before[key]
+            subject_id, day = key[0], connection.ops.adapt_datefield_value(key[1])
+            for period, current in enumerate(entries, start=1):
+                stored = previous[period - 1] if period <= len(previous) else {}
+                if current == stored:
+                    continue
+                if current:
+                    upserts.append((subject_id, day, period, *packing.pack(current)))
+                else:
+                    deletes.append((subject_id, day, period))
+
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            if upserts:
+                cursor.executemany(
+                    f"INSERT INTO {table} (subject_id, date, period, student_ids, present) "
+                    f"VALUES (%s, %s, %s, %s, %s) "
+                    f"ON CONFLICT (subject_id, date, period) DO UPDATE SET "
+                    f"student_ids = excluded.student_ids, present = excluded.present",
+                    upserts,
+                )
+            if deletes:
+                cursor.executemany(
+                    f"DELETE FROM {table} WHERE subject_id = %s AND date = %s AND period = %s",
+                    deletes,
+                )
+
+    def expected(self, until):
+        """
+        Sessions built from the records up to ``until``, as ``{(subject_id, date): [entries, ...]}``.
+
+        Archived years are read too. A student's n-th record of a day, by time, goes to period n.
+        """
+        periods = defaultdict(list)
+        for records in ArchivedYear.objects.record_sources(end=until):
+            rows = (
+                records.filter(date__lte=until)
+                .order_by('subject_id', 'date', 'timestamp', 'id')
+                .values_list('subject_id', 'date', 'student_id', 'status')
+                .iterator(chunk_size=5000)
+            )
+            for subject_id, day, student_id, status in rows:
+                _put(periods[(subject_id, day)], student_id, status)
+        return periods
+
+    def rebuild(self, until=None):
+        """
+        Replace every session with sessions packed from the records up to ``until``.
+
+        ``until`` defaults to (and is capped at) yesterday, the last day
+        that can no longer receive taps: :meth:`apply` leaves today's
+        writes to the records, so a packed today would miss them. Returns
+        the number of sessions written.
+        """
+        yesterday = timezone.localdate() - timedelta(days=1)
+        until = min(until or yesterday, yesterday)
+        # Class summaries never read archived records, so those days stay packed.
+        archived = ArchivedYear.objects.order_by('-end_date').values_list('end_date', flat=True).first()
+        until = max(until, archived or until)
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            return len(self.bulk_create(
+                (
+                    self.model(subject_id=subject_id, date=day, period=period,
+                               **dict(zip(('student_ids', 'present'), packing.pack(entries))))
+                    for (subject_id, day), periods in self.expected(until).items()
+                    for period, entries in enumerate(periods, start=1)
+                ),
+                batch_size=1000,
+            ))
+
+    def mismatches(self):
+        """Return ``(subject_id, date, expected, actual)`` for packed days whose sessions drifted."""
+        def tally(periods):
+            return sorted(item for entries in periods for item in entries.items())
+
+        last = self.last_packed_day()
+        if last is None:
+            return []
+        expected = {key: tally(value) for key, value in self.expected(last).items()}
+        actual = defaultdict(list)
+        for subject_id, day, student_ids, present in self.values_list(
+            'subject_id', 'date', 'student_ids', 'present'
+        ).iterator():
+            actual[(subject_id, day)] += packing.unpack(bytes(student_ids), bytes(present)).items()
+        actual = {key: sorted(value) for key, value in actual.items()}
+        return [
+            (*key, expected.get(key, []), actual.get(key, []))
+            for key in sorted(expected.keys() | actual.keys())
+            if expected.get(key, []) != actual.get(key, [])
+        ]
+
+
+class ClassSession(models.Model):
+    """
+    One lecture of a subject, with its attendance packed into two blobs.
+
+    ``student_ids`` holds the marked students as sorted uint32s and
+    ``present`` a bitmap over them (see ``core.packing``), so a class of
+    sixty is one row of about 250 bytes for class summaries to read. The
+    sessions are an index over the records, which stay the source of
+    truth. Past days are packed in bulk by the ``pack_class_sessions``
+    command and then kept in step with their records alongside
+    ``AttendanceCounter``; a day with several lectures has one session
+    per ``period``.
+    """
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='class_sessions')
+    date = models.DateField()
+    period = models.PositiveSmallIntegerField(default=1)
+    student_ids = models.BinaryField()
+    present = models.BinaryField()
+
+    objects = ClassSessionManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subject', 'date', 'period'], name='unique_class_session')
+        ]
+        indexes = [models.Index(fields=['date'], name='class_session_date_idx')]
+
+    @property
+    def attendance(self):
+        """``{student_id: 'P' | 'A'}`` for the students marked in this session."""
+        return packing.unpack(bytes(self.student_ids), bytes(self.present))
+
+    def __str__(self):
+        return f"{self.subject_id} on {self.date} #{self.period}"
+
+
+# ------------------ Attendance Archive ------------------
+def academic_year(day):
+    """The academic year ``day`` falls in, named after the calendar year it starts in."""
+    return day.year if day.month >= settings.ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def academic_year_bounds(year):
+    """First and last day of an academic year."""
+    start = date(year, settings.ACADEMIC_YEAR_START_MONTH, 1)
+    return start, date(year + 1, start.month, 1) - timedelta(days=1)
+
+
+_archive_models = {}
+_archive_models_lock = threading.Lock()
+
+
+def archive_model(year):
+    """
+    Unmanaged model over the archive table of one academic year.
+
+    Same columns as ``AttendanceRecord``, built on first use and cached.
+    The foreign keys have neither reverse accessors nor constraints, so
+    archived rows never take part in cascades.
+    """
+    with _archive_models_lock:
+        if year not in _archive_models:
+            meta = type('Meta', (), {
+                'app_label': 'core',
+                'db_table': f'{AttendanceRecord._meta.db_table}_{year}',
+                'managed': False,
+                'indexes': [
+                    models.Index(fields=['subject', 'date'], name=f'attendance_{year}_subject_date'),
+                    models.Index(fields=['student', 'subject', 'date'], name=f'attendance_{year}_student'),
+                ],
+            })
+            _archive_models[year] = type(f'AttendanceArchive{year}', (models.Model,), {
+                '__module__': __name__,
+                'Meta': meta,
+                'id': models.BigIntegerField(primary_key=True),
+                'student': models.ForeignKey(Student, models.DO_NOTHING, related_name='+', db_constraint=False),
+                'subject': models.ForeignKey(Subject, models.DO_NOTHING, related_name='+', db_constraint=False),
+                'status': models.CharField(max_length=1, choices=AttendanceRecord.STATUS_CHOICES),
+                'timestamp': models.DateTimeField(),
+                'date': models.DateField(),
+            })
+        return _archive_models[year]
+
+
+# Message of the trigger rejecting live records dated in an archived year
+# (migration 0012).
+ARCHIVED_YEAR_ERROR = 'attendance date falls in an archived academic year'
+
+# Columns copied between the live table and an archive table.
+ARCHIVE_COLUMNS = ('id', 'student_id', 'subject_id', 'status', 'timestamp', 'date')
+
+
+class ArchivedYearManager(models.Manager):
+    def record_sources(self, start=None, end=None):
+        """
+        Querysets over every table holding records between ``start`` and ``end``.
+
+        The archives of the academic years overlapping the range, oldest
+        first, then the live ``AttendanceRecord`` table. Callers filter
+        each one the same way and combine the results.
+        """
+        years = self.order_by('year')
+        if start is not None:
+            years = years.filter(end_date__gte=start)
+        if end is not None:
+            years = years.filter(start_date__lte=end)
+        return [
+            *(archive_model(year).objects.all() for year in years.values_list('year', flat=True)),
+            AttendanceRecord.objects.all(),
+        ]
+
+    def discard(self, column, value):
+        """
+        Delete the archived records whose ``column`` equals ``value``.
+
+        Archive tables take no part in cascades, so this is how the records
+        of a deleted student or subject leave them. Returns the number of
+        records deleted.
+        """
+        connection = connections[self.db]
+        column = connection.ops.quote_name(column)
+        discarded = 0
+        with transaction.atomic(using=self.db):
+            for year in self.values_list('year', flat=True):
+                archive = connection.ops.quote_name(archive_model(year)._meta.db_table)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DELETE FROM {archive} WHERE {column} = %s", [value])
+                    deleted = cursor.rowcount
+                if deleted:
+                    self.filter(year=year).update(records=models.F('records') - deleted)
+                    discarded += deleted
+        return discarded
+
+    def archive(self, year):
+        """
+        Move the records of a closed academic year to its own table.
+
+        The year's days are packed into class sessions first, so class
+        summaries never read the archive. Counters and rollups already
+        include the records and are left alone. Returns the number of
+        records moved.
+        """
+        if year >= academic_year(timezone.localdate()):
+            raise ValueError(f"Academic year {year} is not closed yet.")
+        start, end = academic_year_bounds(year)
+        model = archive_model(year)
+        connection = connections[self.db]
+        live = connection.ops.quote_name(AttendanceRecord._meta.db_table)
+        archive = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(column) for column in ARCHIVE_COLUMNS)
+        bounds = [connection.ops.adapt_datefield_value(day) for day in (start, end)]
+
+        with transaction.atomic(using=self.db):
+            if self.filter(year=year).exists():
+                raise ValueError(f"Academic year {year} is already archived.")
+            last_packed = ClassSession.objects.last_packed_day()
+            if last_packed is None or last_packed < end:
+                ClassSession.objects.rebuild()
+            editor = connection.schema_editor()
+            with connection.cursor() as cursor:
+                cursor.execute(*editor.table_sql(model))
+                for index in model._meta.indexes:
+                    cursor.execute(str(index.create_sql(model, editor)))
+                cursor.execute(
+                    f"INSERT INTO {archive} ({columns}) SELECT {columns} FROM {live} "
+                    f"WHERE date BETWEEN %s AND %s",
+                    bounds,
+                )
+                cursor.execute(f"DELETE FROM {live} WHERE date BETWEEN %s AND %s", bounds)
+                moved = cursor.rowcount
+            self.create(year=year, start_date=start, end_date=end, records=moved)
+        return moved
+
+    def restore(self, year):
+        """Move an archived year's records back to the live table and drop its archive."""
+        model = archive_model(year)
+        connection = connections[self.db]
+        live = connection.ops.quote_name(AttendanceRecord._meta.db_table)
+        archive = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(column) for column in ARCHIVE_COLUMNS)
+
+        with transaction.atomic(using=self.db):
+            if not self.filter(year=year).delete()[0]:
+                raise ValueError(f"Academic year {year} is not archived.")
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {live} ({columns}) SELECT {columns} FROM {archive}")
+                restored = cursor.rowcount
+                cursor.execute(f"DROP TABLE {archive}")
+        return restored
+
+
+class ArchivedYear(models.Model):
+    """
+    An academic year whose records live in their own archive table.
+
+    Archived years are read-only: a database trigger rejects live records
+    dated inside one. Summaries and exports reach the archive through
+    ``ArchivedYear.objects.record_sources()``.
+    """
+    year = models.PositiveIntegerField(unique=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    records = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ArchivedYearManager()
+
+    class Meta:
+        ordering = ['year']
+
+    @property
+    def table(self):
+        return archive_model(self.year)._meta.db_table
+
+    def __str__(self):
+        return f"{self.year}-{(self.year + 1) % 100:02d} ({self.records} records)"
+
+
+# ------------------ Attendance Change Log ------------------
+class AttendanceChangeManager(models.Manager):
+    def log(self, added=(), removed=()):
+        """Append one change per touched record; removals without a new state are deletes."""
+        upserted = {row[0]: row for row in added}
+        changes = [
+            self.model(record_id=pk, subject_id=subject_id, op=AttendanceChange.UPSERT)
+            for pk, _, subject_id, _, _ in upserted.values()
+        ]
+        changes += [
+            self.model(record_id=pk, subject_id=subject_id, op=AttendanceChange.DELETE)
+            for pk, _, subject_id, _, _ in {row[0]: row for row in removed}.values()
+            if pk not in upserted
+        ]
+        self.bulk_create(changes)
+
+
+class AttendanceChange(models.Model):
+    """
+    Append-only log of attendance writes read by the delta sync endpoint.
+
+    The auto-incremented ``id`` is the sync watermark: SQLite never reuses
+    it and commits writers one at a time, so it only ever grows. Records
+    removed by a cascade from a deleted student or subject are logged as
+    deletes too.
+    """
+    UPSERT = 'U'
+    DELETE = 'D'
+    OP_CHOICES = [
+        (UPSERT, 'Created or updated'),
+        (DELETE, 'Deleted'),
+    ]
+
+    record_id = models.BigIntegerField()
+    subject_id = models.BigIntegerField()
+    op = models.CharField(max_length=1, choices=OP_CHOICES)
+
+    objects = AttendanceChangeManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['subject_id', 'id'], name='attendance_change_subject'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_op_display()} record {self.record_id}"
+
+
+# ------------------ Background Job ------------------
+class JobManager(models.Manager):
+    def claim(self, worker, limit, exclusive=()):
+        """
+        Atomically mark the oldest runnable queued job as running by ``worker``.
+
+        Nothing is claimed while ``limit`` jobs already run (in any worker
+        process), and a job of an ``exclusive`` kind waits until no other
+        exclusive job runs. Returns the job or ``None``.
+        """
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        kinds = ', '.join(['%s'] * len(exclusive)) or 'NULL'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET status = %s, worker = %s, started_at = %s, heartbeat_at = %s "
+                f"WHERE id = ("
+                f"  SELECT id FROM {table} WHERE status = %s AND ("
+                f"    kind NOT IN ({kinds}) OR NOT EXISTS ("
+                f"      SELECT 1 FROM {table} WHERE status = %s AND kind IN ({kinds})))"
+                f"  ORDER BY id LIMIT 1"
+                f") AND (SELECT COUNT(*) FROM {table} WHERE status = %s) < %s "
+                f"RETURNING id",
+                [Job.RUNNING, worker, now, now, Job.QUEUED, *exclusive, Job.RUNNING, *exclusive,
+                 Job.RUNNING, limit],
+            )
+            row = cursor.fetchone()
+        return self.get(pk=row[0]) if row else None
+
+    def requeue_stale(self, older_than):
+        """Put back running jobs whose worker has not reported since ``older_than``."""
+        return self.filter(status=Job.RUNNING, heartbeat_at__lt=older_than).update(
+            status=Job.QUEUED, worker='', progress=0, started_at=None, heartbeat_at=None,
+        )
+
+    def purge(self, older_than):
+        """Delete jobs that finished before ``older_than``; their result files go with them."""
+        return self.filter(status__in=[Job.SUCCEEDED, Job.FAILED], finished_at__lt=older_than).delete()[0]
+
+
+class JobResultStorage(FileSystemStorage):
+    """
+    Result files of jobs, under ``JOB_RESULTS_ROOT``.
+
+    ``MEDIA_ROOT`` is served to anyone, so results live outside it and
+    have no URL: they are only handed out by the owner-checked download
+    endpoint. The root is read on every use, like ``MEDIA_ROOT`` is.
+    """
+
+    @property
+    def base_location(self):
+        return settings.JOB_RESULTS_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        return None
+
+
+class Job(models.Model):
+    """
+    A report, export or rebuild run by the ``run_jobs`` worker pool.
+
+    Clients submit a job, poll its ``status`` and ``progress`` (percent)
+    and download ``result`` once it succeeded; ``message`` holds a short
+    summary or the error of a failed job.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=32)
+    params = models.JSONField(default=dict, blank=True)
+    owner = models.ForeignKey(Teacher, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.TextField(blank=True)
+    result = models.FileField(upload_to='jobs/', storage=JobResultStorage(), blank=True)
+    worker = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_status'),
+            models.Index(fields=['owner', '-id'], name='job_owner'),
+        ]
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} ({self.status})"
@@ -0,0 +1,42 @@
+# Binary encoding of one class session: the ids of the students marked in
+# it as a sorted array of little-endian uint32 ('I' is 4 bytes on every
+# platform CPython supports), and a bitmap over that array with bit i set
+# when student i was present.
+import sys
+from array import array
+
+# byte -> its eight bits, least significant first
+_BITS = [tuple((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+
+
+def pack(entries):
+    """Encode ``{student_id: 'P' | 'A'}`` as ``(student_ids, present)`` bytes."""
+    student_ids = sorted(entries)
+    ids = array('I', student_ids)
+    if sys.byteorder == 'big':
+        ids.byteswap()
+    bitmap = bytearray((len(student_ids) + 7) // 8)
+    for index, student_id in enumerate(student_ids):
+        if entries[student_id] == 'P':
+            bitmap[index >> 3] |= 1 << (index & 7)
+    return ids.tobytes(), bytes(bitmap)
+
+
+def unpack_ids(student_ids):
+    ids = array('I')
+    ids.frombytes(student_ids)
+    if sys.byteorder == 'big':
+        ids.byteswap()
+    return ids
+
+
+def unpack_bits(present, count):
+    """The first ``count`` bits of a bitmap as a list of 0/1."""
+    return [bit for byte in present for bit in _BITS[byte]][:count]
+
+
+def unpack(student_ids, present):
+    """Decode :func:`pack` output back into ``{student_id: 'P' | 'A'}``."""
+    ids = unpack_ids(student_ids)
+    bits = unpack_bits(present, len(ids))
+    return {student_id: 'P' if bit else 'A' for student_id, bit in zip(ids, bits)}
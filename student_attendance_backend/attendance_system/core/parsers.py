@@ -0,0 +1,55 @@
+# --------------------- parsers.py ---------------------
+import codecs
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """
+    ``JSONParser`` decoding with orjson.
+
+    orjson reads UTF-8 only, so bodies declared in another charset go
+    through the stock parser. NaN and Infinity are rejected, as with
+    DRF's strict parsing.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON lazily.
+
+    Returns a generator so large uploads are decoded line by line while the
+    view consumes them, instead of being read into memory up front.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self._iter_lines(stream, encoding)
+
+    @staticmethod
+    def _iter_lines(stream, encoding):
+        if stream is None:
+            return
+        for line_no, raw in enumerate(stream, start=1):
+            line = raw.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError as exc:
+                raise ParseError(f'NDJSON parse error on line {line_no} - {exc}')
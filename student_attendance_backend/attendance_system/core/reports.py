@@ -0,0 +1,232 @@
+import math
+from collections import Counter
+from datetime import date
+from fractions import Fraction
+from itertools import compress
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, FilteredRelation, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from . import packing
+from .models import AttendanceCounter, AttendanceRollup, ClassSession, Student, Subject
+
+SHORTAGE_CACHE_KEY = 'shortage:{}:{}:{}'
+
+PERCENTAGE_ORDERING = {
+    'percentage': ('percentage', 'reg_no'),
+    '-percentage': ('-percentage', 'reg_no'),
+}
+
+# Rollup bucket -> expression mapping a day to the first day of its bucket.
+ROLLUP_BUCKETS = {
+    'day': F('date'),
+    'week': TruncWeek('date'),
+    'month': TruncMonth('date'),
+}
+
+# Rollup grouping -> subject fields each series is keyed by.
+ROLLUP_GROUPS = {
+    'subject': ('subject',),
+    'batch': ('subject__branch', 'subject__semester'),
+}
+
+
+def attendance_record_filter(prefix='', subject=None, start=None, end=None):
+    """Build a ``Q`` over attendance records for an optional subject and date range."""
+    condition = Q()
+    if subject is not None:
+        condition &= Q(**{f'{prefix}subject': subject})
+    if start is not None:
+        condition &= Q(**{f'{prefix}date__gte': start})
+    if end is not None:
+        condition &= Q(**{f'{prefix}date__lte': end})
+    return condition
+
+
+def class_summary(branch, semester, subject=None, start=None, end=None, ordering=None):
+    """
+    Present/absent/total/percentage for every student of a batch.
+
+    Packed days are read from the batch's ``ClassSession`` rows; days
+    after the last packed one are counted from the records in one grouped
+    query. That query also reports the last packed day it saw, and the
+    sessions are read up to it, so a day packed in between is not counted
+    twice. The subject and date bounds sit in the JOIN condition, so
+    students without matching records still appear with zero counts.
+    Without a subject every subject is counted; the ones the batch has
+    attendance in are read from its counters, so the (subject, date)
+    indexes still apply.
+    """
+    last_packed = ClassSession.objects.order_by('-date').values('date')[:1]
+    if subject is not None:
+        subjects = [subject]
+    else:
+        subjects = list(
+            AttendanceCounter.objects.filter(student__branch=branch, student__semester=semester)
+            .values_list('subject_id', flat=True).distinct()
+        )
+    condition = attendance_record_filter('attendance_records__', None, start, end) & Q(
+        attendance_records__subject__in=subjects,
+        attendance_records__date__gt=Coalesce(Subquery(last_packed), Value(date.min)),
+    )
+    rows = list(
+        Student.objects.in_batch(branch, semester)
+        .annotate(records=FilteredRelation('attendance_records', condition=condition))
+        .values('id', 'reg_no', 'name')
+        .annotate(
+            total=Count('records'),
+            present=Count('records', filter=Q(records__status='P')),
+            last_packed=Subquery(last_packed),
+        )
+    )
+
+    last = rows[0]['last_packed'] if rows else None
+    if last is not None and (start is None or start <= last):
+        sessions = ClassSession.objects.filter(
+            attendance_record_filter('', None, start, min(end or last, last)), subject__in=subjects,
+        ).values_list('student_ids', 'present')
+        totals, presents = Counter(), Counter()
+        for student_ids, present in sessions.iterator():
+            student_ids = packing.unpack_ids(bytes(student_ids))
+            totals.update(student_ids)
+            presents.update(compress(student_ids, packing.unpack_bits(bytes(present), len(student_ids))))
+        for row in rows:
+            row['total'] += totals[row['id']]
+            row['present'] += presents[row['id']]
+
+    summary = []
+    for row in rows:
+        total, present = row['total'], row['present']
+        summary.append({
+            'reg_no': row['reg_no'], 'name': row['name'], 'total': total, 'present': present,
+            'absent': total - present, 'percentage': present * 100 / total if total else 0.0,
+        })
+    fields = PERCENTAGE_ORDERING.get(ordering, ('reg_no',))
+    for field in reversed(fields):
+        summary.sort(key=itemgetter(field.lstrip('-')), reverse=field.startswith('-'))
+    return summary
+
+
+def attendance_rollups(bucket='day', group='subject', subject=None, branch=None,
+                       semester=None, start=None, end=None):
+    """
+    Present/total counts per subject (or per branch/semester batch) and bucket.
+
+    Reads the daily ``AttendanceRollup`` table only, summing days into
+    weeks or months in one grouped query, so the cost follows the number
+    of lecture days rather than the number of attendance records. Weeks
+    start on Monday; buckets are labelled by their first day.
+    """
+    rollups = AttendanceRollup.objects.all()
+    if subject is not None:
+        rollups = rollups.filter(subject=subject)
+    if branch is not None:
+        rollups = rollups.filter(subject__branch=branch)
+    if semester is not None:
+        rollups = rollups.filter(subject__semester=semester)
+    if start is not None:
+        rollups = rollups.filter(date__gte=start)
+    if end is not None:
+        rollups = rollups.filter(date__lte=end)
+
+    keys = ROLLUP_GROUPS[group]
+    return (
+        rollups.annotate(bucket=ROLLUP_BUCKETS[bucket])
+        .values(*keys, 'bucket')
+        .annotate(present=Sum('present'), total=Sum('total'))
+        .filter(total__gt=0)
+        .order_by(*keys, 'bucket')
+    )
+
+
+def classes_to_recover(present, total, threshold):
+    """
+    Consecutive classes a student has to attend to get back to ``threshold`` percent.
+
+    ``0`` when already there, ``None`` when no number of classes is enough
+    (a threshold of 100 after any absence).
+    """
+    threshold = Fraction(str(threshold)) / 100
+    if present >= threshold * total:
+        return 0
+    if threshold >= 1:
+        return None
+    # (present + n) / (total + n) >= threshold
+    return math.ceil((threshold * total - present) / (1 - threshold))
+
+
+def shortage_report(branch, semester, threshold):
+    """
+    Per-subject attendance of every student of a batch, flagging shortages.
+
+    Percentages come from the ``AttendanceCounter`` rows of the batch's
+    subjects, read for the whole batch in one query next to the subject
+    lookup. A student is short in a subject once it has held classes and
+    their percentage is below ``threshold``; ``classes_needed`` says how
+    many consecutive classes bring them back to it.
+    """
+    subjects = list(Subject.objects.filter(branch=branch, semester=semester).order_by('name').values('id', 'name'))
+    counters = (
+        Student.objects.in_batch(branch, semester)
+        .annotate(counter=FilteredRelation(
+            'attendance_counters',
+            condition=Q(attendance_counters__subject__in=[subject['id'] for subject in subjects]),
+        ))
+        .order_by('reg_no')
+        .values_list('reg_no', 'name', 'counter__subject', 'counter__present', 'counter__total')
+    )
+
+    students = {}
+    for reg_no, name, subject_id, present, total in counters:
+        counts = students.setdefault((reg_no, name), {})
+        if subject_id is not None:
+            counts[subject_id] = (present, total)
+
+    held = dict.fromkeys((subject['id'] for subject in subjects), 0)
+    rows = []
+    for (reg_no, name), counts in students.items():
+        attendance = []
+        for subject in subjects:
+            present, total = counts.get(subject['id'], (0, 0))
+            held[subject['id']] = max(held[subject['id']], total)
+            percentage = present * 100 / total if total else 0.0
+            attendance.append({
+                'subject': subject['id'], 'present': present, 'total': total,
+                'percentage': round(percentage, 2), 'short': bool(total) and percentage < threshold,
+                'classes_needed': classes_to_recover(present, total, threshold),
+            })
+        rows.append({
+            'reg_no': reg_no, 'name': name,
+            'short': any(entry['short'] for entry in attendance), 'subjects': attendance,
+        })
+
+    return {
+        'branch': int(branch),
+        'semester': int(semester),
+        'threshold': threshold,
+        'generated_at': timezone.now(),
+        'subjects': [{**subject, 'classes': held[subject['id']]} for subject in subjects],
+        'defaulters': sum(row['short'] for row in rows),
+        'students': rows,
+    }
+
+
+def cached_shortage_report(branch, semester, threshold=None, refresh=False):
+    """
+    :func:`shortage_report` through the cache, as left by ``precompute_shortage_reports``.
+
+    Reports are kept for ``SHORTAGE_REPORT_CACHE_TIMEOUT`` seconds and are
+    not retired by new attendance; ``generated_at`` tells how old one is
+    and ``refresh`` rebuilds it.
+    """
+    threshold = float(settings.ATTENDANCE_SHORTAGE_THRESHOLD if threshold is None else threshold)
+    key = SHORTAGE_CACHE_KEY.format(int(branch), int(semester), threshold)
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = shortage_report(branch, semester, threshold)
+        cache.set(key, report, settings.SHORTAGE_REPORT_CACHE_TIMEOUT)
+    return report
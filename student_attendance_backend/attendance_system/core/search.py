@@ -0,0 +1,75 @@
+import re
+from functools import reduce
+from operator import and_
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Student
+
+# FTS5 table kept in step with core_student by triggers (migration 0014).
+SEARCH_TABLE = 'core_student_search'
+# bm25 weights of reg_no, name and email: a registration number hit ranks
+# above a name hit, which ranks above a hit in the email address.
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+# Queries made of shorter terms (a first keystroke) match a large share of
+# the students; bm25 over all of them costs more than it tells, so they are
+# listed by name instead.
+RANKED_TERM_LENGTH = 2
+
+TERM = re.compile(r'\w+')
+
+
+def search_terms(query):
+    """The words of a search box entry; punctuation and FTS5 syntax are dropped."""
+    return TERM.findall(query)
+
+
+def match_expression(terms):
+    """An FTS5 query matching rows that have a word starting with each term."""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_students(query, limit=10, branch=None, semester=None):
+    """
+    Registration numbers of the students best matching ``query``, best first.
+
+    Every word of ``query`` must start a word of the student's reg_no,
+    name or email, so ``"ra ku"`` finds "Ravi Kumar". On SQLite the
+    ``core_student_search`` index answers this and ranks with bm25
+    (single letters are listed by name); elsewhere it falls back to a
+    ``LIKE`` scan ordered by name.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    if connection.vendor != 'sqlite':
+        students = Student.objects.filter(reduce(and_, (
+            Q(reg_no__istartswith=term) | Q(name__icontains=term) | Q(email__istartswith=term)
+            for term in terms
+        )))
+        if branch is not None:
+            students = students.filter(branch=branch)
+        if semester is not None:
+            students = students.filter(semester=semester)
+        return list(students.order_by('name').values_list('reg_no', flat=True)[:limit])
+
+    conditions, params = [f'{SEARCH_TABLE} MATCH %s'], [match_expression(terms)]
+    for column, value in (('branch_id', branch), ('semester', semester)):
+        if value is not None:
+            conditions.append(f'core_student.{column} = %s')
+            params.append(value)
+    if any(len(term) >= RANKED_TERM_LENGTH for term in terms):
+        order = f"bm25({SEARCH_TABLE}, {', '.join(map(str, SEARCH_WEIGHTS))})"
+    else:
+        order = 'core_student.name'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT core_student.reg_no FROM {SEARCH_TABLE} "
+            f"JOIN core_student ON core_student.id = {SEARCH_TABLE}.rowid "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {order} LIMIT %s",
+            [*params, limit],
+        )
+        return [reg_no for reg_no, in cursor.fetchall()]
@@ -1,6 +1,105 @@
+from functools import cached_property
+
 from rest_framework import serializers
-from django.conf import settings
-from .models import Branch, Subject, Student, Teacher, AttendanceRecord
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+from .ingest import _ArchivedDays
+from .jobs import JOB_KINDS
+from .models import Branch, Subject, Student, Teacher, AttendanceRecord, Job
+from .thumbnails import thumbnail_names
+
+
+def build_media_url(name, request=None):
+    """Return the (absolute, when a request is available) URL of a media file."""
+    if not name:
+        return None
+    url = default_storage.url(name)
+    if request:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def build_thumbnail_urls(digest, request=None):
+    """Return ``{size: {format: url}}`` for a profile picture hash, or ``None``."""
+    names = thumbnail_names(digest)
+    if names is None:
+        return None
+    return {
+        size: {fmt: build_media_url(name, request) for fmt, name in formats.items()}
+        for size, formats in names.items()
+    }
+
+
+# ------------------ Sparse fieldsets ------------------
+FIELDS_PARAM = 'fields'
+
+
+def requested_fields(request):
+    """Field names listed in ``?fields=a,b``, or ``None`` to keep every field."""
+    if request is None:
+        return None
+    value = request.GET.get(FIELDS_PARAM)
+    if not value:
+        return None
+    return frozenset(name.strip() for name in value.split(',') if name.strip())
+
+
+class SparseFieldsetMixin:
+    """
+    Let clients trim the output to ``?fields=reg_no,status``.
+
+    Only the representation is narrowed, and omitted fields are never
+    computed; input validation still sees every field. Unknown names are
+    ignored.
+    """
+
+    @cached_property
+    def sparse_fields(self):
+        return requested_fields(self.context.get('request'))
+
+    @property
+    def _readable_fields(self):
+        fields = self.sparse_fields
+        for field in super()._readable_fields:
+            if fields is None or field.field_name in fields:
+                yield field
+
+
+# ------------------ Row Serializers ------------------
+class RowSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer over ``QuerySet.values()`` rows.
+
+    Mirrors the output of a ModelSerializer for list responses without
+    instantiating model objects. Subclasses list the lookups they need in
+    ``value_fields`` and build each item in ``represent``; ``?fields=``
+    trims items as ``SparseFieldsetMixin`` does.
+    """
+    value_fields = ()
+    _datetime = serializers.DateTimeField()
+
+    @classmethod
+    def project(cls, queryset):
+        """Restrict a queryset to the values this serializer reads."""
+        return queryset.values(*cls.value_fields)
+
+    def format_datetime(self, value):
+        return self._datetime.to_representation(value) if value else None
+
+    @cached_property
+    def sparse_fields(self):
+        return requested_fields(self.context.get('request'))
+
+    def to_representation(self, row):
+        item = self.represent(row)
+        fields = self.sparse_fields
+        if fields is None:
+            return item
+        return {name: value for name, value in item.items() if name in fields}
+
+    def represent(self, row):
+        raise NotImplementedError
 
 
 # ------------------ Branch Serializer ------------------
@@ -13,7 +112,7 @@ class BranchSerializer(serializers.ModelSerializer):
 
 
 # ------------------ Subject Serializer ------------------
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for the Subject model, including branch name."""
     branch_name = serializers.ReadOnlyField(source='branch.name')
 
@@ -23,10 +122,11 @@ class SubjectSerializer(serializers.ModelSerializer):
 
 
 # ------------------ Student Serializer ------------------
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for the Student model with profile picture URL."""
     branch_name = serializers.ReadOnlyField(source='branch.name')
     profile_pic_url = serializers.SerializerMethodField()
+    profile_pic_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Student
@@ -39,6 +139,7 @@ class StudentSerializer(serializers.ModelSerializer):
             'email',
             'profile_pic',
             'profile_pic_url',
+            'profile_pic_thumbnails',
             'created_at',
             'updated_at',
         ]
@@ -51,14 +152,37 @@ class StudentSerializer(serializers.ModelSerializer):
 
     def get_profile_pic_url(self, obj):
         """Return an absolute URL for the student's profile picture."""
-        request = self.context.get('request')
-        if obj.profile_pic and hasattr(obj.profile_pic, 'url'):
-            if request:
-                return request.build_absolute_uri(obj.profile_pic.url)
-            else:
-                # Fallback without request context
-                return f"{settings.MEDIA_URL}{obj.profile_pic.name}"
-        return None
+        return build_media_url(obj.profile_pic.name, self.context.get('request'))
+
+    def get_profile_pic_thumbnails(self, obj):
+        """Return absolute URLs of the profile picture thumbnails by size and format."""
+        return build_thumbnail_urls(obj.profile_pic_hash, self.context.get('request'))
+
+
+class StudentRowSerializer(RowSerializer):
+    """Values-based equivalent of ``StudentSerializer`` for large rosters."""
+    value_fields = (
+        'reg_no', 'name', 'semester', 'branch', 'branch__name', 'email',
+        'profile_pic', 'profile_pic_hash', 'created_at', 'updated_at',
+    )
+
+    def represent(self, row):
+        pic_url = build_media_url(row['profile_pic'], self.context.get('request'))
+        return {
+            'reg_no': row['reg_no'],
+            'name': row['name'],
+            'semester': row['semester'],
+            'branch': row['branch'],
+            'branch_name': row['branch__name'],
+            'email': row['email'],
+            'profile_pic': pic_url,
+            'profile_pic_url': pic_url,
+            'profile_pic_thumbnails': build_thumbnail_urls(
+                row['profile_pic_hash'], self.context.get('request')
+            ),
+            'created_at': self.format_datetime(row['created_at']),
+            'updated_at': self.format_datetime(row['updated_at']),
+        }
 
 
 # ------------------ Teacher Serializer ------------------
@@ -84,7 +208,7 @@ class TeacherSerializer(serializers.ModelSerializer):
 
 
 # ------------------ Attendance Record Serializer ------------------
-class AttendanceRecordSerializer(serializers.ModelSerializer):
+class AttendanceRecordSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for AttendanceRecord.
     Uses student registration number as slug.
@@ -98,6 +222,7 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
     subject_name = serializers.ReadOnlyField(source='subject.name')
     reg_no = serializers.ReadOnlyField(source='student.reg_no')
     profile_pic_url = serializers.SerializerMethodField()
+    profile_pic_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = AttendanceRecord
@@ -111,15 +236,87 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
             'status',
             'timestamp',
             'profile_pic_url',
+            'profile_pic_thumbnails',
         ]
 
+    def validate_timestamp(self, value):
+        """Reject days of archived academic years, which the database refuses to store."""
+        if timezone.localdate(value) in _ArchivedDays():
+            raise serializers.ValidationError('This date is in an archived academic year.')
+        return value
+
     def get_profile_pic_url(self, obj):
         """Return an absolute URL for the student's profile picture."""
+        return build_media_url(obj.student.profile_pic.name, self.context.get('request'))
+
+    def get_profile_pic_thumbnails(self, obj):
+        """Return absolute URLs of the student's profile picture thumbnails."""
+        return build_thumbnail_urls(obj.student.profile_pic_hash, self.context.get('request'))
+
+
+class AttendanceRecordRowSerializer(RowSerializer):
+    """Values-based equivalent of ``AttendanceRecordSerializer`` for large lists."""
+    value_fields = (
+        'id', 'student__reg_no', 'student__name', 'student__profile_pic',
+        'student__profile_pic_hash', 'subject', 'subject__name', 'status', 'timestamp',
+    )
+
+    def represent(self, row):
+        return {
+            'id': row['id'],
+            'student': row['student__reg_no'],
+            'student_name': row['student__name'],
+            'reg_no': row['student__reg_no'],
+            'subject': row['subject'],
+            'subject_name': row['subject__name'],
+            'status': row['status'],
+            'timestamp': self.format_datetime(row['timestamp']),
+            'profile_pic_url': build_media_url(
+                row['student__profile_pic'], self.context.get('request')
+            ),
+            'profile_pic_thumbnails': build_thumbnail_urls(
+                row['student__profile_pic_hash'], self.context.get('request')
+            ),
+        }
+
+
+# ------------------ Job Serializer ------------------
+class JobSerializer(serializers.ModelSerializer):
+    """Submission and status of a background job; ``params`` are checked per kind."""
+    kind = serializers.ChoiceField(choices=list(JOB_KINDS))
+    params = serializers.JSONField(required=False, default=dict)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'kind',
+            'params',
+            'status',
+            'progress',
+            'message',
+            'download_url',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = ['status', 'progress', 'message', 'created_at', 'started_at', 'finished_at']
+
+    def validate(self, attrs):
+        params = attrs.get('params') or {}
+        if not isinstance(params, dict):
+            raise serializers.ValidationError({'params': ['Expected a JSON object.']})
+        try:
+            attrs['params'] = JOB_KINDS[attrs['kind']].validate(params)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'params': exc.detail})
+        return attrs
+
+    def get_download_url(self, obj):
+        """Return the absolute URL of the result file once the job succeeded."""
+        if obj.status != Job.SUCCEEDED or not obj.result:
+            return None
+        url = reverse('job-download', args=[obj.pk])
         request = self.context.get('request')
-        if obj.student.profile_pic and hasattr(obj.student.profile_pic, 'url'):
-            if request:
-                return request.build_absolute_uri(obj.student.profile_pic.url)
-            else:
-                # Fallback without request context
-                return f"{settings.MEDIA_URL}{obj.student.profile_pic.name}"
-        return None
\ No newline at end of file
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,92 @@
+import os
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from . import authentication, taps
+from .caching import invalidate
+from .models import TRACKED_FIELDS, ArchivedYear, Branch, Job, Subject, Student, Teacher, track_attendance_writes
+
+# Reference-data cache namespaces affected by a change to each model.
+# Branch and subject names are embedded in other payloads, so a rename
+# has to retire those caches too.
+CACHE_DEPENDENCIES = {
+    Branch: ('branches', 'subjects', 'students'),
+    Subject: ('subjects', 'teachers'),
+    Student: ('students',),
+    Teacher: ('teachers',),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_reference_cache(sender, **kwargs):
+    namespaces = CACHE_DEPENDENCIES.get(sender)
+    if namespaces:
+        invalidate(*namespaces)
+
+
+@receiver(m2m_changed, sender=Teacher.subjects.through)
+def invalidate_teacher_subjects(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate('teachers')
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_tap_students(sender, **kwargs):
+    # A save may have changed the reg_no, so the old key cannot be targeted.
+    taps.students.clear()
+
+
+@receiver(post_delete, sender=Subject)
+def invalidate_tap_subjects(sender, **kwargs):
+    taps.subjects.clear()
+
+
+@receiver(pre_delete, sender=Student)
+@receiver(pre_delete, sender=Subject)
+def untrack_cascaded_records(sender, instance, **kwargs):
+    # The cascade deletes records behind AttendanceRecordQuerySet.delete's
+    # back, so their removal is propagated here, archived years included.
+    # Archived records have no foreign key constraints, so nothing cascades
+    # to them; without the discard they would outlive their student or subject.
+    column = 'student_id' if sender is Student else 'subject_id'
+    track_attendance_writes(removed=[
+        row
+        for records in ArchivedYear.objects.record_sources()
+        for row in records.filter(**{column: instance.pk}).values_list(*TRACKED_FIELDS)
+    ])
+    ArchivedYear.objects.discard(column, instance.pk)
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+def invalidate_auth_teacher(sender, instance, **kwargs):
+    authentication.teachers.discard(instance.pk)
+
+
+@receiver(m2m_changed, sender=Teacher.subjects.through)
+def invalidate_auth_teacher_subjects(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Changed from the subject side; any teacher may be affected.
+        authentication.teachers.clear()
+    else:
+        authentication.teachers.discard(instance.pk)
+
+
+@receiver(post_delete, sender=Job)
+def delete_job_result(sender, instance, **kwargs):
+    if instance.result:
+        storage, name = instance.result.storage, instance.result.name
+        storage.delete(name)
+        # Results are saved as jobs/<id>/<file>; drop the emptied directory.
+        storage.delete(os.path.dirname(name))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def cache_blacklisted_token(sender, instance, **kwargs):
+    authentication.mark_blacklisted(instance.token.jti)
@@ -0,0 +1,29 @@
+from .models import AttendanceChange
+
+SYNC_PAGE_SIZE = 1000
+
+
+def changes_since(since, subject=None, limit=SYNC_PAGE_SIZE):
+    """
+    Collapse the change log after watermark ``since`` into its net effect.
+
+    Returns ``(watermark, has_more, upserted_ids, deleted_ids)``. At most
+    ``limit`` log entries are read per call; when ``has_more`` is set the
+    client continues from the returned watermark.
+    """
+    changes = AttendanceChange.objects.filter(id__gt=since)
+    if subject is not None:
+        changes = changes.filter(subject_id=subject)
+    entries = list(changes.order_by('id').values_list('id', 'record_id', 'op')[:limit + 1])
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for _, record_id, op in entries:
+        latest[record_id] = op
+    upserted = [pk for pk, op in latest.items() if op == AttendanceChange.UPSERT]
+    deleted = [pk for pk, op in latest.items() if op == AttendanceChange.DELETE]
+
+    watermark = entries[-1][0] if entries else since
+    return watermark, has_more, upserted, deleted
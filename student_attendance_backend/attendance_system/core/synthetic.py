@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    AttendanceChange,
+    AttendanceCounter,
+    AttendanceRecord,
+    AttendanceRollup,
+    Branch,
+    ClassSession,
+    Student,
+    Subject,
+    Teacher,
+)
+
+SCALES = {
+    'small': {'branches': 2, 'semesters': 2, 'students': 200, 'subjects': 8, 'days': 60, 'teachers': 4},
+    'medium': {'branches': 6, 'semesters': 4, 'students': 2000, 'subjects': 48, 'days': 180, 'teachers': 24},
+    'large': {'branches': 20, 'semesters': 8, 'students': 10000, 'subjects': 400, 'days': 3 * 365, 'teachers': 120},
+}
+
+TEACHER_PASSWORD = 'benchmark-pass'
+INSERT_BATCH_SIZE = 5000
+
+
+def generate(branches, semesters, students, subjects, days, teachers, seed=42, end=None, log=None):
+    """
+    Populate the database with a reproducible synthetic college.
+
+    Students and subjects are spread round-robin over the branch x semester
+    batches. Every subject holds one lecture each weekday of the ``days``
+    before ``end`` and each student of its batch is marked P or A according
+    to a per-student attendance rate, so the same seed always yields the
+    same data. Returns the number of attendance records written.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    end = end or timezone.localdate()
+    current_year = end.year
+
+    with transaction.atomic():
+        branch_objs = Branch.objects.bulk_create(
+            Branch(name=f'Branch {i + 1:02d}') for i in range(branches)
+        )
+        batches = [(branch, semester) for branch in branch_objs for semester in range(1, semesters + 1)]
+
+        subject_objs = Subject.objects.bulk_create(
+            Subject(
+                name=f'Subject {i + 1:03d}',
+                branch=batches[i % len(batches)][0],
+                semester=batches[i % len(batches)][1],
+                year=current_year,
+            )
+            for i in range(subjects)
+        )
+
+        student_objs = Student.objects.bulk_create(
+            (
+                Student(
+                    reg_no=f'SYN{i + 1:06d}',
+                    name=f'Student {i + 1:06d}',
+                    branch=batches[i % len(batches)][0],
+                    semester=batches[i % len(batches)][1],
+                    email=f'syn{i + 1:06d}@college.edu',
+                )
+                for i in range(students)
+            ),
+            batch_size=INSERT_BATCH_SIZE,
+        )
+
+        password = make_password(TEACHER_PASSWORD)
+        teacher_objs = Teacher.objects.bulk_create(
+            Teacher(username=f'teacher{i + 1:03d}', password=password, is_staff=True)
+            for i in range(teachers)
+        )
+        if teacher_objs:
+            Teacher.subjects.through.objects.bulk_create(
+                Teacher.subjects.through(
+                    teacher_id=teacher_objs[i % len(teacher_objs)].pk, subject_id=subject.pk
+                )
+                for i, subject in enumerate(subject_objs)
+            )
+    log(f"Created {branches} branches, {subjects} subjects, {students} students, {teachers} teachers.")
+
+    roster = {}
+    for student in student_objs:
+        roster.setdefault((student.branch_id, student.semester), []).append(student.pk)
+    rates = {student.pk: rng.uniform(0.55, 0.98) for student in student_objs}
+
+    lecture_days = [
+        end - timedelta(days=offset)
+        for offset in range(days - 1, -1, -1)
+        if (end - timedelta(days=offset)).weekday() < 5
+    ]
+
+    written = 0
+    pending = []
+    for day_index, day in enumerate(lecture_days):
+        for index, subject in enumerate(subject_objs):
+            timestamp = timezone.make_aware(datetime.combine(day, time(9 + index % 6)))
+            for student_id in roster.get((subject.branch_id, subject.semester), ()):
+                pending.append(AttendanceRecord(
+                    student_id=student_id,
+                    subject_id=subject.pk,
+                    status='P' if rng.random() < rates[student_id] else 'A',
+                    timestamp=timestamp,
+                    date=day,
+                ))
+            if len(pending) >= INSERT_BATCH_SIZE:
+                written += _write_records(pending)
+                pending = []
+        if day_index % 20 == 0:
+            log(f"{day}: {written} records")
+    if pending:
+        written += _write_records(pending)
+
+    AttendanceCounter.objects.rebuild()
+    AttendanceRollup.objects.rebuild()
+    ClassSession.objects.rebuild()
+    log(f"Wrote {written} attendance records.")
+    return written
+
+
+def _write_records(records):
+    """Insert records and log them for sync; counters and rollups are rebuilt once at the end."""
+    with transaction.atomic():
+        AttendanceRecord.objects.bulk_create(records)
+        AttendanceChange.objects.bulk_create(
+            AttendanceChange(record_id=record.pk, subject_id=record.subject_id, op=AttendanceChange.UPSERT)
+            for record in records
+        )
+    return len(records)
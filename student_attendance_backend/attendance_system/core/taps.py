@@ -0,0 +1,60 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .caching import LookupCache
+from .models import AttendanceRecord, Student, Subject, track_attendance_writes
+
+# Target for one tap measured inside the server (view entry to response),
+# against local SQLite with 8 concurrent tappers. ``bench_taps`` reports
+# the observed percentiles against these.
+TAP_LATENCY_TARGET_MS = {'p50': 5, 'p99': 25}
+
+
+def _load_student(reg_no):
+    return Student.objects.filter(reg_no=reg_no).values_list('id', 'name').first()
+
+
+def _load_subject(subject_id):
+    try:
+        subject_id = int(subject_id)
+    except (TypeError, ValueError):
+        return None
+    return Subject.objects.filter(pk=subject_id).values_list('id', flat=True).first()
+
+
+# reg_no -> (student_id, name) and subject id -> subject id
+students = LookupCache(_load_student)
+subjects = LookupCache(_load_subject)
+
+
+def flip_attendance(student_id, subject_id, now=None):
+    """
+    Toggle today's attendance for a student in one write transaction.
+
+    Deletes today's entries with ``DELETE ... RETURNING`` and, only when
+    nothing was there, inserts a present record. Returns the new record,
+    or ``None`` when the student was marked absent again.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    table = connection.ops.quote_name(AttendanceRecord._meta.db_table)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE student_id = %s AND subject_id = %s AND date = %s "
+                f"RETURNING id, student_id, subject_id, status",
+                [student_id, subject_id, connection.ops.adapt_datefield_value(today)],
+            )
+            removed = [(*row[:3], today, row[3]) for row in cursor.fetchall()]
+
+        if removed:
+            track_attendance_writes(removed=removed)
+            return None
+
+        record = AttendanceRecord(
+            student_id=student_id, subject_id=subject_id, status='P', timestamp=now, date=today
+        )
+        AttendanceRecord.objects.bulk_create([record])
+        track_attendance_writes(added=[record.tracked_state()])
+        return record
@@ -1,3 +1,1718 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+from unittest import mock
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from . import authentication, jobs, packing, reports, search, synthetic, taps, thumbnails
+from .benchmarks import compare
+from .ingest import ingest_attendance
+from .instrumentation import RequestStats, report_problems
+from .writes import WriteCoordinator, _Job
+from .models import (
+    Branch, Subject, Student, Teacher, AttendanceRecord, AttendanceCounter, AttendanceRollup, ArchivedYear,
+    ClassSession, Job, archive_model,
+)
+
+
+class AttendanceFixture:
+    """Shared fixture: one branch, two subjects and a small class."""
+
+    class_size = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Branch.objects.create(name='CSE')
+        cls.subject = Subject.objects.create(name='DBMS', branch=cls.branch, semester=3)
+        cls.other_subject = Subject.objects.create(name='OS', branch=cls.branch, semester=3)
+        cls.students = [
+            Student.objects.create(
+                reg_no=f'CS{i:03d}',
+                name=f'Student {i}',
+                semester=3,
+                branch=cls.branch,
+                email=f'cs{i:03d}@college.edu',
+            )
+            for i in range(cls.class_size)
+        ]
+        cls.teacher = Teacher.objects.create_user(
+            username='teacher', password='secret-pass', is_staff=True
+        )
+        cls.teacher.subjects.add(cls.subject)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.teacher)
+
+
+class AttendanceAPITestCase(AttendanceFixture, APITestCase):
+    pass
+
+
+class AttendanceAPITransactionTestCase(AttendanceFixture, APITransactionTestCase):
+    """The shared fixture, committed, for code that reads it on connections of its own."""
+
+    def setUp(self):
+        self.setUpTestData()
+        super().setUp()
+
+
+# ---------------- Bulk ingestion ----------------
+class BulkAttendanceTests(AttendanceAPITestCase):
+    class_size = 40
+
+    def _rows(self, status_val='P'):
+        timestamp = timezone.make_aware(datetime(2025, 8, 1, 9, 30))
+        return [
+            {
+                'student': student.reg_no,
+                'subject': self.subject.pk,
+                'status': status_val,
+                'timestamp': timestamp.isoformat(),
+            }
+            for student in self.students
+        ]
+
+    def test_bulk_uses_constant_queries(self):
+        def queries(rows):
+            AttendanceRecord.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post('/api/attendance/bulk/', rows, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(response.data['count'], len(rows))
+            return len(ctx.captured_queries)
+
+        rows = self._rows()
+        few = queries(rows[:5])
+        self.assertEqual(queries(rows), few)
+        self.assertEqual(AttendanceRecord.objects.count(), self.class_size)
+        # The rows are for a day of a closed academic year, so its packed
+        # sessions and the archived years are read too.
+        self.assertLess(few, 12)
+
+    def test_bulk_queries_grow_per_chunk_only(self):
+        def queries(rows):
+            AttendanceRecord.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(ingest_attendance(rows, chunk_size=10), len(rows))
+            return len(ctx.captured_queries)
+
+        rows = self._rows()
+        one, two, four = queries(rows[:10]), queries(rows[:20]), queries(rows)
+        per_chunk = two - one
+        # Resolving reg_nos and subjects, reading the rows about to be
+        # overwritten, the upsert, the counter and rollup upserts, reading
+        # the day's sessions (none are packed) and logging the changes.
+        self.assertEqual(per_chunk, 8)
+        self.assertEqual(four, two + 2 * per_chunk)
+
+    def test_bulk_keeps_client_timestamp_and_upserts(self):
+        self.client.post('/api/attendance/bulk/', self._rows('P'), format='json')
+        response = self.client.post('/api/attendance/bulk/', self._rows('A'), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(AttendanceRecord.objects.count(), self.class_size)
+        self.assertFalse(AttendanceRecord.objects.filter(status='P').exists())
+        record = AttendanceRecord.objects.first()
+        self.assertEqual(timezone.localtime(record.timestamp).hour, 9)
+
+    def test_bulk_reports_row_errors_and_writes_nothing(self):
+        rows = self._rows()
+        rows[3]['student'] = 'NOPE'
+        rows[7]['status'] = 'X'
+        rows[9]['status'] = ['P']
+        rows[11]['subject'] = [self.subject.pk]
+        response = self.client.post('/api/attendance/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([err['row'] for err in response.data['rows']], [3, 7, 9, 11])
+        self.assertIn('student', response.data['rows'][0]['errors'])
+        self.assertIn('status', response.data['rows'][1]['errors'])
+        self.assertIn('status', response.data['rows'][2]['errors'])
+        self.assertIn('subject', response.data['rows'][3]['errors'])
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_bulk_accepts_ndjson_stream(self):
+        body = '\n'.join(json.dumps(row) for row in self._rows()) + '\n'
+        response = self.client.post(
+            '/api/attendance/bulk/', body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(AttendanceRecord.objects.count(), self.class_size)
+
+    def test_bulk_rejects_non_list(self):
+        response = self.client.post('/api/attendance/bulk/', {'student': 'CS000'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+# ---------------- Read query counts ----------------
+class ListQueryCountTests(AttendanceAPITestCase):
+    class_size = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        AttendanceRecord.objects.bulk_create(
+            AttendanceRecord(
+                student=student, subject=cls.subject, status='P', date=timezone.localdate()
+            )
+            for student in cls.students
+        )
+
+    def test_attendance_list_is_constant(self):
+        # One COUNT for the paginator plus one joined SELECT for the page.
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/attendance/')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['subject_name'], 'DBMS')
+
+    def test_fast_rows_match_model_serializer(self):
+        regular = self.client.get('/api/attendance/').data['results']
+        with self.assertNumQueries(2):
+            fast = self.client.get('/api/attendance/?fast=true').data['results']
+        self.assertEqual([dict(row) for row in regular], fast)
+
+    def test_student_roster_is_constant(self):
+        # django-filter validates the branch choice, then COUNT and SELECT.
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/students/?branch={self.branch.pk}&semester=3')
+        self.assertEqual(response.data['results'][0]['branch_name'], 'CSE')
+        fast = self.client.get(f'/api/students/?branch={self.branch.pk}&semester=3&fast=1')
+        self.assertEqual(
+            [dict(row) for row in response.data['results']], fast.data['results']
+        )
+
+    def test_teacher_list_prefetches_subjects(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/teachers/')
+        self.assertEqual(response.data['results'][0]['subject_names'], ['DBMS'])
+
+
+# ---------------- Payloads ----------------
+class PayloadTests(AttendanceAPITestCase):
+    class_size = 25
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for student in cls.students:
+            AttendanceRecord.objects.create(student=student, subject=cls.subject, status='P')
+
+    def test_renderer_matches_stock_json(self):
+        for url in ('/api/attendance/', '/api/students/?fast=1', '/api/attendance/rollups/?bucket=month'):
+            response = self.client.get(url)
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_parser_errors(self):
+        response = self.client.post(
+            '/api/attendance/bulk/', b'[{"student": ', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.data['detail'])
+
+    def test_gzip_negotiated_for_large_responses(self):
+        plain = self.client.get('/api/attendance/?fast=true')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        compressed = self.client.get('/api/attendance/?fast=true', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content), len(plain.content))
+
+        small = self.client.get('/api/branches/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_weak_etag_revalidates(self):
+        etag = self.client.get('/api/students/')['ETag']
+        response = self.client.get('/api/students/', HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_sparse_fieldsets(self):
+        for url in ('/api/attendance/?fields=reg_no,status', '/api/attendance/?fields=reg_no,status&fast=1'):
+            rows = self.client.get(url).data['results']
+            self.assertEqual(len(rows), 20)
+            self.assertEqual([list(row) for row in rows[:2]], [['reg_no', 'status']] * 2)
+
+        rows = self.client.get('/api/students/?fields=reg_no,bogus&fast=1').data['results']
+        self.assertEqual(rows[0], {'reg_no': 'CS000'})
+        self.assertEqual(
+            self.client.get(f'/api/subjects/{self.subject.pk}/?fields=name').data, {'name': 'DBMS'}
+        )
+
+        # Input still validates every field.
+        response = self.client.post('/api/attendance/?fields=id', {
+            'student': 'CS000', 'subject': self.other_subject.pk, 'status': 'P',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(response.data), {'id'})
+
+
+# ---------------- Thumbnails ----------------
+class ThumbnailTests(AttendanceAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def upload(self, student, color='red', size=(600, 400), mode='RGB'):
+        buffer = BytesIO()
+        Image.new(mode, size, color).save(buffer, 'PNG')
+        student.profile_pic = SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+        student.save()
+        return buffer.getvalue()
+
+    def test_upload_creates_hashed_derivatives(self):
+        student = self.students[0]
+        data = self.upload(student, mode='RGBA', color=(0, 0, 255, 128))
+        student.refresh_from_db()
+        self.assertEqual(student.profile_pic_hash, thumbnails.content_hash(data))
+        for size, edge in thumbnails.THUMBNAIL_SIZES.items():
+            for fmt in thumbnails.THUMBNAIL_FORMATS:
+                name = thumbnails.thumbnail_name(student.profile_pic_hash, size, fmt)
+                with default_storage.open(name) as thumb, Image.open(thumb) as image:
+                    self.assertEqual(image.size, (edge, edge))
+                    self.assertEqual(image.format, fmt.upper())
+        # The original is stored whole next to its derivatives.
+        self.assertEqual(default_storage.open(student.profile_pic.name).read(), data)
+
+        self.upload(student, color='green')
+        student.refresh_from_db()
+        self.assertNotEqual(student.profile_pic_hash, thumbnails.content_hash(data))
+        student.profile_pic = None
+        student.save()
+        self.assertEqual(Student.objects.get(pk=student.pk).profile_pic_hash, '')
+
+    def test_serializers_expose_each_size(self):
+        self.upload(self.students[0])
+        AttendanceRecord.objects.create(student=self.students[0], subject=self.subject, status='P')
+        digest = Student.objects.get(pk=self.students[0].pk).profile_pic_hash
+
+        roster = self.client.get(f'/api/students/?branch={self.branch.pk}&semester=3').data['results']
+        fast = self.client.get(f'/api/students/?branch={self.branch.pk}&semester=3&fast=1').data['results']
+        self.assertEqual([dict(row) for row in roster], fast)
+        rows = {row['reg_no']: row for row in fast}
+        self.assertIsNone(rows['CS001']['profile_pic_thumbnails'])
+        urls = rows['CS000']['profile_pic_thumbnails']
+        self.assertEqual(set(urls), set(thumbnails.THUMBNAIL_SIZES))
+        self.assertEqual(
+            urls['small']['webp'], f'http://testserver/media/students/thumbs/{digest}-64.webp'
+        )
+
+        record = self.client.get('/api/attendance/?fast=true').data['results'][0]
+        self.assertEqual(record['profile_pic_thumbnails'], urls)
+
+    def test_thumbnails_are_served_cacheable(self):
+        self.upload(self.students[0])
+        digest = Student.objects.get(pk=self.students[0].pk).profile_pic_hash
+        response = self.client.get(f'/media/students/thumbs/{digest}-128.webp')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], thumbnails.IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(self.client.get('/media/students/thumbs/missing-64.webp').status_code, 404)
+
+    def test_backfill_command(self):
+        self.upload(self.students[0])
+        self.upload(self.students[1], color='blue')
+        digest = Student.objects.get(pk=self.students[0].pk).profile_pic_hash
+        shutil.rmtree(default_storage.path(thumbnails.THUMBNAIL_DIR))
+        Student.objects.update(profile_pic_hash='')
+
+        out = StringIO()
+        call_command('generate_thumbnails', '--workers', '2', stdout=out)
+        self.assertIn('2 updated, 0 failed', out.getvalue())
+        self.assertEqual(Student.objects.get(pk=self.students[0].pk).profile_pic_hash, digest)
+        self.assertTrue(default_storage.exists(thumbnails.thumbnail_name(digest, 'large', 'jpeg')))
+
+
+# ---------------- Date column ----------------
+class AttendanceDateTests(AttendanceAPITestCase):
+
+    def test_toggle_flips_todays_record(self):
+        payload = {'reg_no': 'CS001', 'subject_id': self.subject.pk}
+        response = self.client.post('/api/attendance/toggle/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        record = AttendanceRecord.objects.get()
+        self.assertEqual(record.date, timezone.localdate())
+
+        response = self.client.post('/api/attendance/toggle/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_date_filter_uses_index(self):
+        queryset = AttendanceRecord.objects.filter(
+            student=self.students[0], subject=self.subject, date=timezone.localdate()
+        ).order_by()
+        self.assertIn('attendance_student_subj_date', queryset.explain())
+
+    def test_date_follows_local_timezone(self):
+        # 20:00 UTC is already the next day in Asia/Kolkata.
+        timestamp = datetime(2025, 8, 1, 20, 0, tzinfo=dt_timezone.utc)
+        record = AttendanceRecord.objects.create(
+            student=self.students[0], subject=self.subject, timestamp=timestamp
+        )
+        self.assertEqual(str(record.date), '2025-08-02')
+        response = self.client.get('/api/attendance/?date=2025-08-02')
+        self.assertEqual(response.data['count'], 1)
+
+
+# ---------------- Counters ----------------
+class AttendanceCounterTests(AttendanceAPITestCase):
+
+    def assertCountersConsistent(self):
+        self.assertEqual(AttendanceCounter.objects.mismatches(), [])
+        self.assertEqual(AttendanceRollup.objects.mismatches(), [])
+        self.assertEqual(ClassSession.objects.mismatches(), [])
+
+    def test_every_write_path_keeps_counters_in_step(self):
+        student = self.students[0]
+        self.client.post(
+            '/api/attendance/toggle/',
+            {'reg_no': student.reg_no, 'subject_id': self.subject.pk},
+            format='json',
+        )
+        self.assertCountersConsistent()
+
+        rows = [
+            {'student': student.reg_no, 'subject': self.subject.pk, 'status': 'A',
+             'timestamp': '2025-08-01T09:00:00+05:30'},
+            {'student': student.reg_no, 'subject': self.subject.pk, 'status': 'P',
+             'timestamp': '2025-08-01T09:00:00+05:30'},
+            {'student': student.reg_no, 'subject': self.other_subject.pk, 'status': 'P'},
+        ]
+        self.client.post('/api/attendance/bulk/', rows, format='json')
+        self.client.post('/api/attendance/bulk/', rows[:1], format='json')
+        self.assertCountersConsistent()
+
+        self.client.put('/api/attendance/update/', {
+            'reg_no': student.reg_no, 'subject_id': self.subject.pk,
+            'status': 'P', 'timestamp': '2025-08-01T09:00:00+05:30',
+        }, format='json')
+        self.assertCountersConsistent()
+
+        record = AttendanceRecord.objects.filter(subject=self.other_subject).get()
+        self.client.patch(f'/api/attendance/{record.pk}/', {'status': 'A'}, format='json')
+        self.assertCountersConsistent()
+        self.client.delete(f'/api/attendance/{record.pk}/')
+        self.assertCountersConsistent()
+
+        self.client.post(
+            '/api/attendance/toggle/',
+            {'reg_no': student.reg_no, 'subject_id': self.subject.pk},
+            format='json',
+        )
+        self.assertCountersConsistent()
+
+    def test_summary_reads_counters(self):
+        student = self.students[1]
+        for day, status_val in enumerate('PPA', start=1):
+            AttendanceRecord.objects.create(
+                student=student, subject=self.subject, status=status_val,
+                timestamp=timezone.make_aware(datetime(2025, 8, day, 10)),
+            )
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f'/api/students/{student.reg_no}/attendance_summary/?subject={self.subject.pk}'
+            )
+        self.assertEqual(response.data['present'], 2)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['percentage'], 66.67)
+
+        response = self.client.get(f'/api/attendance/student-summary/?reg_no={student.reg_no}')
+        self.assertEqual(response.data['attendance_summary']['absent'], 1)
+
+    def test_rebuild_command_repairs_drift(self):
+        AttendanceRecord.objects.create(student=self.students[0], subject=self.subject, status='P')
+        AttendanceCounter.objects.update(present=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_attendance_counters', '--verify', stdout=StringIO())
+        call_command('rebuild_attendance_counters', stdout=StringIO())
+        self.assertCountersConsistent()
+
+
+# ---------------- Class summary ----------------
+class ClassSummaryTests(AttendanceAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for day, (status_a, status_b) in enumerate(['PP', 'PA', 'AA'], start=1):
+            timestamp = timezone.make_aware(datetime(2025, 8, day, 10))
+            AttendanceRecord.objects.create(
+                student=cls.students[0], subject=cls.subject, status=status_a, timestamp=timestamp
+            )
+            AttendanceRecord.objects.create(
+                student=cls.students[1], subject=cls.subject, status=status_b, timestamp=timestamp
+            )
+        AttendanceRecord.objects.create(student=cls.students[2], subject=cls.other_subject, status='P')
+
+    def test_single_query_with_students_lacking_records(self):
+        url = f'/api/attendance/class-summary/?subject={self.subject.pk}&ordering=-percentage'
+        # One lookup for the subject, one grouped query for the batch.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['students']
+        self.assertEqual(len(rows), self.class_size)
+        self.assertEqual(rows[0]['reg_no'], 'CS000')
+        self.assertEqual((rows[0]['present'], rows[0]['total'], rows[0]['percentage']), (2, 3, 66.67))
+        self.assertEqual((rows[1]['present'], rows[1]['absent']), (1, 2))
+        self.assertEqual([row['total'] for row in rows[2:]], [0, 0, 0])
+
+    def test_date_range_and_branch_semester(self):
+        response = self.client.get(
+            f'/api/attendance/class-summary/?branch={self.branch.pk}&semester=3'
+            f'&start_date=2025-08-02&end_date=2025-08-02'
+        )
+        rows = {row['reg_no']: row for row in response.data['students']}
+        self.assertEqual(rows['CS000']['total'], 1)
+        self.assertEqual(rows['CS001']['present'], 0)
+        self.assertEqual(rows['CS002']['total'], 0)
+
+    def test_requires_batch(self):
+        response = self.client.get('/api/attendance/class-summary/?semester=3')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/attendance/class-summary/?branch=1&semester=3&start_date=nope')
+        self.assertEqual(response.status_code, 400)
+        for query in ('branch=abc&semester=3', 'branch=1&semester=x', 'subject=abc'):
+            response = self.client.get(f'/api/attendance/class-summary/?{query}')
+            self.assertEqual(response.status_code, 400)
+
+
+# ---------------- Shortage report ----------------
+class ShortageReportTests(AttendanceAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for day, (status_a, status_b) in enumerate(['PP', 'PA', 'AA', 'PP'], start=1):
+            timestamp = timezone.make_aware(datetime(2025, 8, day, 10))
+            AttendanceRecord.objects.create(
+                student=cls.students[0], subject=cls.subject, status=status_a, timestamp=timestamp
+            )
+            AttendanceRecord.objects.create(
+                student=cls.students[1], subject=cls.subject, status=status_b, timestamp=timestamp
+            )
+        AttendanceRecord.objects.create(student=cls.students[2], subject=cls.other_subject, status='P')
+
+    def get_report(self, query=''):
+        response = self.client.get(f'/api/attendance/shortage/?branch={self.branch.pk}&semester=3{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_flags_students_below_threshold(self):
+        # One lookup for the subjects, one query for every counter of the batch.
+        with self.assertNumQueries(2):
+            report = self.get_report()
+        self.assertEqual(report['threshold'], 75.0)
+        self.assertEqual(
+            [(subject['name'], subject['classes']) for subject in report['subjects']], [('DBMS', 4), ('OS', 1)]
+        )
+        rows = {row['reg_no']: row for row in report['students']}
+        self.assertEqual(len(rows), self.class_size)
+        self.assertEqual(report['defaulters'], 1)
+
+        dbms, os_ = rows['CS000']['subjects']
+        self.assertEqual((dbms['present'], dbms['total'], dbms['percentage']), (3, 4, 75.0))
+        self.assertFalse(rows['CS000']['short'])
+        dbms = rows['CS001']['subjects'][0]
+        self.assertEqual((dbms['percentage'], dbms['short'], dbms['classes_needed']), (50.0, True, 4))
+        self.assertTrue(rows['CS001']['short'])
+        # No classes held yet is not a shortage.
+        self.assertEqual((os_['total'], os_['short'], os_['classes_needed']), (0, False, 0))
+
+    def test_threshold_and_short_filter(self):
+        report = self.get_report('&threshold=80&short=true')
+        self.assertEqual([row['reg_no'] for row in report['students']], ['CS000', 'CS001'])
+        self.assertEqual(report['students'][0]['subjects'][0]['classes_needed'], 1)
+        self.assertEqual(self.client.get(
+            f'/api/attendance/shortage/?branch={self.branch.pk}&semester=3&threshold=120'
+        ).status_code, 400)
+        self.assertEqual(self.client.get('/api/attendance/shortage/?semester=3').status_code, 400)
+
+    def test_precomputed_report_is_served_from_cache(self):
+        call_command('precompute_shortage_reports', stdout=StringIO(), stderr=StringIO())
+        with self.assertNumQueries(0):
+            report = self.get_report()
+        AttendanceRecord.objects.create(student=self.students[1], subject=self.subject, status='P')
+        self.assertEqual(self.get_report()['generated_at'], report['generated_at'])
+        dbms = self.get_report('&refresh=true')['students'][1]['subjects'][0]
+        self.assertEqual((dbms['present'], dbms['total']), (3, 5))
+
+    def test_classes_to_recover(self):
+        self.assertEqual(reports.classes_to_recover(6, 10, 75), 6)
+        self.assertEqual(reports.classes_to_recover(0, 1, 75), 3)
+        self.assertEqual(reports.classes_to_recover(3, 4, 75), 0)
+        self.assertEqual(reports.classes_to_recover(2, 3, 66.67), 1)
+        self.assertIsNone(reports.classes_to_recover(9, 10, 100))
+
+
+# ---------------- Student search ----------------
+class StudentSearchTests(AttendanceAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        other = Branch.objects.create(name='ECE')
+        for reg_no, name, branch in [
+            ('EC100', 'Ravi Kumar', other), ('EC101', 'Kumari Devi', other), ('CS900', 'Rávi Shankar', cls.branch),
+        ]:
+            Student.objects.create(
+                reg_no=reg_no, name=name, semester=3, branch=branch, email=f'{reg_no.lower()}@college.edu',
+            )
+
+    def search(self, query):
+        response = self.client.get(f'/api/students/search/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['reg_no'] for row in response.data['results']]
+
+    def test_prefix_matching_and_ranking(self):
+        # Ranked search, then one query for the matching rows.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.search('q=ra+ku'), ['EC100'])
+        # Diacritics are folded: "ravi" also finds "Rávi".
+        self.assertEqual(sorted(self.search('q=ravi')), ['CS900', 'EC100'])
+        self.assertEqual(len(self.search('q=cs0')), self.class_size)
+        # A reg_no hit outranks a name hit.
+        Student.objects.create(reg_no='KUM01', name='Zed', semester=3, branch=self.branch, email='z@college.edu')
+        self.assertEqual(self.search('q=kum')[0], 'KUM01')
+
+    def test_filters_limit_and_fields(self):
+        self.assertEqual(self.search(f'q=ravi&branch={self.branch.pk}'), ['CS900'])
+        self.assertEqual(len(self.search('q=college&limit=3')), 3)
+        response = self.client.get('/api/students/search/?q=EC101&fields=reg_no,name')
+        self.assertEqual(response.data['results'], [{'reg_no': 'EC101', 'name': 'Kumari Devi'}])
+
+    def test_index_follows_student_writes(self):
+        student = self.students[0]
+        student.name = 'Meera Iyer'
+        student.save()
+        self.assertEqual(self.search('q=meera'), [student.reg_no])
+        self.assertNotIn(student.reg_no, self.search('q=student+0'))
+        Student.objects.filter(pk=student.pk).update(reg_no='XY777')
+        self.assertEqual(self.search('q=xy7'), ['XY777'])
+        Student.objects.filter(pk=student.pk).delete()
+        self.assertEqual(self.search('q=meera'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('q=ravi"+OR+NEAR(*'), self.search('q=ravi+or+near'))
+        self.assertEqual(self.search('q=***'), [])
+        self.assertEqual(search.match_expression(search.search_terms('o\'brien')), '"o"* "brien"*')
+        self.assertEqual(self.client.get('/api/students/search/?q=+').status_code, 400)
+        self.assertEqual(self.client.get('/api/students/search/?q=a&limit=x').status_code, 400)
+
+
+# ---------------- Rollups ----------------
+class RollupTests(AttendanceAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Mon 4 Aug, Wed 6 Aug, Mon 11 Aug and Mon 1 Sep 2025
+        for month, day in ((8, 4), (8, 6), (8, 11), (9, 1)):
+            timestamp = timezone.make_aware(datetime(2025, month, day, 10))
+            for index, student in enumerate(cls.students[:2]):
+                AttendanceRecord.objects.create(
+                    student=student, subject=cls.subject,
+                    status='P' if index == 0 or day == 6 else 'A', timestamp=timestamp,
+                )
+        AttendanceRecord.objects.create(
+            student=cls.students[0], subject=cls.other_subject, status='P',
+            timestamp=timezone.make_aware(datetime(2025, 8, 5, 10)),
+        )
+
+    def series(self, query):
+        response = self.client.get(f'/api/attendance/rollups/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [
+            (row.get('subject', row.get('branch')), str(row['bucket']), row['present'], row['total'])
+            for row in response.data['series']
+        ]
+
+    def test_buckets_without_reading_records(self):
+        with CaptureQueriesContext(connection) as queries:
+            weekly = self.series(f'bucket=week&subject={self.subject.pk}')
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn(AttendanceRecord._meta.db_table, queries[0]['sql'])
+        self.assertEqual(weekly, [
+            (self.subject.pk, '2025-08-04', 3, 4),
+            (self.subject.pk, '2025-08-11', 1, 2),
+            (self.subject.pk, '2025-09-01', 1, 2),
+        ])
+        self.assertEqual(self.series(f'bucket=month&branch={self.branch.pk}&semester=3'), [
+            (self.subject.pk, '2025-08-01', 4, 6),
+            (self.subject.pk, '2025-09-01', 1, 2),
+            (self.other_subject.pk, '2025-08-01', 1, 1),
+        ])
+        self.assertEqual(
+            self.series('bucket=day&group=batch&start_date=2025-08-05&end_date=2025-08-06'),
+            [(self.branch.pk, '2025-08-05', 1, 1), (self.branch.pk, '2025-08-06', 2, 2)],
+        )
+
+    def test_writes_update_rollups_incrementally(self):
+        AttendanceRecord.objects.filter(date='2025-08-06').delete()
+        self.client.post('/api/attendance/corrections/', [
+            {'reg_no': 'CS001', 'subject': self.subject.pk, 'date': '2025-08-11', 'status': 'P'},
+        ], format='json')
+        self.assertEqual(AttendanceRollup.objects.mismatches(), [])
+        self.assertEqual(self.series(f'bucket=week&subject={self.subject.pk}')[:2], [
+            (self.subject.pk, '2025-08-04', 1, 2),
+            (self.subject.pk, '2025-08-11', 2, 2),
+        ])
+
+    def test_deleting_a_student_or_subject_updates_rollups(self):
+        self.students[1].delete()
+        self.assertEqual(AttendanceRollup.objects.mismatches(), [])
+        self.assertEqual(self.series(f'bucket=week&subject={self.subject.pk}'), [
+            (self.subject.pk, '2025-08-04', 2, 2),
+            (self.subject.pk, '2025-08-11', 1, 1),
+            (self.subject.pk, '2025-09-01', 1, 1),
+        ])
+        self.other_subject.delete()
+        self.assertEqual(AttendanceRollup.objects.mismatches(), [])
+        self.assertEqual(AttendanceCounter.objects.mismatches(), [])
+
+    def test_rebuild_command_and_validation(self):
+        AttendanceRollup.objects.update(present=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_attendance_rollups', '--verify', stdout=StringIO())
+        call_command('rebuild_attendance_rollups', stdout=StringIO())
+        self.assertEqual(AttendanceRollup.objects.mismatches(), [])
+
+        self.assertEqual(self.client.get('/api/attendance/rollups/?bucket=year').status_code, 400)
+        self.assertEqual(self.client.get('/api/attendance/rollups/?subject=x').status_code, 400)
+
+
+# ---------------- Class sessions ----------------
+class ClassSessionTests(AttendanceAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for day, statuses in ((4, 'PAP'), (5, 'PPA')):
+            timestamp = timezone.make_aware(datetime(2025, 8, day, 10))
+            for student, status in zip(cls.students, statuses):
+                AttendanceRecord.objects.create(
+                    student=student, subject=cls.subject, status=status, timestamp=timestamp
+                )
+        # A second lecture on the 5th for the first student.
+        AttendanceRecord.objects.create(
+            student=cls.students[0], subject=cls.subject, status='A',
+            timestamp=timezone.make_aware(datetime(2025, 8, 5, 14)),
+        )
+        AttendanceRecord.objects.create(student=cls.students[3], subject=cls.subject, status='P')
+
+    def summary(self, **kwargs):
+        return {
+            row['reg_no']: (row['present'], row['total'])
+            for row in reports.class_summary(self.branch.pk, 3, **kwargs)
+        }
+
+    def test_pack_round_trip(self):
+        entries = {7: 'P', 3: 'A', 2**32 - 1: 'P', **{i: 'AP'[i % 2] for i in range(10, 30)}}
+        student_ids, present = packing.pack(entries)
+        self.assertEqual(len(student_ids), 4 * len(entries))
+        self.assertEqual(len(present), 3)
+        self.assertEqual(packing.unpack(student_ids, present), entries)
+        self.assertEqual(packing.unpack(*packing.pack({})), {})
+
+    def test_packs_past_days_into_periods(self):
+        before = self.summary()
+        call_command('pack_class_sessions', stdout=StringIO())
+        sessions = ClassSession.objects.order_by('date', 'period')
+        self.assertEqual(
+            [(str(session.date), session.period, len(session.attendance)) for session in sessions],
+            [('2025-08-04', 1, 3), ('2025-08-05', 1, 3), ('2025-08-05', 2, 1)],
+        )
+        self.assertEqual(sessions[0].attendance, {
+            self.students[0].pk: 'P', self.students[1].pk: 'A', self.students[2].pk: 'P',
+        })
+        # Today is still read from the records.
+        self.assertEqual(self.summary(), before)
+        self.assertEqual(self.summary()['CS000'], (2, 3))
+        self.assertEqual(self.summary()['CS003'], (1, 1))
+        day = datetime(2025, 8, 5).date()
+        self.assertEqual(self.summary(start=day, end=day)['CS000'], (1, 2))
+        # The records after the last packed day, then the sessions.
+        with self.assertNumQueries(2):
+            self.summary(subject=self.subject)
+
+    def test_writes_to_packed_days_update_sessions(self):
+        ClassSession.objects.rebuild()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                '/api/attendance/tap/', {'reg_no': 'CS004', 'subject_id': self.subject.pk}, format='json'
+            )
+        self.assertFalse(any(ClassSession._meta.db_table in query['sql'] for query in queries))
+        self.client.post('/api/attendance/corrections/', [
+            {'reg_no': 'CS001', 'subject': self.subject.pk, 'date': '2025-08-04', 'status': 'P'},
+            {'reg_no': 'CS004', 'subject': self.subject.pk, 'date': '2025-08-05', 'status': 'A'},
+        ], format='json')
+        AttendanceRecord.objects.filter(date='2025-08-05', status='A', student=self.students[0]).delete()
+        self.assertEqual(ClassSession.objects.mismatches(), [])
+        self.assertEqual(self.summary(end=datetime(2025, 8, 5).date()), {
+            'CS000': (2, 2), 'CS001': (2, 2), 'CS002': (1, 2), 'CS003': (0, 0), 'CS004': (0, 1),
+        })
+
+    def test_deleting_a_student_updates_sessions(self):
+        ClassSession.objects.rebuild()
+        self.students[0].delete()
+        self.assertEqual(ClassSession.objects.mismatches(), [])
+        call_command('pack_class_sessions', '--verify', stdout=StringIO())
+        self.assertEqual(
+            [(str(session.date), session.period, len(session.attendance))
+             for session in ClassSession.objects.order_by('date', 'period')],
+            [('2025-08-04', 1, 2), ('2025-08-05', 1, 2)],
+        )
+
+    def test_verify_reports_drift(self):
+        call_command('pack_class_sessions', stdout=StringIO())
+        ClassSession.objects.filter(period=2).delete()
+        with self.assertRaises(CommandError):
+            call_command('pack_class_sessions', '--verify', stdout=StringIO())
+        call_command('pack_class_sessions', '--until', '2025-08-04', stdout=StringIO())
+        self.assertEqual(ClassSession.objects.last_packed_day().isoformat(), '2025-08-04')
+        call_command('pack_class_sessions', '--verify', stdout=StringIO())
+
+    def test_batch_summary_counts_subjects_of_other_batches(self):
+        elective = Subject.objects.create(name='Elective', branch=self.branch, semester=5)
+        AttendanceRecord.objects.create(
+            student=self.students[0], subject=elective, status='P',
+            timestamp=timezone.make_aware(datetime(2025, 8, 4, 12)),
+        )
+        unpacked = self.summary()
+        self.assertEqual(unpacked['CS000'], (3, 4))
+        ClassSession.objects.rebuild()
+        self.assertEqual(self.summary(), unpacked)
+
+    def test_today_is_never_packed(self):
+        today = timezone.localdate()
+        with self.assertRaises(CommandError):
+            call_command('pack_class_sessions', '--until', today.isoformat(), stdout=StringIO())
+        # CS003 is already marked today.
+        ClassSession.objects.rebuild(until=today + timedelta(days=1))
+        self.assertLess(ClassSession.objects.last_packed_day(), today)
+
+        self.client.post('/api/attendance/toggle/', {'reg_no': 'CS004', 'subject_id': self.subject.pk}, format='json')
+        rows = {row['reg_no']: row for row in reports.class_summary(self.branch.pk, 3, subject=self.subject)}
+        self.assertEqual((rows['CS003']['present'], rows['CS004']['present']), (1, 1))
+        call_command('pack_class_sessions', '--verify', stdout=StringIO())
+
+        self.assertEqual(self.client.post(
+            '/api/jobs/', {'kind': 'pack_sessions', 'params': {'until': today.isoformat()}}, format='json'
+        ).status_code, 400)
+
+
+# ---------------- Archive ----------------
+class ArchiveTests(AttendanceAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Academic year 2024 runs from July 2024 to June 2025.
+        for year, month, day, hour in ((2024, 8, 5, 9), (2025, 3, 10, 9), (2025, 3, 10, 11), (2025, 8, 4, 9)):
+            for index, student in enumerate(cls.students[:3]):
+                AttendanceRecord.objects.create(
+                    student=student, subject=cls.subject, status='PA'[(index + day + hour) % 2],
+                    timestamp=timezone.make_aware(datetime(year, month, day, hour)),
+                )
+
+    def snapshot(self):
+        export = self.client.get(f'/api/attendance/export/?subject={self.subject.pk}')
+        register = self.client.get(f'/api/attendance/export/?layout=register&subject={self.subject.pk}')
+        summary = self.client.get(f'/api/attendance/class-summary/?subject={self.subject.pk}')
+        student = self.client.get(f'/api/attendance/student-summary/?reg_no=CS001&subject={self.subject.pk}')
+        return (
+            b''.join(export.streaming_content), b''.join(register.streaming_content),
+            summary.data['students'], student.data['attendance_summary'],
+        )
+
+    def test_archive_keeps_summaries_and_exports(self):
+        before = self.snapshot()
+        call_command('archive_attendance', '2024', stdout=StringIO())
+
+        self.assertEqual(AttendanceRecord.objects.count(), 3)
+        self.assertFalse(AttendanceRecord.objects.filter(date__lt='2025-07-01').exists())
+        archived = ArchivedYear.objects.get()
+        self.assertEqual((archived.records, str(archived.start_date), str(archived.end_date)),
+                         (9, '2024-07-01', '2025-06-30'))
+        self.assertEqual(archive_model(2024).objects.count(), 9)
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(len(before[0].decode().strip().splitlines()), 13)
+
+        self.assertEqual(AttendanceCounter.objects.mismatches(), [])
+        self.assertEqual(AttendanceRollup.objects.mismatches(), [])
+        self.assertEqual(ClassSession.objects.mismatches(), [])
+        call_command('rebuild_attendance_counters', '--verify', stdout=StringIO())
+
+        call_command('archive_attendance', '--restore', '2024', stdout=StringIO())
+        self.assertEqual(AttendanceRecord.objects.count(), 12)
+        self.assertFalse(ArchivedYear.objects.exists())
+        self.assertEqual(self.snapshot(), before)
+
+    def test_deleting_a_student_discards_archived_records(self):
+        call_command('archive_attendance', '2024', stdout=StringIO())
+        self.students[0].delete()
+
+        self.assertEqual(archive_model(2024).objects.count(), 6)
+        self.assertFalse(archive_model(2024).objects.filter(student_id=self.students[0].pk).exists())
+        self.assertEqual(ArchivedYear.objects.get().records, 6)
+        call_command('rebuild_attendance_counters', stdout=StringIO())
+        call_command('rebuild_attendance_counters', '--verify', stdout=StringIO())
+
+        self.subject.delete()
+        self.assertEqual(archive_model(2024).objects.count(), 0)
+        self.assertEqual(ArchivedYear.objects.get().records, 0)
+
+    def test_archived_years_are_read_only(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_attendance', str(timezone.localdate().year), stdout=StringIO())
+        call_command('archive_attendance', stdout=StringIO())
+        self.assertEqual(list(ArchivedYear.objects.values_list('year', flat=True)), [2024, 2025])
+
+        response = self.client.post('/api/attendance/corrections/', [
+            {'reg_no': 'CS000', 'subject': self.subject.pk, 'date': '2025-03-10', 'status': 'P'},
+        ], format='json')
+        self.assertEqual(response.data['results'][0]['errors'], {
+            'date': ['This date is in an archived academic year.'],
+        })
+        response = self.client.post('/api/attendance/bulk/', [
+            {'student': 'CS000', 'subject': self.subject.pk, 'timestamp': '2025-08-04T15:00:00+05:30'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('archived academic year', str(response.data['rows']))
+        self.assertEqual(AttendanceRecord.objects.count(), 0)
+
+    def test_single_record_writes_reject_archived_days(self):
+        call_command('archive_attendance', '2024', stdout=StringIO())
+        error = {'timestamp': ['This date is in an archived academic year.']}
+        response = self.client.post('/api/attendance/', {
+            'student': 'CS000', 'subject': self.subject.pk, 'status': 'P', 'timestamp': '2025-03-11T09:00:00+05:30',
+        }, format='json')
+        self.assertEqual((response.status_code, response.data), (400, error))
+
+        record = AttendanceRecord.objects.get(student=self.students[0])
+        response = self.client.patch(
+            f'/api/attendance/{record.pk}/', {'timestamp': '2024-08-05T09:00:00+05:30'}, format='json'
+        )
+        self.assertEqual((response.status_code, response.data), (400, error))
+        response = self.client.put(f'/api/attendance/{record.pk}/', {
+            'student': 'CS000', 'subject': self.subject.pk, 'status': 'P', 'timestamp': '2025-03-10T11:00:00+05:30',
+        }, format='json')
+        self.assertEqual((response.status_code, response.data), (400, error))
+        response = self.client.patch(f'/api/attendance/{record.pk}/', {'status': 'A'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_bulk_reports_the_archived_row(self):
+        call_command('archive_attendance', '2024', stdout=StringIO())
+        start = timezone.make_aware(datetime(2025, 9, 1, 9))
+        rows = [
+            {'student': 'CS000', 'subject': self.subject.pk, 'timestamp': (start + timedelta(hours=hour)).isoformat()}
+            for hour in range(510)
+        ]
+        rows[503]['timestamp'] = '2025-03-11T09:00:00+05:30'
+        response = self.client.post('/api/attendance/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual(response.data['rows'], [
+            {'row': 503, 'errors': {'timestamp': ['This date is in an archived academic year.']}},
+        ])
+        self.assertEqual(AttendanceRecord.objects.count(), 3)
+
+
+# ---------------- Bootstrap ----------------
+class BootstrapTests(AttendanceAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.teacher.subjects.add(cls.other_subject)
+        other_branch = Branch.objects.create(name='ECE')
+        cls.ece = Subject.objects.create(name='Signals', branch=other_branch, semester=5)
+        Student.objects.create(
+            reg_no='EC000', name='Student EC', semester=5, branch=other_branch, email='ec000@college.edu'
+        )
+        AttendanceRecord.objects.create(student=cls.students[0], subject=cls.subject, status='P')
+        AttendanceRecord.objects.create(student=cls.students[1], subject=cls.subject, status='A')
+        AttendanceRecord.objects.create(
+            student=cls.students[2], subject=cls.subject, status='P',
+            timestamp=timezone.now() - timedelta(days=2),
+        )
+
+    def test_single_payload_from_fixed_queries(self):
+        self.teacher.subjects.add(self.ece)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/bootstrap/')
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data['teacher']['username'], 'teacher')
+        self.assertEqual([subject['name'] for subject in data['subjects']], ['DBMS', 'OS', 'Signals'])
+        self.assertEqual(sorted(data['rosters']), [f'{self.branch.pk}-3', f'{self.ece.branch_id}-5'])
+
+        dbms = data['subjects'][0]
+        self.assertEqual(len(data['rosters'][dbms['roster']]), self.class_size)
+        self.assertEqual(data['rosters'][dbms['roster']][0]['reg_no'], 'CS000')
+        self.assertEqual(dbms['today'], {
+            'present': 1, 'marked': 2, 'total': self.class_size,
+            'attendance': {'CS000': 'P', 'CS001': 'A'},
+        })
+        self.assertEqual(data['subjects'][1]['today']['marked'], 0)
+        self.assertEqual(response['ETag'], f'"{data["version"]}"')
+
+    def test_unchanged_bootstrap_is_not_modified(self):
+        etag = self.client.get('/api/bootstrap/')['ETag']
+        response = self.client.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.client.post(
+            '/api/attendance/toggle/', {'reg_no': 'CS003', 'subject_id': self.other_subject.pk}, format='json'
+        )
+        response = self.client.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['subjects'][1]['today']['attendance'], {'CS003': 'P'})
+
+    def test_token_of_deleted_teacher(self):
+        gone = Teacher.objects.create_user(username='gone', password='secret-pass', is_staff=True)
+        access = authentication.TeacherTokenObtainPairSerializer.get_token(gone).access_token
+        gone.delete()
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/bootstrap/').status_code, 401)
+
+    def test_teacher_without_subjects(self):
+        self.teacher.subjects.clear()
+        response = self.client.get('/api/bootstrap/')
+        self.assertEqual((response.data['subjects'], response.data['rosters']), ([], {}))
+
+
+# ---------------- Cursor pagination ----------------
+class CursorPaginationTests(AttendanceAPITestCase):
+    class_size = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Two records share each timestamp so pages must break ties on id.
+        for i, student in enumerate(cls.students):
+            timestamp = timezone.make_aware(datetime(2025, 8, 1, 9, i // 2))
+            AttendanceRecord.objects.create(
+                student=student, subject=cls.subject, status='P', timestamp=timestamp
+            )
+
+    def test_walks_every_row_once_without_count(self):
+        url = '/api/attendance/?pagination=cursor&page_size=5'
+        seen = []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(ctx.captured_queries), 1)
+            self.assertNotIn('COUNT', ctx.captured_queries[0]['sql'])
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        expected = list(
+            AttendanceRecord.objects.order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_page_stays_stable_when_rows_are_added(self):
+        first = self.client.get('/api/attendance/?pagination=cursor&page_size=5&fast=1')
+        AttendanceRecord.objects.create(student=self.students[0], subject=self.other_subject, status='P')
+        second = self.client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), 5)
+        self.assertLess(second.data['results'][0]['id'], first.data['results'][-1]['id'])
+
+    def test_default_pagination_unchanged(self):
+        response = self.client.get('/api/attendance/')
+        self.assertEqual(response.data['count'], self.class_size)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/attendance/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+
+# ---------------- Reference data cache ----------------
+class ReferenceCacheTests(AttendanceAPITestCase):
+
+    def test_roster_served_from_cache_until_student_changes(self):
+        url = f'/api/students/?branch={self.branch.pk}&semester=3'
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+        Student.objects.filter(pk=self.students[0].pk).get().save()
+        third = self.client.get(url)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        response = self.client.get('/api/subjects/')
+        with self.assertNumQueries(0):
+            revalidated = self.client.get('/api/subjects/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+        self.branch.name = 'CSE-A'
+        self.branch.save()
+        changed = self.client.get('/api/subjects/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data['results'][0]['branch_name'], 'CSE-A')
+
+    def test_teacher_subject_changes_invalidate(self):
+        before = self.client.get('/api/teachers/')
+        self.teacher.subjects.add(self.other_subject)
+        after = self.client.get('/api/teachers/')
+        self.assertNotEqual(before['ETag'], after['ETag'])
+        self.assertEqual(sorted(after.data['results'][0]['subject_names']), ['DBMS', 'OS'])
+
+    def test_process_local_cache_picks_up_changes_from_other_processes(self):
+        response = self.client.get('/api/subjects/')
+        # A write in another worker process: no invalidation reaches this one.
+        Branch.objects.filter(pk=self.branch.pk).update(name='CSE-B')
+        stale = self.client.get('/api/subjects/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(stale.status_code, 304)
+
+        later = time.time() + settings.REFERENCE_CACHE_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            changed = self.client.get('/api/subjects/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data['results'][0]['branch_name'], 'CSE-B')
+
+    def test_missing_reg_no_still_404(self):
+        response = self.client.get('/api/students/?reg_no=NOPE')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/students/NOPE/')
+        self.assertEqual(response.status_code, 404)
+
+
+# ---------------- Delta sync ----------------
+class DeltaSyncTests(AttendanceAPITestCase):
+
+    def toggle(self, student, subject=None):
+        return self.client.post(
+            '/api/attendance/toggle/',
+            {'reg_no': student.reg_no, 'subject_id': (subject or self.subject).pk},
+            format='json',
+        )
+
+    def test_returns_changes_and_tombstones_after_watermark(self):
+        self.toggle(self.students[0])
+        self.toggle(self.students[1])
+        first = self.client.get('/api/attendance/sync/?since=0').data
+        self.assertEqual({r['reg_no'] for r in first['records']}, {'CS000', 'CS001'})
+        self.assertEqual(first['deleted'], [])
+
+        removed_id = AttendanceRecord.objects.get(student=self.students[0]).pk
+        self.toggle(self.students[0])
+        self.toggle(self.students[2])
+        with self.assertNumQueries(2):
+            second = self.client.get(f"/api/attendance/sync/?since={first['watermark']}").data
+        self.assertEqual([r['reg_no'] for r in second['records']], ['CS002'])
+        self.assertEqual(second['deleted'], [removed_id])
+        self.assertGreater(second['watermark'], first['watermark'])
+
+        third = self.client.get(f"/api/attendance/sync/?since={second['watermark']}").data
+        self.assertEqual((third['records'], third['deleted']), ([], []))
+        self.assertEqual(third['watermark'], second['watermark'])
+
+    def test_bulk_updates_and_subject_filter(self):
+        rows = [
+            {'student': s.reg_no, 'subject': self.subject.pk, 'status': 'P',
+             'timestamp': '2025-08-01T09:00:00+05:30'}
+            for s in self.students
+        ]
+        self.client.post('/api/attendance/bulk/', rows, format='json')
+        self.toggle(self.students[0], self.other_subject)
+        watermark = self.client.get('/api/attendance/sync/').data['watermark']
+
+        rows[0]['status'] = 'A'
+        self.client.post('/api/attendance/bulk/', rows[:1], format='json')
+        self.toggle(self.students[0], self.other_subject)
+
+        response = self.client.get(
+            f'/api/attendance/sync/?since={watermark}&subject={self.subject.pk}'
+        ).data
+        self.assertEqual([(r['reg_no'], r['status']) for r in response['records']], [('CS000', 'A')])
+        self.assertEqual(response['deleted'], [])
+
+    def test_paging_with_limit(self):
+        for student in self.students:
+            self.toggle(student)
+        response = self.client.get('/api/attendance/sync/?limit=2').data
+        self.assertTrue(response['has_more'])
+        self.assertEqual(len(response['records']), 2)
+
+
+# ---------------- Export ----------------
+class ExportTests(AttendanceAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for day, statuses in enumerate(['PA', 'P'], start=1):
+            for hour, status_val in enumerate(statuses, start=9):
+                AttendanceRecord.objects.create(
+                    student=cls.students[0], subject=cls.subject, status=status_val,
+                    timestamp=timezone.make_aware(datetime(2025, 8, day, hour)),
+                )
+        AttendanceRecord.objects.create(
+            student=cls.students[1], subject=cls.subject, status='P',
+            timestamp=timezone.make_aware(datetime(2025, 8, 2, 9)),
+        )
+        AttendanceRecord.objects.create(
+            student=cls.students[1], subject=cls.other_subject, status='P',
+            timestamp=timezone.make_aware(datetime(2025, 8, 2, 9)),
+        )
+
+    def get_body(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_records_csv(self):
+        body = self.get_body(
+            f'/api/attendance/export/?subject={self.subject.pk}&start_date=2025-08-02'
+        )
+        lines = body.strip().splitlines()
+        self.assertTrue(lines[0].startswith('id,date,timestamp,reg_no'))
+        self.assertEqual(len(lines), 3)
+        self.assertIn('CS000', lines[1])
+
+    def test_records_ndjson_by_batch(self):
+        body = self.get_body(f'/api/attendance/export/?output=ndjson&branch={self.branch.pk}&semester=3')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['date'], '2025-08-01')
+
+    def test_register_layout(self):
+        body = self.get_body(f'/api/attendance/export/?layout=register&subject={self.subject.pk}')
+        lines = body.strip().splitlines()
+        self.assertEqual(lines[0], 'reg_no,name,2025-08-01,2025-08-02,present,total,percentage')
+        self.assertEqual(lines[1], 'CS000,Student 0,PA,P,2,3,66.67')
+        self.assertEqual(lines[2], 'CS001,Student 1,,P,1,1,100.0')
+        self.assertEqual(len(lines), 1 + self.class_size)
+
+    def test_register_requires_subject(self):
+        response = self.client.get('/api/attendance/export/?layout=register')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_filters_fail_before_streaming(self):
+        for query in ('branch=abc', f'layout=register&subject={self.subject.pk}&semester=x',
+                      'subject=999999', 'start_date=2025-13-01', 'output=xml'):
+            response = self.client.get(f'/api/attendance/export/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertFalse(response.streaming)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command(
+            'export_attendance', '--layout', 'register', '--subject', str(self.subject.pk),
+            '--output', 'ndjson', stdout=out,
+        )
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows[0]['days'], {'2025-08-01': 'PA', '2025-08-02': 'P'})
+
+
+# ---------------- Tap endpoint ----------------
+class TapTests(AttendanceAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        taps.students.clear()
+        taps.subjects.clear()
+
+    def tap(self, reg_no='CS001', subject=None):
+        return self.client.post(
+            '/api/attendance/tap/',
+            {'reg_no': reg_no, 'subject_id': (subject or self.subject).pk},
+            format='json',
+        )
+
+    def test_tap_flips_with_writes_only(self):
+        self.tap()  # warm the lookup caches
+        self.tap()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.tap()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['status'], 'P')
+        self.assertEqual(response.data['student_name'], 'Student 1')
+        statements = [q['sql'].split()[0].upper() for q in ctx.captured_queries]
+        self.assertNotIn('SELECT', statements)
+
+        response = self.tap()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'A')
+        self.assertFalse(AttendanceRecord.objects.exists())
+        self.assertEqual(AttendanceCounter.objects.mismatches(), [])
+
+    def test_unknown_student_or_subject(self):
+        self.assertEqual(self.tap(reg_no='NOPE').status_code, 404)
+        response = self.client.post(
+            '/api/attendance/tap/', {'reg_no': 'CS001', 'subject_id': 999}, format='json'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_student_change_invalidates_lookup(self):
+        self.tap()
+        student = self.students[1]
+        student.name = 'Renamed'
+        student.save()
+        self.assertEqual(self.tap().data['student_name'], 'Renamed')
+
+
+class SyntheticDataTests(TestCase):
+    def test_generate_is_reproducible_and_consistent(self):
+        end = datetime(2024, 3, 8).date()  # a Friday: 5 lecture days in the last 7
+        sizes = dict(branches=1, semesters=2, students=6, subjects=2, days=7, teachers=1)
+        written = synthetic.generate(seed=7, end=end, **sizes)
+        self.assertEqual(written, 5 * 2 * 3)
+        self.assertEqual(AttendanceRecord.objects.count(), written)
+        self.assertEqual(AttendanceCounter.objects.mismatches(), [])
+        ordering = ('date', 'subject__name', 'student__reg_no')
+        rows = list(AttendanceRecord.objects.order_by(*ordering).values_list('student__reg_no', 'status'))
+
+        AttendanceRecord.objects.all().delete()
+        Branch.objects.all().delete()
+        Teacher.objects.all().delete()
+        synthetic.generate(seed=7, end=end, **sizes)
+        self.assertEqual(
+            list(AttendanceRecord.objects.order_by(*ordering).values_list('student__reg_no', 'status')), rows
+        )
+        with self.assertRaises(CommandError):
+            call_command('generate_attendance_data', stdout=StringIO())
+
+    def test_compare_flags_slowdowns_and_extra_queries(self):
+        baseline = {'a': {'p50': 10.0, 'queries': 3}, 'b': {'p50': 2.0, 'queries': 2}}
+        results = {'a': {'p50': 15.5, 'queries': 3}, 'b': {'p50': 8.0, 'queries': 4}}
+        regressions = compare(results, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(line.startswith('b:') for line in regressions))
+
+
+class InstrumentationTests(AttendanceAPITestCase):
+    def test_server_timing_and_metrics(self):
+        response = self.client.get(f'/api/attendance/?subject={self.subject.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, total;dur=[\d.]+$')
+
+        metrics = self.client.get('/metrics')
+        self.assertEqual(metrics.status_code, 200)
+        body = metrics.content.decode()
+        self.assertIn('edutag_request_duration_seconds_bucket{route="AttendanceViewSet.list",le="+Inf"}', body)
+        self.assertIn('edutag_requests_total{route="AttendanceViewSet.list",method="GET",status="200"}', body)
+        self.assertRegex(body, r'edutag_db_queries_total\{route="AttendanceViewSet.list"\} [1-9]')
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    @override_settings(PERF_N_PLUS_ONE_THRESHOLD=3, PERF_SLOW_QUERY_MS=10_000)
+    def test_repeated_queries_are_reported(self):
+        stats = RequestStats(detect=True)
+        with connection.execute_wrapper(stats):
+            for student in self.students[:3]:
+                Student.objects.filter(pk=student.pk).exists()
+            Subject.objects.count()
+        self.assertEqual(stats.queries, 4)
+
+        with self.assertLogs('core.performance', 'WARNING') as logs:
+            report_problems('StudentViewSet.list', stats)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Possible N+1 in StudentViewSet.list: 3 x SELECT', logs.output[0])
+        self.assertIn('"core_student"."id" = %s', logs.output[0])
+
+
+class TokenAuthTests(AttendanceAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(None)
+        authentication.teachers.clear()
+
+    def obtain(self):
+        response = self.client.post(
+            '/api/token/', {'username': 'teacher', 'password': 'secret-pass'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def refresh(self, token):
+        return self.client.post('/api/token/refresh/', {'refresh': token}, format='json')
+
+    def test_requests_do_not_load_the_teacher(self):
+        tokens = self.obtain()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/branches/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'core_teacher' in q['sql']])
+
+    def test_refresh_uses_cached_blacklist_and_teacher(self):
+        refresh = self.obtain()['refresh']
+        self.assertEqual(self.refresh(refresh).status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.refresh(refresh).status_code, 200)
+        self.assertEqual(ctx.captured_queries, [])
+
+    def test_role_change_applies_at_refresh(self):
+        refresh = self.obtain()['refresh']
+        self.teacher.is_staff = False
+        self.teacher.save()
+
+        access = self.refresh(refresh).data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/branches/').status_code, 403)
+
+    def test_blacklisted_refresh_is_rejected(self):
+        refresh = self.obtain()['refresh']
+        self.assertEqual(self.refresh(refresh).status_code, 200)  # caches "not blacklisted"
+        authentication.CachedBlacklistRefreshToken(refresh).blacklist()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+
+class WriteCoordinatorTests(AttendanceAPITestCase):
+    def test_batch_isolates_failing_writes(self):
+        def fail():
+            Student.objects.create(reg_no='CS001', name='Duplicate', semester=3, branch=self.branch)
+
+        jobs = [
+            _Job(taps.flip_attendance, (self.students[0].pk, self.subject.pk), {}, []),
+            _Job(fail, (), {}, []),
+            _Job(taps.flip_attendance, (self.students[1].pk, self.subject.pk), {}, []),
+        ]
+        WriteCoordinator._execute(jobs)
+
+        self.assertTrue(all(job.done.is_set() for job in jobs))
+        self.assertIsNone(jobs[0].error)
+        self.assertIsNotNone(jobs[1].error)
+        self.assertEqual(jobs[2].result.student_id, self.students[1].pk)
+        self.assertEqual(AttendanceRecord.objects.count(), 2)
+        self.assertEqual(AttendanceCounter.objects.mismatches(), [])
+
+    @override_settings(ATTENDANCE_WRITE_COORDINATOR=True)
+    def test_runs_inline_inside_a_transaction(self):
+        coordinator = WriteCoordinator()
+        record = coordinator.run(taps.flip_attendance, self.students[0].pk, self.subject.pk)
+        self.assertEqual(record.status, 'P')
+        self.assertIsNone(coordinator._thread)
+
+
+class WriteCoordinatorCommitTests(AttendanceAPITransactionTestCase):
+    def test_deferred_foreign_key_fails_only_its_write(self):
+        # A tap cache in another process may still hold a deleted student.
+        gone = Student.objects.create(reg_no='CS999', name='Gone', semester=3, branch=self.branch)
+        Student.objects.filter(pk=gone.pk).delete()
+        jobs = [
+            _Job(taps.flip_attendance, (gone.pk, self.subject.pk), {}, []),
+            _Job(taps.flip_attendance, (self.students[0].pk, self.subject.pk), {}, []),
+        ]
+        WriteCoordinator._execute(jobs)
+
+        self.assertIsInstance(jobs[0].error, IntegrityError)
+        self.assertIsNone(jobs[1].error)
+        self.assertEqual(list(AttendanceRecord.objects.values_list('student_id', flat=True)), [self.students[0].pk])
+        self.assertEqual(AttendanceCounter.objects.mismatches(), [])
+
+
+class AsyncEndpointTests(AttendanceAPITestCase):
+    def setUp(self):
+        super().setUp()
+        token = authentication.TeacherTokenObtainPairSerializer.get_token(self.teacher).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def aget(self, path):
+        return async_to_sync(self.async_client.get)(path, headers=self.headers)
+
+    def apost(self, path, data):
+        return async_to_sync(self.async_client.post)(
+            path, data, content_type='application/json', headers=self.headers
+        )
+
+    def test_requires_a_teacher_token(self):
+        response = async_to_sync(self.async_client.get)('/api/async/students/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+    def test_roster_matches_sync_endpoint(self):
+        path = f'/api/students/?branch={self.branch.pk}&semester=3'
+        expected = self.client.get(path).json()
+        response = self.aget(path.replace('/api/', '/api/async/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+
+    def test_toggle_and_summary(self):
+        body = {'reg_no': 'CS001', 'subject_id': self.subject.pk}
+        response = self.apost('/api/async/attendance/toggle/', body)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['record']['status'], 'P')
+
+        path = f'/api/attendance/student-summary/?reg_no=CS001&subject={self.subject.pk}'
+        summary = self.aget(path.replace('/api/', '/api/async/')).json()
+        self.assertEqual(summary, self.client.get(path).json())
+        self.assertEqual(summary['attendance_summary']['present'], 1)
+
+        today = timezone.localdate().isoformat()
+        path = f'/api/attendance/?date={today}&subject={self.subject.pk}'
+        self.assertEqual(self.aget(path.replace('/api/', '/api/async/')).json(), self.client.get(path).json())
+
+        response = self.apost('/api/async/attendance/toggle/', body)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_errors(self):
+        self.assertEqual(self.apost('/api/async/attendance/toggle/', {'reg_no': 'NOPE', 'subject_id': 1}).status_code, 404)
+        self.assertEqual(self.aget('/api/async/attendance/').status_code, 400)
+        self.assertEqual(self.aget('/api/async/students/?page=9').status_code, 404)
+
+
+class CorrectionTests(AttendanceAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.day = datetime(2024, 3, 4, 10, tzinfo=dt_timezone.utc)
+        for student, status_val in zip(self.students[:2], 'AP'):
+            AttendanceRecord.objects.create(
+                student=student, subject=self.subject, status=status_val, timestamp=self.day
+            )
+
+    def correct(self, items):
+        return self.client.post('/api/attendance/corrections/', items, format='json')
+
+    def test_batch_corrections(self):
+        items = [
+            {'reg_no': 'CS000', 'subject': self.subject.pk, 'date': '2024-03-04', 'status': 'P'},
+            {'reg_no': 'CS001', 'subject': self.subject.pk, 'date': '2024-03-04', 'status': 'P'},
+            {'reg_no': 'CS002', 'subject': self.subject.pk, 'date': '2024-03-04', 'status': 'A'},
+            {'reg_no': 'CS002', 'subject': self.subject.pk, 'date': '2024-03-04', 'status': 'P'},
+            {'reg_no': 'NOPE', 'subject': self.subject.pk, 'date': '2024-03-04', 'status': 'P'},
+            {'reg_no': 'CS003', 'subject': self.subject.pk, 'date': '04/03/2024', 'status': 'X'},
+        ]
+        response = self.correct(items)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual(
+            [result['result'] for result in response.data['results']],
+            ['updated', 'unchanged', 'superseded', 'created', 'failed', 'failed'],
+        )
+        self.assertEqual(set(response.data['results'][5]['errors']), {'date', 'status'})
+
+        statuses = dict(
+            AttendanceRecord.objects.filter(subject=self.subject)
+            .values_list('student__reg_no', 'status')
+        )
+        self.assertEqual(statuses, {'CS000': 'P', 'CS001': 'P', 'CS002': 'P'})
+        self.assertEqual(AttendanceCounter.objects.mismatches(), [])
+
+    def test_query_count_does_not_grow_with_batch(self):
+        items = [
+            {'reg_no': student.reg_no, 'subject': self.subject.pk, 'date': '2024-03-04', 'status': 'P'}
+            for student in self.students
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.correct(items[:2]).status_code, 200)
+        small = len(ctx.captured_queries)
+        AttendanceRecord.objects.filter(student__in=self.students[2:]).delete()
+        for item in items:
+            item['status'] = 'A'
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.correct(items).status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), small + 1)  # the insert for missing rows
+
+    def test_rejects_non_list(self):
+        self.assertEqual(self.correct({'reg_no': 'CS000'}).status_code, 400)
+
+    def test_rejects_malformed_fields(self):
+        response = self.correct([
+            {'reg_no': 'CS000', 'subject': self.subject.pk, 'date': '2024-03-04', 'status': {}},
+            {'reg_no': ['CS000'], 'subject': [self.subject.pk], 'date': {}, 'status': ['P']},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual(set(response.data['results'][0]['errors']), {'status'})
+        self.assertEqual(set(response.data['results'][1]['errors']), {'reg_no', 'subject', 'date', 'status'})
+
+
+# ---------------- Background jobs ----------------
+class JobTests(AttendanceAPITransactionTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for index, student in enumerate(cls.students):
+            AttendanceRecord.objects.create(
+                student=student, subject=cls.subject, status='PA'[index % 2],
+                timestamp=timezone.make_aware(datetime(2025, 8, 1, 9)),
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.media_root, self.results_root = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(shutil.rmtree, self.results_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root, JOB_RESULTS_ROOT=self.results_root))
+
+    def submit(self, kind='export', **params):
+        return self.client.post('/api/jobs/', {'kind': kind, 'params': params}, format='json')
+
+    def run_jobs(self):
+        call_command('run_jobs', '--once', '--workers', '1', '--nice', '0', stdout=StringIO())
+
+    def test_export_job_matches_streamed_export(self):
+        response = self.submit(layout='register', subject=self.subject.pk)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], Job.QUEUED)
+        location = response['Location']
+
+        polled = self.client.get(location)
+        self.assertEqual(polled['Retry-After'], '2')
+        self.assertIsNone(polled.data['download_url'])
+
+        self.run_jobs()
+        polled = self.client.get(location)
+        self.assertEqual(polled.data['status'], Job.SUCCEEDED)
+        self.assertEqual(polled.data['progress'], 100)
+        self.assertEqual(polled.data['message'], f'{self.class_size} rows exported.')
+        self.assertNotIn('Retry-After', polled)
+
+        download = self.client.get(polled.data['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attendance-register.csv', download['Content-Disposition'])
+        streamed = self.client.get(f'/api/attendance/export/?layout=register&subject={self.subject.pk}')
+        self.assertEqual(b''.join(download.streaming_content), b''.join(streamed.streaming_content))
+
+    def test_results_stay_out_of_media_and_expire(self):
+        self.submit()
+        self.run_jobs()
+        job = Job.objects.get()
+        path = job.result.path
+        self.assertTrue(path.startswith(os.path.join(self.results_root, 'jobs', '')), path)
+        self.assertEqual(os.listdir(self.media_root), [])
+        with self.assertRaises(ValueError):
+            job.result.url
+
+        self.assertEqual(Job.objects.purge(job.finished_at), 0)
+        self.assertEqual(Job.objects.purge(job.finished_at + timedelta(seconds=1)), 1)
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.results_root, 'jobs')), [])
+
+    def test_jobs_are_private(self):
+        job_id = self.submit().data['id']
+        other = Teacher.objects.create_user(username='other', password='secret-pass', is_staff=True)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/jobs/').data['results'], [])
+
+    def test_token_of_deleted_teacher(self):
+        gone = Teacher.objects.create_user(username='gone', password='secret-pass', is_staff=True)
+        access = authentication.TeacherTokenObtainPairSerializer.get_token(gone).access_token
+        gone.delete()
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.submit().status_code, 401)
+        self.assertFalse(Job.objects.exists())
+
+    def test_pending_limit(self):
+        with override_settings(JOB_MAX_PENDING=2):
+            self.assertEqual(self.submit().status_code, 202)
+            self.assertEqual(self.submit().status_code, 202)
+            self.assertEqual(self.submit().status_code, 429)
+            self.run_jobs()
+            self.assertEqual(self.submit().status_code, 202)
+
+    def test_invalid_params(self):
+        response = self.submit(layout='register')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('subject', response.data['params'])
+        self.assertEqual(self.submit(kind='nope').status_code, 400)
+        self.assertEqual(self.submit(kind='pack_sessions', until='yesterday').status_code, 400)
+
+    def test_download_before_success(self):
+        job_id = self.submit().data['id']
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/download/').status_code, 409)
+
+    def test_claim_respects_limit_and_exclusive_kinds(self):
+        first = Job.objects.create(kind='rebuild_counters')
+        second = Job.objects.create(kind='rebuild_rollups')
+        export = Job.objects.create(kind='export', params={})
+        self.assertEqual(Job.objects.claim('a', 3, jobs.EXCLUSIVE_KINDS), first)
+        # The second rebuild waits for the first; the export may overtake it.
+        self.assertEqual(Job.objects.claim('b', 3, jobs.EXCLUSIVE_KINDS), export)
+        self.assertIsNone(Job.objects.claim('c', 3, jobs.EXCLUSIVE_KINDS))
+        Job.objects.filter(pk=first.pk).update(status=Job.SUCCEEDED)
+        self.assertIsNone(Job.objects.claim('c', 1, jobs.EXCLUSIVE_KINDS))
+        claimed = Job.objects.claim('c', 2, jobs.EXCLUSIVE_KINDS)
+        self.assertEqual((claimed, claimed.status, claimed.worker), (second, Job.RUNNING, 'c'))
+
+    def test_stale_jobs_are_requeued(self):
+        job = Job.objects.create(kind='rebuild_rollups')
+        Job.objects.claim('a', 1)
+        self.assertEqual(Job.objects.requeue_stale(timezone.now() - timedelta(minutes=1)), 0)
+        self.assertEqual(Job.objects.requeue_stale(timezone.now() + timedelta(minutes=1)), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.QUEUED, ''))
+
+    def test_progress_is_written_while_the_job_runs(self):
+        job = Job.objects.create(kind='export', params={})
+        progress = jobs.Progress(job, total=4)
+        with mock.patch.object(jobs, 'PROGRESS_INTERVAL', 0.01):
+            progress.start()
+            progress.advance(3)
+            deadline = time.monotonic() + 5
+            while Job.objects.get().progress != 75 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            progress.stop()
+        self.assertEqual(Job.objects.get().progress, 75)
+
+    def test_silent_jobs_keep_their_heartbeat(self):
+        Job.objects.create(kind='rebuild_counters')
+        claimed = Job.objects.claim('a', 1, jobs.EXCLUSIVE_KINDS)
+        beats = []
+
+        def rebuild(job, params, progress):
+            # Stands in for a rebuild long enough to go stale without heartbeats.
+            deadline = time.monotonic() + 5
+            while not beats and time.monotonic() < deadline:
+                time.sleep(0.01)
+                beats.extend(Job.objects.filter(pk=job.pk, heartbeat_at__gt=claimed.heartbeat_at)
+                             .values_list('heartbeat_at', flat=True))
+            return None, 'Rebuilt.'
+
+        with override_settings(JOB_STALE_AFTER=0.06), \
+                mock.patch.object(jobs.JOB_KINDS['rebuild_counters'], 'run', rebuild):
+            jobs.run_job(claimed)
+        self.assertEqual(len(beats), 1)
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+
+    def test_rebuild_job(self):
+        AttendanceCounter.objects.all().delete()
+        self.assertEqual(self.submit(kind='rebuild_counters').status_code, 202)
+        self.run_jobs()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertIsNone(self.client.get(f'/api/jobs/{job.pk}/').data['download_url'])
+        self.assertEqual(AttendanceCounter.objects.count(), self.class_size)
+
+    def test_failed_job_records_error(self):
+        job = Job.objects.create(kind='export', params={'subject': 999999, 'layout': 'register'})
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('DoesNotExist', job.message)
@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.views.static import serve
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Square edge in pixels of each derivative, by name.
+THUMBNAIL_SIZES = {'small': 64, 'medium': 128, 'large': 256}
+
+# Encodings written for every size: WebP, and JPEG for clients without it.
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Part of the content hash, so changing the sizes or encoder settings
+# yields new file names instead of new bytes behind a cached URL.
+THUMBNAIL_VERSION = 1
+
+THUMBNAIL_DIR = 'students/thumbs'
+
+# Derivative names never change content, so clients may keep them forever.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def content_hash(data):
+    """Name stem of the derivatives of one source image."""
+    digest = hashlib.sha256(data)
+    digest.update(f'v{THUMBNAIL_VERSION}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def thumbnail_name(digest, size, fmt):
+    return f'{THUMBNAIL_DIR}/{digest}-{THUMBNAIL_SIZES[size]}.{fmt}'
+
+
+def thumbnail_names(digest):
+    """``{size: {format: storage name}}`` for a content hash, or ``None``."""
+    if not digest:
+        return None
+    return {
+        size: {fmt: thumbnail_name(digest, size, fmt) for fmt in THUMBNAIL_FORMATS}
+        for size in THUMBNAIL_SIZES
+    }
+
+
+def _render(image, edge, pil_format, options):
+    thumb = ImageOps.fit(image, (edge, edge), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    thumb.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate(data, storage=default_storage):
+    """
+    Write every derivative of an image and return its content hash.
+
+    Derivatives that already exist are left alone: the name is derived
+    from the source bytes, so an existing file already has the right
+    content. Returns ``None`` when the data is not a readable image.
+    """
+    digest = content_hash(data)
+    missing = [
+        (size, fmt) for size in THUMBNAIL_SIZES for fmt in THUMBNAIL_FORMATS
+        if not storage.exists(thumbnail_name(digest, size, fmt))
+    ]
+    if not missing:
+        return digest
+
+    try:
+        image = Image.open(BytesIO(data))
+        # Decode JPEGs at reduced scale; nothing larger than the biggest edge is needed.
+        image.draft('RGB', (max(THUMBNAIL_SIZES.values()),) * 2)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'L'):
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+            image = background
+    except (UnidentifiedImageError, OSError) as exc:
+        logger.warning("Cannot create thumbnails for image %s: %s", digest, exc)
+        return None
+
+    for size, fmt in missing:
+        pil_format, options = THUMBNAIL_FORMATS[fmt]
+        storage.save(
+            thumbnail_name(digest, size, fmt),
+            ContentFile(_render(image, THUMBNAIL_SIZES[size], pil_format, options)),
+        )
+    return digest
+
+
+def generate_for_file(field_file):
+    """:func:`generate` for a (possibly not yet saved) ``FieldFile``."""
+    field_file.open('rb')
+    try:
+        field_file.seek(0)
+        data = field_file.read()
+    finally:
+        field_file.seek(0)
+    return generate(data)
+
+
+def serve_thumbnail(request, path):
+    """Serve a derivative from ``MEDIA_ROOT`` with far-future cache headers."""
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, THUMBNAIL_DIR))
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
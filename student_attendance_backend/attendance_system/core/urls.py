@@ -6,7 +6,10 @@ from .views import (
     StudentViewSet,
     TeacherViewSet,
     AttendanceViewSet,
+    BootstrapView,
+    JobViewSet,
 )
+from . import async_views
 
 # Router to automatically handle CRUD URLs for ViewSets
 router = DefaultRouter()
@@ -15,8 +18,18 @@ router.register(r'subjects', SubjectViewSet, basename='subject')
 router.register(r'students', StudentViewSet, basename='student')
 router.register(r'teachers', TeacherViewSet, basename='teacher')
 router.register(r'attendance', AttendanceViewSet, basename='attendance')
+router.register(r'jobs', JobViewSet, basename='job')
 
 # API URL patterns
 urlpatterns = [
     path('', include(router.urls)),
+
+    # Everything the home screen needs after login
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
+
+    # Async (ASGI) variants of the hot endpoints
+    path('async/attendance/', async_views.attendance_by_date, name='async-attendance-by-date'),
+    path('async/attendance/toggle/', async_views.toggle_attendance, name='async-attendance-toggle'),
+    path('async/attendance/student-summary/', async_views.student_summary, name='async-student-summary'),
+    path('async/students/', async_views.student_roster, name='async-student-roster'),
 ]
@@ -1,49 +1,165 @@
-from django.utils import timezone
+import os
+from collections.abc import Iterator
+
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, status
+from django.conf import settings
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed, NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db.models import Prefetch, Sum
+from django.http import FileResponse, StreamingHttpResponse
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.http import quote_etag
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .models import Branch, Subject, Student, Teacher, AttendanceRecord
+from .models import Branch, Subject, Student, Teacher, AttendanceRecord, AttendanceCounter, Job
 from .serializers import (
     BranchSerializer,
     SubjectSerializer,
     StudentSerializer,
     TeacherSerializer,
     AttendanceRecordSerializer,
+    StudentRowSerializer,
+    AttendanceRecordRowSerializer,
+    JobSerializer,
 )
 from .permissions import IsTeacher
+from .parsers import NDJSONParser, ORJSONParser
+from .caching import CachedReadMixin, etag_matches
+from .pagination import AttendanceCursorPagination
+from .ingest import ingest_attendance, BulkIngestError
+from .corrections import apply_corrections, FAILED
+from .bootstrap import build_bootstrap
+from . import reports, search
+from .sync import changes_since, SYNC_PAGE_SIZE
+from .exports import ExportFilter, OUTPUT_FORMATS, clean_export_params, stream_export
+from . import taps
+from .writes import coordinator
+from .authentication import TeacherTokenObtainPairSerializer, TeacherTokenRefreshSerializer
+
+
+READ_ACTIONS = ('list', 'retrieve')
+
+STUDENT_READ_FIELDS = (
+    'id', 'reg_no', 'name', 'semester', 'branch', 'branch__name', 'email',
+    'profile_pic', 'profile_pic_hash', 'created_at', 'updated_at',
+)
+ATTENDANCE_READ_FIELDS = (
+    'id', 'status', 'timestamp', 'student', 'student__reg_no', 'student__name',
+    'student__profile_pic', 'student__profile_pic_hash', 'subject', 'subject__name',
+)
+
+
+def attendance_totals(student, subject_id=None):
+    """Return ``(present, total)`` for a student from the attendance counters."""
+    counters = AttendanceCounter.objects.filter(student=student)
+    if subject_id:
+        counters = counters.filter(subject_id=subject_id)
+    totals = counters.aggregate(
+        present=Coalesce(Sum('present'), 0),
+        total=Coalesce(Sum('total'), 0),
+    )
+    return totals['present'], totals['total']
+
+
+def date_param(request, name):
+    """Parse an optional ``YYYY-MM-DD`` query parameter."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Enter a valid date in YYYY-MM-DD format.'})
+    return parsed
+
+
+def int_param(request, name):
+    """Parse an optional integer query parameter."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'A valid integer is required.'})
+
+
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+class RowListMixin:
+    """
+    Serve ``?fast=true`` list requests from ``values()`` rows.
+
+    The filtered queryset is projected with ``row_serializer_class`` so
+    large pages skip model instantiation entirely.
+    """
+    row_serializer_class = None
+
+    def wants_rows(self):
+        request = getattr(self, 'request', None)
+        return (
+            self.row_serializer_class is not None
+            and self.action == 'list'
+            and request is not None
+            and is_truthy(request.query_params.get('fast'))
+        )
+
+    def get_serializer_class(self):
+        if self.wants_rows():
+            return self.row_serializer_class
+        return super().get_serializer_class()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.wants_rows():
+            return self.row_serializer_class.project(queryset)
+        return queryset
 
 
 # ---------------- Branch ----------------
-class BranchViewSet(viewsets.ReadOnlyModelViewSet):
+class BranchViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Branch.objects.all().order_by('name')
     serializer_class = BranchSerializer
     permission_classes = [IsTeacher]
+    cache_namespace = 'branches'
 
 
 # ---------------- Subject ----------------
-class SubjectViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Subject.objects.all().order_by('name')
+class SubjectViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Subject.objects.select_related('branch').order_by('name')
     serializer_class = SubjectSerializer
     permission_classes = [IsTeacher]
+    cache_namespace = 'subjects'
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['branch', 'semester']
 
 
 # ---------------- Student ----------------
-class StudentViewSet(viewsets.ReadOnlyModelViewSet):
+class StudentViewSet(CachedReadMixin, RowListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Student.objects.all().order_by('name')
     serializer_class = StudentSerializer
     permission_classes = [IsTeacher]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['branch', 'semester', 'reg_no']  # Added reg_no for filtering
     lookup_field = 'reg_no'
+    row_serializer_class = StudentRowSerializer
+    cache_namespace = 'students'
 
     def get_queryset(self):
         """Override to handle reg_no filtering properly"""
         queryset = super().get_queryset()
+        if self.action in READ_ACTIONS:
+            queryset = queryset.select_related('branch').only(*STUDENT_READ_FIELDS)
         
         # Handle reg_no query parameter specifically
         reg_no = self.request.query_params.get('reg_no')
@@ -53,36 +169,15 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
 
-    def list(self, request, *args, **kwargs):
-        """Override list to ensure proper reg_no filtering"""
-        queryset = self.filter_queryset(self.get_queryset())
-        
-        # If reg_no is provided, ensure we return only that specific student
-        reg_no = request.query_params.get('reg_no')
-        if reg_no:
-            queryset = queryset.filter(reg_no=reg_no)
-            if not queryset.exists():
-                return Response(
-                    {'detail': f'Student with registration number {reg_no} not found.'}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+    def filter_queryset(self, queryset):
+        """A reg_no lookup on the list returns 404 when nothing matches"""
+        queryset = super().filter_queryset(queryset)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        reg_no = self.request.query_params.get('reg_no')
+        if self.action == 'list' and reg_no and not queryset.exists():
+            raise NotFound(f'Student with registration number {reg_no} not found.')
 
-    def retrieve(self, request, *args, **kwargs):
-        """Override retrieve to handle reg_no lookup properly"""
-        reg_no = kwargs.get('reg_no')
-        if reg_no:
-            student = get_object_or_404(Student, reg_no=reg_no)
-            serializer = self.get_serializer(student)
-            return Response(serializer.data)
-        return super().retrieve(request, *args, **kwargs)
+        return queryset
 
     @action(detail=True, methods=['get'])
     def attendance_summary(self, request, reg_no=None):
@@ -91,13 +186,7 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Get subject filter if provided
         subject_id = request.query_params.get('subject')
-        attendance_filter = {'student': student}
-        
-        if subject_id:
-            attendance_filter['subject_id'] = subject_id
-        
-        total = AttendanceRecord.objects.filter(**attendance_filter).count()
-        present = AttendanceRecord.objects.filter(**attendance_filter, status='P').count()
+        present, total = attendance_totals(student, subject_id)
         absent = total - present
         percentage = (present / total) * 100 if total else 0
 
@@ -110,42 +199,93 @@ class StudentViewSet(viewsets.ReadOnlyModelViewSet):
             'percentage': round(percentage, 2),
         })
 
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Type-ahead search over reg_no, name and email.
+
+        Query params: ``q`` (every word matches as a prefix), optional
+        ``branch``/``semester`` and ``limit`` (default 10, at most 50).
+        Results come best match first; ``?fields=`` trims them.
+        """
+        params = request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(params.get('limit', 10)), 50)
+            branch, semester = (
+                int(params[name]) if params.get(name) else None for name in ('branch', 'semester')
+            )
+        except ValueError:
+            return Response(
+                {'error': 'limit, branch and semester must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        reg_nos = search.search_students(query, max(limit, 1), branch=branch, semester=semester)
+        rows = {
+            row['reg_no']: row
+            for row in StudentRowSerializer.project(Student.objects.filter(reg_no__in=reg_nos))
+        }
+        serializer = StudentRowSerializer(context={'request': request})
+        return Response({
+            'query': query,
+            'results': [serializer.to_representation(rows[reg_no]) for reg_no in reg_nos if reg_no in rows],
+        })
+
     @action(detail=True, methods=['get'], url_path='same-batch-students')
     def same_batch_students(self, request, reg_no=None):
         """Get students from same batch as the specified student"""
         student = get_object_or_404(Student, reg_no=reg_no)
-        same_batch = Student.objects.filter(
-            branch=student.branch,
-            semester=student.semester
-        ).exclude(reg_no=student.reg_no).order_by('name')
+        same_batch = Student.objects.in_batch(
+            student.branch_id, student.semester
+        ).exclude(reg_no=student.reg_no).select_related('branch').order_by('name')
 
         serializer = self.get_serializer(same_batch, many=True)
         return Response(serializer.data)
 
 
 # ---------------- Teacher ----------------
-class TeacherViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Teacher.objects.all().order_by('id')
+class TeacherViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Teacher.objects.prefetch_related(
+        Prefetch('subjects', queryset=Subject.objects.only('id', 'name'))
+    ).order_by('id')
     serializer_class = TeacherSerializer
     permission_classes = [IsTeacher]
+    cache_namespace = 'teachers'
 
 
 # ---------------- Attendance ----------------
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(RowListMixin, viewsets.ModelViewSet):
     queryset = AttendanceRecord.objects.all().order_by('-timestamp')
     serializer_class = AttendanceRecordSerializer
+    row_serializer_class = AttendanceRecordRowSerializer
     permission_classes = [IsTeacher]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['subject', 'student__reg_no', 'status']
 
+    @property
+    def paginator(self):
+        """Use keyset pagination when the client opts in with ``?pagination=cursor``."""
+        if (
+            not hasattr(self, '_paginator')
+            and self.action == 'list'
+            and AttendanceCursorPagination.requested(self.request)
+        ):
+            self._paginator = AttendanceCursorPagination()
+        return super().paginator
+
     def get_queryset(self):
         """Enhanced queryset filtering"""
         queryset = super().get_queryset()
+        if self.action in READ_ACTIONS:
+            queryset = queryset.select_related('student', 'subject').only(*ATTENDANCE_READ_FIELDS)
         
         # Handle date filtering
         date = self.request.query_params.get('date')
         if date:
-            queryset = queryset.filter(timestamp__date=date)
+            queryset = queryset.filter(date=date)
         
         # Handle reg_no filtering specifically
         reg_no = self.request.query_params.get('reg_no')
@@ -172,17 +312,10 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             )
         
         # Get the student
-        student = get_object_or_404(Student, reg_no=reg_no)
+        student = get_object_or_404(Student.objects.select_related('branch'), reg_no=reg_no)
         
-        # Build attendance query
-        attendance_filter = {'student': student}
-        if subject_id:
-            attendance_filter['subject_id'] = subject_id
-        
-        # Get attendance records
-        records = AttendanceRecord.objects.filter(**attendance_filter)
-        total = records.count()
-        present = records.filter(status='P').count()
+        # Read the maintained counters instead of counting records
+        present, total = attendance_totals(student, subject_id)
         absent = total - present
         percentage = (present / total) * 100 if total else 0
         
@@ -199,6 +332,201 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             }
         })
 
+    @action(detail=False, methods=['get'], url_path='class-summary')
+    def class_summary(self, request):
+        """
+        Attendance summary for every student of a branch/semester batch.
+
+        Query params: ``branch`` and ``semester`` (or just ``subject``, whose
+        batch is used), optional ``subject``, ``start_date``/``end_date`` and
+        ``ordering`` (``percentage`` or ``-percentage``).
+        """
+        branch_id = int_param(request, 'branch')
+        semester = int_param(request, 'semester')
+        subject_id = int_param(request, 'subject')
+        start = date_param(request, 'start_date')
+        end = date_param(request, 'end_date')
+
+        subject = None
+        if subject_id:
+            subject = get_object_or_404(Subject, pk=subject_id)
+            branch_id = branch_id or subject.branch_id
+            semester = semester or subject.semester
+
+        if not branch_id or not semester:
+            return Response(
+                {'error': 'branch and semester (or subject) parameters are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = reports.class_summary(
+            branch_id, semester, subject=subject, start=start, end=end,
+            ordering=request.query_params.get('ordering'),
+        )
+        students = [
+            {**row, 'percentage': round(row['percentage'], 2)} for row in rows
+        ]
+
+        return Response({
+            'branch': branch_id,
+            'semester': semester,
+            'subject': subject.pk if subject else None,
+            'start_date': start,
+            'end_date': end,
+            'students': students,
+        })
+
+    @action(detail=False, methods=['get'], url_path='shortage')
+    def shortage(self, request):
+        """
+        Students of a branch/semester batch below the attendance threshold, per subject.
+
+        Query params: ``branch`` and ``semester``, optional ``threshold``
+        (percent, defaults to ``ATTENDANCE_SHORTAGE_THRESHOLD``),
+        ``short=true`` to list defaulters only and ``refresh=true`` to
+        rebuild the cached report.
+        """
+        params = request.query_params
+        try:
+            branch, semester = int(params['branch']), int(params['semester'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'branch and semester parameters are required integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        threshold = params.get('threshold')
+        if threshold is not None:
+            try:
+                threshold = float(threshold)
+            except ValueError:
+                threshold = None
+            if threshold is None or not 0 < threshold <= 100:
+                raise ValidationError({'threshold': 'Enter a percentage between 0 and 100.'})
+
+        report = reports.cached_shortage_report(
+            branch, semester, threshold, refresh=is_truthy(params.get('refresh')),
+        )
+        if is_truthy(params.get('short')):
+            report = {**report, 'students': [row for row in report['students'] if row['short']]}
+        return Response(report)
+
+    @action(detail=False, methods=['get'], url_path='rollups')
+    def rollups(self, request):
+        """
+        Attendance time series from the precomputed daily rollups.
+
+        Query params: ``bucket`` (``day``, ``week`` or ``month``), ``group``
+        (``subject`` or ``batch`` for one series per branch/semester), the
+        ``subject``, ``branch`` and ``semester`` filters and
+        ``start_date``/``end_date``.
+        """
+        params = request.query_params
+        bucket = params.get('bucket', 'day')
+        group = params.get('group', 'subject')
+        if bucket not in reports.ROLLUP_BUCKETS or group not in reports.ROLLUP_GROUPS:
+            return Response(
+                {'error': f"bucket must be one of {', '.join(reports.ROLLUP_BUCKETS)} "
+                          f"and group one of {', '.join(reports.ROLLUP_GROUPS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            subject, branch, semester = (
+                int(params[name]) if params.get(name) else None
+                for name in ('subject', 'branch', 'semester')
+            )
+        except ValueError:
+            return Response(
+                {'error': 'subject, branch and semester must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start = date_param(request, 'start_date')
+        end = date_param(request, 'end_date')
+
+        rows = reports.attendance_rollups(
+            bucket, group, subject=subject, branch=branch, semester=semester, start=start, end=end,
+        )
+        series = [
+            {
+                **({'subject': row['subject']} if group == 'subject'
+                   else {'branch': row['subject__branch'], 'semester': row['subject__semester']}),
+                'bucket': row['bucket'],
+                'present': row['present'],
+                'total': row['total'],
+                'percentage': round(row['present'] * 100 / row['total'], 2),
+            }
+            for row in rows
+        ]
+
+        return Response({
+            'bucket': bucket,
+            'group': group,
+            'start_date': start,
+            'end_date': end,
+            'series': series,
+        })
+
+    @action(detail=False, methods=['get'], url_path='sync')
+    def sync(self, request):
+        """
+        Attendance changes after the ``since`` watermark.
+
+        Returns the current state of every record created or updated since
+        then, the ids of deleted records as tombstones, and the watermark
+        to send next time. Optional ``subject`` narrows the feed.
+        """
+        params = request.query_params
+        try:
+            since = int(params.get('since', 0))
+            limit = max(1, min(int(params.get('limit', SYNC_PAGE_SIZE)), SYNC_PAGE_SIZE))
+            subject_id = int(params['subject']) if params.get('subject') else None
+        except ValueError:
+            return Response(
+                {'error': 'since, limit and subject must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        watermark, has_more, upserted, deleted = changes_since(
+            since, subject=subject_id, limit=limit
+        )
+        rows = AttendanceRecordRowSerializer.project(
+            AttendanceRecord.objects.filter(id__in=upserted).order_by('id')
+        )
+        records = AttendanceRecordRowSerializer(rows, many=True, context={'request': request}).data
+
+        # A record updated and then deleted beyond this page is already
+        # gone; report it as removed rather than leaving the client stale.
+        found = {record['id'] for record in records}
+        deleted += [pk for pk in upserted if pk not in found]
+
+        return Response({
+            'watermark': watermark,
+            'has_more': has_more,
+            'records': records,
+            'deleted': sorted(deleted),
+        })
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream attendance as CSV or NDJSON.
+
+        Query params: ``output`` (``csv`` or ``ndjson``), ``layout``
+        (``records`` for raw rows, ``register`` for a students x dates grid
+        of one ``subject``), and the ``branch``, ``semester``, ``subject``,
+        ``start_date`` and ``end_date`` filters.
+        """
+        # Validated before the response starts, so a bad value is a 400
+        # rather than an error halfway through a "successful" download.
+        params = clean_export_params(request.query_params)
+        layout, output = params['layout'], params['output']
+        subject = Subject.objects.get(pk=params['subject']) if params['subject'] else None
+        response = StreamingHttpResponse(
+            stream_export(ExportFilter.from_params(params), layout=layout, output=output, subject=subject),
+            content_type=OUTPUT_FORMATS[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="attendance-{layout}.{output}"'
+        return response
+
     @action(detail=False, methods=['post'], url_path='toggle')
     def toggle_attendance(self, request):
         """Toggle attendance for a student on current date"""
@@ -214,15 +542,9 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         student = get_object_or_404(Student, reg_no=reg_no)
         subject = get_object_or_404(Subject, pk=subject_id)
 
-        today = timezone.now().date()
-        existing = AttendanceRecord.objects.filter(
-            student=student,
-            subject=subject,
-            timestamp__date=today
-        ).first()
+        record = coordinator.run(taps.flip_attendance, student.pk, subject.pk)
 
-        if existing:
-            existing.delete()
+        if record is None:
             return Response(
                 {
                     "message": "Attendance removed (marked absent).",
@@ -232,43 +554,113 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_200_OK
             )
 
-        record = AttendanceRecord.objects.create(
-            student=student,
-            subject=subject,
-            status='P',  # Present
-            timestamp=timezone.now()
-        )
+        record.student = student
+        record.subject = subject
         serializer = self.get_serializer(record)
         return Response({
             "message": "Attendance marked present.",
             "record": serializer.data
         }, status=status.HTTP_201_CREATED)
 
-    @action(detail=False, methods=['post'], url_path='bulk')
+    @action(detail=False, methods=['post'], url_path='tap')
+    def tap(self, request):
+        """
+        Low-latency toggle for NFC taps.
+
+        Same effect as ``toggle`` but resolves reg_no and subject from an
+        in-process cache and answers with a minimal payload, so a tap costs
+        one short write transaction and no reads.
+        """
+        reg_no = request.data.get("reg_no")
+        subject_id = request.data.get("subject_id")
+
+        if not reg_no or not subject_id:
+            return Response(
+                {"error": "reg_no and subject_id are required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        student = taps.students.get(reg_no)
+        if student is None:
+            raise NotFound(f'Student with registration number {reg_no} not found.')
+        subject_pk = taps.subjects.get(subject_id)
+        if subject_pk is None:
+            raise NotFound(f'Subject {subject_id} not found.')
+
+        student_pk, student_name = student
+        record = coordinator.run(taps.flip_attendance, student_pk, subject_pk)
+        return Response(
+            {
+                "reg_no": reg_no,
+                "student_name": student_name,
+                "status": 'A' if record is None else 'P',
+                "record_id": None if record is None else record.pk,
+            },
+            status=status.HTTP_200_OK if record is None else status.HTTP_201_CREATED
+        )
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        parser_classes=[ORJSONParser, NDJSONParser],
+    )
     def bulk_create(self, request):
-        """Bulk create attendance records"""
-        if not isinstance(request.data, list):
+        """
+        Bulk create attendance records.
+
+        Accepts a JSON list or an NDJSON stream (``application/x-ndjson``)
+        with one record per line. The whole batch is written in a single
+        transaction or, if any row is invalid, not at all.
+        """
+        rows = request.data
+        if not isinstance(rows, (list, Iterator)):
             return Response(
                 {"error": "Expected a list of attendance records."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        serializer = AttendanceRecordSerializer(
-            data=request.data, 
-            many=True,
-            context={'request': request}
+
+        try:
+            saved = ingest_attendance(rows)
+        except BulkIngestError as exc:
+            return Response(
+                {"error": str(exc), "rows": exc.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                "message": f"{saved} attendance records saved.",
+                "count": saved,
+            },
+            status=status.HTTP_201_CREATED
         )
-        
-        if serializer.is_valid():
-            serializer.save()
+
+    @action(detail=False, methods=['post'], url_path='corrections')
+    def corrections(self, request):
+        """
+        Correct many days of attendance in one request.
+
+        Takes a list of ``{"reg_no", "subject", "date", "status"}`` items and
+        sets every record of that student, subject and day to ``status``,
+        creating the record when the day has none. Valid items are applied
+        in one transaction; each item gets a result (``updated``,
+        ``created``, ``unchanged``, ``superseded`` or ``failed`` with errors).
+        """
+        items = request.data
+        if not isinstance(items, list):
             return Response(
-                {
-                    "message": f"{len(serializer.data)} attendance records saved.",
-                    "records": serializer.data
-                },
-                status=status.HTTP_201_CREATED
+                {"error": "Expected a list of corrections."},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = apply_corrections(items)
+        failed = sum(result.get('result') == FAILED for result in results)
+        return Response({
+            "message": f"{len(results) - failed} of {len(results)} corrections applied.",
+            "failed": failed,
+            "results": results,
+        }, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['put'], url_path='update')
     def update_attendance(self, request):
@@ -287,7 +679,7 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         student = get_object_or_404(Student, reg_no=reg_no)
         subject = get_object_or_404(Subject, pk=subject_id)
 
-        record = AttendanceRecord.objects.filter(
+        record = AttendanceRecord.objects.select_related('student', 'subject').filter(
             student=student,
             subject=subject,
             timestamp=timestamp
@@ -306,4 +698,95 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         return Response({
             "message": "Attendance record updated successfully.",
             "record": serializer.data
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+
+# ---------------- Bootstrap ----------------
+class BootstrapView(APIView):
+    """
+    Subjects, rosters and today's attendance of the signed-in teacher.
+
+    Replaces the branches/subjects/students/attendance calls of the home
+    screen with one response built from a fixed number of queries. The
+    ``version`` field doubles as the ``ETag``, so a client revalidating
+    with ``If-None-Match`` gets a 304 while nothing changed.
+    """
+    permission_classes = [IsTeacher]
+
+    def get(self, request):
+        data = build_bootstrap(request.user.pk, request=request)
+        if data is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        etag = quote_etag(data['version'])
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+# ---------------- Background jobs ----------------
+class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                 viewsets.GenericViewSet):
+    """
+    Submit exports and rebuilds to the ``run_jobs`` workers and poll them.
+
+    ``POST`` takes ``{"kind", "params"}`` and answers ``202`` with the
+    queued job; ``GET /jobs/<id>/`` reports ``status`` and ``progress``
+    (with ``Retry-After`` until the job is finished) and
+    ``/jobs/<id>/download/`` returns the result file. Teachers only see
+    their own jobs and may have ``JOB_MAX_PENDING`` unfinished at a time.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsTeacher]
+
+    def get_queryset(self):
+        return Job.objects.filter(owner_id=self.request.user.pk).order_by('-id')
+
+    def create(self, request, *args, **kwargs):
+        pending = self.get_queryset().filter(status__in=[Job.QUEUED, Job.RUNNING]).count()
+        if pending >= settings.JOB_MAX_PENDING:
+            return Response(
+                {'error': f'At most {settings.JOB_MAX_PENDING} jobs may be queued or running at a time.'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Claims-based authentication accepts a token that outlived its teacher.
+        if not Teacher.objects.filter(pk=request.user.pk).exists():
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        job = serializer.save(owner_id=request.user.pk)
+        response = Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = reverse('job-detail', args=[job.pk])
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.data['status'] in (Job.QUEUED, Job.RUNNING):
+            response['Retry-After'] = '2'
+        return response
+
+    @action(detail=True, methods=['get'], url_path='download')
+    def download(self, request, pk=None):
+        """Return the result file of a succeeded job."""
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED or not job.result:
+            return Response(
+                {'error': f'Job {job.pk} has no result to download ({job.status}).'},
+                status=status.HTTP_409_CONFLICT
+            )
+        name = os.path.basename(job.result.name)
+        content_type = OUTPUT_FORMATS.get(os.path.splitext(name)[1].lstrip('.'), 'application/octet-stream')
+        return FileResponse(job.result.open('rb'), as_attachment=True, filename=name, content_type=content_type)
+
+
+# ---------------- Auth ----------------
+class TeacherTokenObtainPairView(TokenObtainPairView):
+    """Issue tokens carrying ``is_staff`` and the teacher's subject ids as claims."""
+    serializer_class = TeacherTokenObtainPairSerializer
+
+
+class TeacherTokenRefreshView(TokenRefreshView):
+    serializer_class = TeacherTokenRefreshSerializer
@@ -0,0 +1,166 @@
+import asyncio
+import queue
+import threading
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+
+# Most writes committed together in one transaction.
+MAX_BATCH = 64
+
+
+class _Job:
+    __slots__ = ('func', 'args', 'kwargs', 'wrappers', 'notify', 'result', 'error', 'done')
+
+    def __init__(self, func, args, kwargs, wrappers, notify=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.wrappers = wrappers
+        self.notify = notify
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def finish(self):
+        self.done.set()
+        if self.notify is not None:
+            self.notify()
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class WriteCoordinator:
+    """
+    Serialize attendance writes of a process through one writer thread.
+
+    SQLite allows one writer at a time; with many request threads racing
+    for the lock, latency becomes a lottery and busy timeouts can expire.
+    Instead, callers queue their write and block while the writer thread
+    drains everything queued so far and runs it in a single ``BEGIN
+    IMMEDIATE`` transaction, one savepoint per write (a failing write only
+    fails its own caller; when a deferred foreign key fails the commit, the
+    batch is retried one write per transaction). Writes that arrive while a
+    batch commits form the next batch, so one fsync covers a whole burst of
+    taps.
+
+    Callers already inside a transaction run inline, so their write stays
+    part of it. The caller's ``execute_wrapper`` hooks are applied around
+    its write on the writer thread, so per-request SQL accounting still
+    sees the statements.
+    """
+
+    def __init__(self, max_batch=MAX_BATCH):
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return settings.ATTENDANCE_WRITE_COORDINATOR
+
+    def run(self, func, *args, **kwargs):
+        """Run ``func(*args, **kwargs)`` on the writer thread and return its result."""
+        job = self._submit(func, args, kwargs)
+        job.done.wait()
+        return job.outcome()
+
+    async def arun(self, func, *args, **kwargs):
+        """Async :meth:`run`: the event loop is woken when the batch commits, no thread waits."""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        job = await sync_to_async(self._submit)(
+            func, args, kwargs, notify=lambda: loop.call_soon_threadsafe(_wake, waiter)
+        )
+        await waiter
+        return job.outcome()
+
+    def _submit(self, func, args, kwargs, notify=None):
+        job = _Job(func, args, kwargs, list(connection.execute_wrappers), notify)
+        if (
+            not self.enabled
+            or connection.in_atomic_block
+            or threading.current_thread() is self._thread
+        ):
+            try:
+                job.result = func(*args, **kwargs)
+            except Exception as exc:
+                job.error = exc
+            job.finish()
+            return job
+
+        self._ensure_writer()
+        self._queue.put(job)
+        return job
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._serve, name='attendance-writer', daemon=True)
+                self._thread.start()
+
+    def _serve(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Honour CONN_MAX_AGE and health checks on the writer's connection.
+            close_old_connections()
+            self._execute(batch)
+
+    @classmethod
+    def _execute(cls, batch):
+        try:
+            try:
+                cls._commit(batch)
+            except IntegrityError:
+                if len(batch) == 1:
+                    raise
+                # A deferred constraint failed at COMMIT: SQLite checks foreign
+                # keys there, not at a write's savepoint, so the culprit is
+                # unknown. Nothing was written; retry each write on its own.
+                for job in batch:
+                    job.result = job.error = None
+                    try:
+                        cls._commit([job])
+                    except Exception as exc:
+                        job.result, job.error = None, exc
+        except Exception as exc:  # the commit itself failed; nothing was written
+            for job in batch:
+                if job.error is None:
+                    job.result, job.error = None, exc
+        finally:
+            for job in batch:
+                job.finish()
+
+    @staticmethod
+    def _commit(batch):
+        """Run ``batch`` in one transaction, one savepoint per write; raises if the commit fails."""
+        with transaction.atomic():
+            for job in batch:
+                try:
+                    with transaction.atomic(), ExitStack() as stack:
+                        for wrapper in job.wrappers:
+                            stack.enter_context(connection.execute_wrapper(wrapper))
+                        job.result = job.func(*job.args, **job.kwargs)
+                except Exception as exc:
+                    job.error = exc
+
+
+coordinator = WriteCoordinator()